@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""Collect k3s.yaml from every server of the inventory and merge them.
+
+All servers are fetched concurrently, so a refresh of the whole lab takes
+about as long as the slowest node. The server URLs are rewritten to the
+API VIP (one context, named after cluster_context) or to each node's IP
+(one context per node), then everything is merged in a single pass.
+
+Usage:
+    harvest_kubeconfigs.py [-i INVENTORY] [--endpoint vip|node]
+                           [--backend ssh|local] [--source-dir DIR]
+                           [-k KUBECONFIG] [--workers N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+
+from merge_kubectl import (
+    SafeLoader,
+    default_kube_config_path,
+    load_config,
+    merge_configs,
+)
+
+default_inventory = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "k3s-ansible", "inventory.yml"
+)
+remote_kubeconfig = "/etc/rancher/k3s/k3s.yaml"
+
+
+def _resolved(value):
+    """Drop Jinja templated values, they only make sense inside Ansible."""
+    if isinstance(value, str) and "{{" in value:
+        return None
+    return value
+
+
+def load_inventory(path, group="server"):
+    """Read the hosts of a group from an Ansible YAML inventory.
+
+    Variables of parent groups are inherited, host variables win.
+
+    Args:
+        path (str): Inventory file
+        group (str): Group whose hosts are returned
+
+    Returns:
+        list: (host, variables) tuples in inventory order
+    """
+    with open(path, "r") as f:
+        inventory = yaml.load(f, Loader=SafeLoader) or {}
+
+    hosts = []
+
+    def walk(name, body, inherited, selected):
+        body = body or {}
+        variables = {**inherited, **(body.get("vars") or {})}
+        selected = selected or name == group
+        if selected:
+            for host, host_vars in (body.get("hosts") or {}).items():
+                hosts.append((host, {**variables, **(host_vars or {})}))
+        for child, child_body in (body.get("children") or {}).items():
+            walk(child, child_body, variables, selected)
+
+    for name, body in inventory.items():
+        walk(name, body, {}, False)
+
+    seen = set()
+    return [(h, v) for h, v in hosts if not (h in seen or seen.add(h))]
+
+
+class SSHFetcher:
+    """Reads the kubeconfig of a node over ssh."""
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+
+    def __call__(self, host, variables):
+        address = _resolved(variables.get("ansible_host")) or host
+        user = _resolved(variables.get("ansible_user"))
+        command = [
+            "ssh",
+            "-o",
+            "BatchMode=yes",
+            "-p",
+            str(_resolved(variables.get("ansible_port")) or 22),
+            f"{user}@{address}" if user else address,
+            f"sudo -n cat {remote_kubeconfig}",
+        ]
+        result = subprocess.run(
+            command, capture_output=True, text=True, timeout=self.timeout, check=True
+        )
+        return yaml.load(result.stdout, Loader=SafeLoader)
+
+
+class LocalDirFetcher:
+    """Reads <directory>/<host>.yaml, a stand-in for nodes in tests."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def __call__(self, host, variables):
+        config = load_config(os.path.join(self.directory, f"{host}.yaml"))
+        if not config:
+            raise FileNotFoundError(f"No kubeconfig for {host} in {self.directory}")
+        return config
+
+
+def harvest(hosts, fetch, workers=8):
+    """Fetch the kubeconfig of every host concurrently.
+
+    Args:
+        hosts (list): (host, variables) tuples
+        fetch (callable): Backend taking a host and its variables and
+            returning the loaded kubeconfig
+        workers (int): Maximum number of concurrent fetches
+
+    Returns:
+        tuple: ({host: kubeconfig}, {host: error}), in inventory order
+    """
+    with ThreadPoolExecutor(max_workers=max(min(workers, len(hosts)), 1)) as pool:
+        futures = [(host, pool.submit(fetch, host, v)) for host, v in hosts]
+    configs, errors = {}, {}
+    for host, future in futures:
+        try:
+            configs[host] = future.result()
+        except Exception as e:
+            errors[host] = str(e) or type(e).__name__
+    return configs, errors
+
+
+def build_sources(configs, hosts, endpoint, cluster_name):
+    """Turn harvested kubeconfigs into merge sources.
+
+    Args:
+        configs (dict): Host to kubeconfig
+        hosts (list): (host, variables) tuples, for the VIP and node addresses
+        endpoint (str): "vip" for one context behind kube_vip_endpoint,
+            "node" for one context per node
+        cluster_name (str): Context name, or its prefix in node mode
+
+    Returns:
+        list: (kubeconfig, name, server) tuples for merge_configs
+    """
+    variables = dict(hosts)
+    if endpoint == "vip":
+        # With a shared datastore every server exports the same cluster
+        host, config = next(iter(configs.items()))
+        vip = _resolved(variables[host].get("kube_vip_endpoint"))
+        if not vip:
+            raise ValueError(f"No kube_vip_endpoint for {host}")
+        return [(config, cluster_name, vip)]
+    return [
+        (
+            config,
+            f"{cluster_name}-{host}",
+            _resolved(variables[host].get("ansible_host")) or host,
+        )
+        for host, config in configs.items()
+    ]
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-i", "--inventory", default=default_inventory)
+    parser.add_argument("--group", default="server")
+    parser.add_argument("--endpoint", choices=("vip", "node"), default="vip")
+    parser.add_argument("--backend", choices=("ssh", "local"), default="ssh")
+    parser.add_argument("--source-dir", help="Directory of the local backend")
+    parser.add_argument("-k", "--kubeconfig", default=default_kube_config_path())
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args(argv)
+
+    if args.backend == "local":
+        if not args.source_dir:
+            parser.error("--backend local needs --source-dir")
+        fetch = LocalDirFetcher(args.source_dir)
+    else:
+        fetch = SSHFetcher(timeout=args.timeout)
+
+    hosts = load_inventory(args.inventory, args.group)
+    if not hosts:
+        print(f"Error: No hosts in group {args.group}")
+        return 1
+
+    start = time.monotonic()
+    configs, errors = harvest(hosts, fetch, args.workers)
+    elapsed = time.monotonic() - start
+    for host, error in errors.items():
+        print(f"{host}: {error}", file=sys.stderr)
+    print(f"Fetched {len(configs)}/{len(hosts)} kubeconfig(s) in {elapsed:.1f}s")
+    if not configs:
+        return 1
+
+    cluster_name = _resolved(hosts[0][1].get("cluster_context")) or "default"
+    sources = build_sources(configs, hosts, args.endpoint, cluster_name)
+    changes = merge_configs(args.kubeconfig, sources, current=sources[0][1])
+    print(f"{changes} change(s)" if changes else "Already up to date")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import yaml
+
+from harvest_kubeconfigs import (
+    LocalDirFetcher,
+    build_sources,
+    default_inventory,
+    harvest,
+    load_inventory,
+)
+from merge_kubectl import load_config, merge_configs
+
+EXPORT = {
+    "apiVersion": "v1",
+    "kind": "Config",
+    "clusters": [{"cluster": {"server": "https://127.0.0.1:6443"}, "name": "default"}],
+    "contexts": [
+        {"context": {"cluster": "default", "user": "default"}, "name": "default"}
+    ],
+    "current-context": "default",
+    "users": [{"name": "default", "user": {"token": "secret"}}],
+}
+
+
+def test_inventory_servers_inherit_group_vars():
+    hosts = load_inventory(default_inventory)
+
+    assert [host for host, _ in hosts] == [
+        "192.168.1.51",
+        "192.168.1.52",
+        "192.168.1.53",
+    ]
+    assert hosts[0][1]["kube_vip_endpoint"] == "192.168.1.144"
+
+
+def test_harvest_is_concurrent_and_merges_once(tmp_path):
+    hosts = load_inventory(default_inventory)
+    for host, _ in hosts[:2]:
+        (tmp_path / f"{host}.yaml").write_text(yaml.safe_dump(EXPORT))
+    local = LocalDirFetcher(str(tmp_path))
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow_fetch(host, variables):
+        with lock:
+            running.append(host)
+            peak.append(len(running))
+        time.sleep(0.2)
+        with lock:
+            running.remove(host)
+        return local(host, variables)
+
+    start = time.monotonic()
+    configs, errors = harvest(hosts, slow_fetch, workers=8)
+    assert time.monotonic() - start < 0.4
+    assert max(peak) == 3
+    assert list(configs) == ["192.168.1.51", "192.168.1.52"]
+    assert list(errors) == ["192.168.1.53"]
+
+    kubeconfig = str(tmp_path / "config")
+    vip = build_sources(configs, hosts, "vip", "galideo")
+    nodes = build_sources(configs, hosts, "node", "galideo")
+    assert merge_configs(kubeconfig, vip + nodes, current="galideo") == 10
+
+    merged = load_config(kubeconfig)
+    servers = {c["name"]: c["cluster"]["server"] for c in merged["clusters"]}
+    assert servers == {
+        "galideo": "https://192.168.1.144:6443",
+        "galideo-192.168.1.51": "https://192.168.1.51:6443",
+        "galideo-192.168.1.52": "https://192.168.1.52:6443",
+    }
+    assert merged["current-context"] == "galideo"
+    assert merge_configs(kubeconfig, vip + nodes, current="galideo") == 0
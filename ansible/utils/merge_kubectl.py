@@ -1,50 +1,272 @@
 #!/usr/bin/env python3
-import yaml
+"""Merge exported kubeconfigs into an existing kubeconfig.
+
+Clusters, users and contexts are upserted by name, so contexts of other
+clusters survive. The target is only rewritten when something changed, and
+then atomically.
+
+Usage:
+    merge_kubectl.py [-k KUBECONFIG] [--current NAME] SOURCE [SOURCE ...]
+    merge_kubectl.py <ip> <namespace>
+
+A SOURCE is "path[=name[@server]]": the exported file, optionally renamed
+to ``name`` (the k3s export calls everything "default") and pointed at
+``server`` (an IP, host or URL). The second form is the original interface
+and merges ../exported_k3s_config as ``namespace`` at https://<ip>:6443.
+"""
+
+import argparse
+import ipaddress
 import os
-import pwd
+import re
+import sys
+import tempfile
+
+import yaml
 
-imported_config = '../exported_k3s_config'
-kube_config_path = "/Users/raphael/.kube/config"
+try:
+    from yaml import CSafeDumper as SafeDumper, CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeDumper, SafeLoader
 
-def modify_kube_config(ip, namespace):
-  # Load the kubeconfig file
-  with open(imported_config, 'r') as f:
-      config = yaml.safe_load(f)
+imported_config = "../exported_k3s_config"
+
+# kubeconfig list -> key of the entry's payload
+SECTIONS = {"clusters": "cluster", "users": "user", "contexts": "context"}
+
+HOSTNAME = re.compile(
+    r"(?!-)[A-Za-z0-9-]{1,63}(?<!-)(\.(?!-)[A-Za-z0-9-]{1,63}(?<!-))*"
+)
+# Looks like a mistyped file name rather than a host
+FILE_SUFFIXES = (".yaml", ".yml", ".json", ".conf", ".config", ".kubeconfig")
+
+
+def default_kube_config_path():
+    """First file of $KUBECONFIG, ~/.kube/config otherwise."""
+    paths = [p for p in os.environ.get("KUBECONFIG", "").split(os.pathsep) if p]
+    return paths[0] if paths else os.path.expanduser("~/.kube/config")
+
+
+def load_config(path):
+    """Load a kubeconfig, an empty one if the file does not exist."""
+    try:
+        with open(path, "r") as f:
+            return yaml.load(f, Loader=SafeLoader) or {}
+    except FileNotFoundError:
+        return {}
+
+
+def server_url(server):
+    """Turn an IP or host into the API server URL, URLs are kept."""
+    return server if "://" in server else f"https://{server}:6443"
+
+
+def rename(config, name, server=None):
+    """Rename the cluster, user and context of an exported kubeconfig.
+
+    Args:
+        config (dict): Kubeconfig with a single context
+        name (str): New name of the cluster, user and context
+        server (str): Optional API server IP, host or URL
+
+    Returns:
+        dict: The renamed kubeconfig
+
+    Raises:
+        ValueError: If the kubeconfig does not have exactly one context
+    """
+    contexts = config.get("contexts") or []
+    if len(contexts) != 1:
+        raise ValueError(f"Can only rename a single context, found {len(contexts)}")
+    context = contexts[0]["context"]
+    clusters = {c["name"]: c for c in config.get("clusters") or []}
+    users = {u["name"]: u for u in config.get("users") or []}
+
+    cluster = dict(clusters[context["cluster"]], name=name)
+    cluster["cluster"] = dict(cluster["cluster"])
+    if server:
+        cluster["cluster"]["server"] = server_url(server)
+    user = dict(users[context["user"]], name=name)
+
+    return {
+        **config,
+        "clusters": [cluster],
+        "users": [user],
+        "contexts": [
+            {"context": {**context, "cluster": name, "user": name}, "name": name}
+        ],
+        "current-context": name,
+    }
 
-  # Modify the server URL
-  config['clusters'][0]['cluster']['server'] = f"https://{ip}:6443"
 
-  # Modify the context name
-  config['clusters'][0]['cluster']['name'] = namespace
-  config['clusters'][0]['name'] = namespace
+class KubeConfig:
+    """A kubeconfig whose clusters, users and contexts are indexed by name."""
 
-  config['contexts'][0]['context']['cluster'] = namespace
-  config['contexts'][0]['context']['user'] = namespace
-  config['contexts'][0]['name'] = namespace
-  config['current-context'] = namespace
+    def __init__(self, data=None):
+        self.data = data or {}
+        self.data.setdefault("apiVersion", "v1")
+        self.data.setdefault("kind", "Config")
+        self.data.setdefault("preferences", {})
+        self.index = {}
+        for section in SECTIONS:
+            entries = self.data.get(section) or []
+            self.data[section] = entries
+            self.index[section] = {e["name"]: i for i, e in enumerate(entries)}
+        self.changes = 0
 
-  config['users'][0]['name'] = namespace
+    def upsert(self, section, entry):
+        """Add an entry or replace the one with the same name.
 
-  # Write the modified config back to the file
-  with open(kube_config_path, 'w') as f:
-    yaml.dump(config, f)
-#   change_ownership(kube_config_path)
+        Returns:
+            bool: True if the config changed
+        """
+        entries = self.data[section]
+        position = self.index[section].get(entry["name"])
+        if position is None:
+            self.index[section][entry["name"]] = len(entries)
+            entries.append(entry)
+        elif entries[position] != entry:
+            entries[position] = entry
+        else:
+            return False
+        self.changes += 1
+        return True
 
-def change_ownership(file_path):
-    uid = os.getuid()
-    gid = os.getgid()
+    def merge(self, other):
+        """Upsert every cluster, user and context of another kubeconfig.
 
-    os.chown(file_path, uid, gid)
+        Returns:
+            int: Number of entries added or replaced
+        """
+        before = self.changes
+        for section in SECTIONS:
+            for entry in other.get(section) or []:
+                self.upsert(section, entry)
+        return self.changes - before
+
+    def use_context(self, name):
+        """Set the current context.
+
+        Raises:
+            ValueError: If there is no context with that name
+        """
+        if name not in self.index["contexts"]:
+            raise ValueError(f"Unknown context: {name}")
+        if self.data.get("current-context") != name:
+            self.data["current-context"] = name
+            self.changes += 1
+
+
+def write_atomic(path, data):
+    """Write YAML next to ``path`` and move it in place.
+
+    Readers (kubectl, k9s, ...) never see a half-written file. The mode of
+    an existing file is kept, new files are only readable by their owner.
+    A symlinked kubeconfig stays a symlink, its target is replaced.
+    """
+    path = os.path.realpath(path)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o600
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".kubeconfig-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            yaml.dump(
+                data, f, Dumper=SafeDumper, default_flow_style=False, sort_keys=False
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def parse_source(source):
+    """Split "path[=name[@server]]" into (path, name, server)."""
+    path, _, rest = source.partition("=")
+    name, _, server = rest.partition("@")
+    return path, name or None, server or None
+
+
+def merge_configs(kube_config_path, sources, current=None):
+    """Merge exported kubeconfigs into a kubeconfig.
+
+    Args:
+        kube_config_path (str): Kubeconfig to update
+        sources (list): (path or loaded config, name, server) tuples; name
+            and server are optional and rename the single context
+        current (str): Context to switch to, by default the last source's
+            when it was renamed
+
+    Returns:
+        int: Number of changes, 0 if the file was left untouched
+    """
+    config = KubeConfig(load_config(kube_config_path))
+    renamed = None
+    for source, name, server in sources:
+        exported = load_config(source) if isinstance(source, str) else source
+        if name:
+            exported = rename(exported, name, server)
+            renamed = name
+        config.merge(exported)
+    current = current or renamed
+    if current:
+        config.use_context(current)
+    if config.changes:
+        write_atomic(kube_config_path, config.data)
+    return config.changes
+
+
+def modify_kube_config(ip, namespace):
+    """Merge ../exported_k3s_config as ``namespace`` and switch to it."""
+    return merge_configs(
+        default_kube_config_path(), [(imported_config, namespace, ip)], namespace
+    )
+
+
+def is_host(value):
+    """True for an IP address or host name that is not an existing file."""
+    if os.path.exists(value):
+        return False
+    try:
+        ipaddress.ip_address(value)
+        return True
+    except ValueError:
+        pass
+    return bool(HOSTNAME.fullmatch(value)) and not value.lower().endswith(FILE_SUFFIXES)
+
+
+def is_legacy_invocation(argv):
+    """True for the original "<ip> <namespace>" command line."""
+    return len(argv) == 2 and is_host(argv[0]) and not os.path.exists(argv[1])
+
+
+def main(argv):
+    if is_legacy_invocation(argv):
+        changes = modify_kube_config(*argv)
+    else:
+        parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+        parser.add_argument("sources", nargs="+", metavar="SOURCE")
+        parser.add_argument("-k", "--kubeconfig", default=default_kube_config_path())
+        parser.add_argument("--current", help="Context to switch to")
+        args = parser.parse_args(argv)
+        sources = [parse_source(s) for s in args.sources]
+        missing = [path for path, _, _ in sources if not os.path.isfile(path)]
+        if missing:
+            parser.error(f"No such kubeconfig: {', '.join(missing)}")
+        changes = merge_configs(args.kubeconfig, sources, args.current)
+    print(f"{changes} change(s)" if changes else "Already up to date")
 
 
 if __name__ == "__main__":
-    import sys
-    if len(sys.argv) != 3:
+    if len(sys.argv) < 2:
         print("Error: Missing arguments.")
         print("Usage: python script.py <ip> <namespace>")
+        print("       python script.py SOURCE [SOURCE ...], see --help")
         sys.exit(1)
-
-    ip = sys.argv[1]
-    namespace = sys.argv[2]
-
-    modify_kube_config(ip, namespace)
\ No newline at end of file
+    main(sys.argv[1:])
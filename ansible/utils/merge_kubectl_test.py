@@ -0,0 +1,99 @@
+import os
+
+import pytest
+import yaml
+
+import merge_kubectl
+from merge_kubectl import load_config, main, merge_configs
+
+
+def export(server="https://127.0.0.1:6443", token="secret"):
+    return {
+        "apiVersion": "v1",
+        "kind": "Config",
+        "clusters": [{"cluster": {"server": server}, "name": "default"}],
+        "contexts": [
+            {"context": {"cluster": "default", "user": "default"}, "name": "default"}
+        ],
+        "current-context": "default",
+        "users": [{"name": "default", "user": {"token": token}}],
+    }
+
+
+def write(path, data):
+    path.write_text(yaml.safe_dump(data))
+    return str(path)
+
+
+def test_merge_keeps_other_contexts_and_skips_unchanged_writes(tmp_path):
+    kubeconfig = str(tmp_path / "config")
+    source = write(tmp_path / "k3s.yaml", export())
+    assert merge_configs(kubeconfig, [(source, "other", "10.0.0.9")]) == 4
+    assert merge_configs(kubeconfig, [(source, "lab", "10.0.0.1")]) == 4
+
+    config = load_config(kubeconfig)
+    assert [c["name"] for c in config["contexts"]] == ["other", "lab"]
+    assert config["current-context"] == "lab"
+    assert config["clusters"][1]["cluster"]["server"] == "https://10.0.0.1:6443"
+    assert oct(os.stat(kubeconfig).st_mode & 0o777) == "0o600"
+
+    mtime = os.stat(kubeconfig).st_mtime_ns
+    assert merge_configs(kubeconfig, [(source, "lab", "10.0.0.1")]) == 0
+    assert os.stat(kubeconfig).st_mtime_ns == mtime
+
+    # A rotated token replaces the user in place
+    rotated = write(tmp_path / "k3s.yaml", export(token="rotated"))
+    assert merge_configs(kubeconfig, [(rotated, "lab", "10.0.0.1")]) == 1
+    users = load_config(kubeconfig)["users"]
+    assert [u["name"] for u in users] == ["other", "lab"]
+    assert users[1]["user"]["token"] == "rotated"
+
+
+def test_symlinked_kubeconfig_stays_a_symlink(tmp_path):
+    target = tmp_path / "dotfiles" / "kubeconfig"
+    target.parent.mkdir()
+    write(target, {})
+    link = tmp_path / "config"
+    link.symlink_to(target)
+
+    merge_configs(str(link), [(export(), "lab", "10.0.0.1")])
+
+    assert link.is_symlink()
+    assert load_config(str(target))["current-context"] == "lab"
+
+
+def test_legacy_command_line(tmp_path, monkeypatch, capsys):
+    kubeconfig = tmp_path / "config"
+    monkeypatch.setenv("KUBECONFIG", str(kubeconfig))
+    monkeypatch.setattr(
+        merge_kubectl, "imported_config", write(tmp_path / "exported", export())
+    )
+
+    main(["192.168.1.144", "lab"])
+
+    config = load_config(str(kubeconfig))
+    assert config["current-context"] == "lab"
+    assert config["clusters"][0]["cluster"]["server"] == "https://192.168.1.144:6443"
+    assert "4 change(s)" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize(
+    "argv", [["a.yaml", "b.yaml"], ["missing/k3s.yaml", "lab"], ["a.yml", "lab"]]
+)
+def test_mistyped_sources_are_not_taken_for_the_legacy_form(
+    tmp_path, monkeypatch, argv
+):
+    kubeconfig = tmp_path / "config"
+    monkeypatch.setenv("KUBECONFIG", str(kubeconfig))
+
+    assert not merge_kubectl.is_legacy_invocation(argv)
+    with pytest.raises(SystemExit):
+        main(argv)
+    assert not kubeconfig.exists()
+
+
+def test_legacy_form_accepts_hosts_only():
+    assert merge_kubectl.is_legacy_invocation(["k3s-vip.lab.local", "lab"])
+    assert merge_kubectl.is_legacy_invocation(["fd00::1", "lab"])
+    assert not merge_kubectl.is_legacy_invocation(["k3s.yaml=lab", "x"])
+    assert not merge_kubectl.is_legacy_invocation(["192.168.1.1"])
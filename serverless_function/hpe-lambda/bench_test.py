@@ -0,0 +1,106 @@
+"""Latency benchmarks of handle() against the mock Redfish service.
+
+Skipped unless ILO_BENCH=1, e.g.:
+
+    ILO_BENCH=1 ILO_BENCH_LATENCY=0.05 pytest bench_test.py
+
+Compares the cold path (no pooled client, no caches), the warm path (pooled
+session, full downloads), the cached path (ETag revalidation), max_age hits
+and the parallel snapshot against sequential reads. Results, including the
+per-endpoint request metrics, are written as JSON to ILO_BENCH_OUTPUT
+(default bench_results.json).
+"""
+
+import json
+import os
+import platform
+import statistics
+import time
+import types
+
+import pytest
+
+from . import handler
+from .ilo_redfish_controller import shared_resource_cache
+from .mock_redfish import MockRedfishServer
+
+pytestmark = pytest.mark.skipif(
+    os.environ.get("ILO_BENCH") != "1", reason="set ILO_BENCH=1 to run benchmarks"
+)
+
+ITERATIONS = int(os.environ.get("ILO_BENCH_ITERATIONS", 20))
+LATENCY = float(os.environ.get("ILO_BENCH_LATENCY", 0.02))
+OUTPUT = os.environ.get("ILO_BENCH_OUTPUT", "bench_results.json")
+
+
+def call(request):
+    body = handler.handle(types.SimpleNamespace(body=json.dumps(request)), None)
+    result = json.loads(body)
+    assert "error" not in result, result
+    return result
+
+
+def measure(run, before=None):
+    samples = []
+    for _ in range(ITERATIONS):
+        if before:
+            before()
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return {
+        "p50_ms": statistics.median(samples) * 1000,
+        "max_ms": max(samples) * 1000,
+    }
+
+
+def cold():
+    handler.client_pool.close()
+    shared_resource_cache.clear()
+
+
+def drop_responses():
+    for _, client in list(handler.client_pool._clients.values()):
+        client.response_cache.clear()
+
+
+def test_bench(monkeypatch):
+    with MockRedfishServer(latency=LATENCY, temperatures=80, fans=12) as ilo:
+        monkeypatch.setenv("ILO_HOST", ilo.url)
+        monkeypatch.setenv("ILO_USERNAME", "admin")
+        monkeypatch.setenv("ILO_PASSWORD", "password")
+        handler.request_metrics.reset()
+
+        thermal = {"action": "thermal"}
+        results = {
+            "cold": measure(lambda: call(thermal), before=cold),
+            "warm": measure(lambda: call(thermal), before=drop_responses),
+            "cached": measure(lambda: call(thermal)),
+            "max_age": measure(lambda: call({**thermal, "max_age": 60})),
+            "sequential": measure(
+                lambda: [
+                    call({"action": a}) for a in ("system_info", "thermal", "power")
+                ],
+                before=drop_responses,
+            ),
+            "snapshot": measure(
+                lambda: call({"action": "snapshot"}), before=drop_responses
+            ),
+        }
+        endpoints = handler.request_metrics.summary()
+        handler.client_pool.close()
+
+    report = {
+        "python": platform.python_version(),
+        "timestamp": time.time(),
+        "iterations": ITERATIONS,
+        "latency_s": LATENCY,
+        "results": results,
+        "endpoints": endpoints,
+    }
+    with open(OUTPUT, "w") as f:
+        json.dump(report, f, indent=2)
+
+    assert results["cached"]["p50_ms"] < results["cold"]["p50_ms"]
+    assert results["max_age"]["p50_ms"] < LATENCY * 1000
+    assert results["snapshot"]["p50_ms"] < results["sequential"]["p50_ms"]
@@ -0,0 +1,83 @@
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Tuple
+
+if TYPE_CHECKING:
+    from .ilo_redfish_controller import IloRedfishClient
+
+logger = logging.getLogger(__name__)
+
+
+def new_client(host: str, username: str, password: str) -> "IloRedfishClient":
+    """Build a default client, importing requests only when one is needed."""
+    from .ilo_redfish_controller import IloRedfishClient
+
+    return IloRedfishClient(host, username, password)
+
+
+class ClientPool:
+    """Process-wide pool of Redfish clients, one per iLO and user.
+
+    Clients keep their session token and keep-alive connections, so warm
+    invocations reuse them instead of logging in and doing a TLS handshake
+    on every request.
+    """
+
+    def __init__(self, factory: Callable[..., "IloRedfishClient"] = new_client):
+        """Initialize the pool.
+
+        Args:
+            factory (Callable[..., IloRedfishClient]): Builds a client from
+                host, username and password
+        """
+        self.factory = factory
+        self._clients: Dict[Tuple[str, str], Tuple[str, "IloRedfishClient"]] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def get(self, host: str, username: str, password: str) -> "IloRedfishClient":
+        """Get the pooled client for a host, creating it on first use.
+
+        Args:
+            host (str): iLO hostname or IP address
+            username (str): iLO username
+            password (str): iLO password
+
+        Returns:
+            IloRedfishClient: The pooled client
+        """
+        key = (host, username)
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None and entry[0] == password:
+                self.reused += 1
+                return entry[1]
+            stale = entry[1] if entry is not None else None
+            client = self.factory(host, username, password)
+            self._clients[key] = (password, client)
+            self.created += 1
+        if stale is not None:
+            # Credentials were rotated
+            stale.close()
+        return client
+
+    def close(self) -> None:
+        """Log out and close every pooled client."""
+        with self._lock:
+            clients = [client for _, client in self._clients.values()]
+            self._clients.clear()
+        for client in clients:
+            try:
+                client.close()
+            except Exception as e:
+                logger.warning(f"Error closing client for {client.host}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool counters."""
+        return {
+            "size": len(self._clients),
+            "created": self.created,
+            "reused": self.reused,
+            "logins": sum(client.logins for _, client in self._clients.values()),
+        }
@@ -0,0 +1,27 @@
+"""JSON encoding and decoding, using orjson when it is installed.
+
+Thermal and power documents are large, orjson decodes them several times
+faster than the standard library. Both paths produce compact output.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the image
+    orjson = None
+
+
+def loads(data: bytes) -> Any:
+    """Decode a JSON document."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(value: Any) -> str:
+    """Encode a value as compact JSON."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value, separators=(",", ":"))
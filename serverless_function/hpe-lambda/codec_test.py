@@ -0,0 +1,18 @@
+import pytest
+
+from . import codec
+
+DOCUMENT = {"Fans": [{"Name": "Fan 1", "Reading": 23}], "PowerState": "On"}
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_codec_round_trips_with_and_without_orjson(monkeypatch, fast):
+    if fast:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(codec, "orjson", None)
+
+    encoded = codec.dumps(DOCUMENT)
+
+    assert encoded == '{"Fans":[{"Name":"Fan 1","Reading":23}],"PowerState":"On"}'
+    assert codec.loads(encoded.encode()) == DOCUMENT
@@ -0,0 +1,116 @@
+import contextvars
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Tuple
+
+from .client_pool import ClientPool
+from .resilience import current_deadline, deadline_scope
+
+if TYPE_CHECKING:
+    from .ilo_redfish_controller import IloRedfishClient
+
+
+@dataclass
+class HostConfig:
+    """Connection details of one iLO in the inventory."""
+
+    name: str
+    host: str
+    username: str
+    password: str
+
+
+class Fleet:
+    """Runs an action against several iLOs concurrently.
+
+    Each host gets its pooled client from the ClientPool. At most
+    ``concurrency`` hosts are queried at once and a host that does not answer
+    within ``timeout`` seconds of its start is reported as timed out. Its
+    requests run under a deadline of the same length (or the invocation's,
+    if closer), so the worker gives up instead of holding a thread.
+    """
+
+    def __init__(self, pool: ClientPool, concurrency: int = 8, timeout: float = 30.0):
+        """Initialize the fleet.
+
+        Args:
+            pool (ClientPool): Pool providing one client per host
+            concurrency (int): Maximum number of hosts queried at once
+            timeout (float): Seconds a single host may take
+        """
+        self.pool = pool
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="fleet"
+        )
+
+    def fan_out(
+        self,
+        func: Callable[["IloRedfishClient"], Dict[str, Any]],
+        hosts: List[HostConfig],
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Run ``func`` with the client of every host.
+
+        Args:
+            func (Callable[[IloRedfishClient], Dict[str, Any]]): The action
+            hosts (List[HostConfig]): Hosts to run it on
+
+        Yields:
+            Tuple[str, Dict[str, Any]]: (host name, result) in completion order
+        """
+        started: Dict[str, float] = {}
+
+        def run(host: HostConfig) -> Dict[str, Any]:
+            started[host.name] = time.monotonic()
+            outer = current_deadline()
+            budget = self.timeout if outer is None else outer.remaining()
+            with deadline_scope(min(budget, self.timeout)):
+                client = self.pool.get(host.host, host.username, host.password)
+                return func(client)
+
+        # Each host runs in a copy of the caller's context to see its deadline
+        futures: Dict[Future, str] = {
+            self.executor.submit(contextvars.copy_context().run, run, host): host.name
+            for host in hosts
+        }
+        # Hosts still queued behind hung ones give up after this
+        rounds = math.ceil(len(hosts) / self.concurrency)
+        queue_deadline = time.monotonic() + self.timeout * max(rounds, 1)
+
+        pending = set(futures)
+        try:
+            while pending:
+                now = time.monotonic()
+                deadlines = [
+                    started[futures[f]] + self.timeout
+                    for f in pending
+                    if futures[f] in started
+                ]
+                wait_for = min(deadlines + [queue_deadline]) - now
+                done, _ = wait(
+                    pending, timeout=max(wait_for, 0), return_when=FIRST_COMPLETED
+                )
+                pending -= done
+                for future in done:
+                    try:
+                        yield futures[future], future.result()
+                    except Exception as e:
+                        yield futures[future], {"error": str(e)}
+
+                now = time.monotonic()
+                for future in list(pending):
+                    start = started.get(futures[future])
+                    deadline = queue_deadline if start is None else start + self.timeout
+                    if now >= deadline:
+                        pending.discard(future)
+                        future.cancel()
+                        yield futures[future], {
+                            "error": f"Timed out after {self.timeout}s"
+                        }
+        finally:
+            # Hosts still queued when the caller stops reading never start
+            for future in pending:
+                future.cancel()
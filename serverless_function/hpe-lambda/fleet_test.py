@@ -0,0 +1,80 @@
+import time
+
+from .fleet import Fleet, HostConfig
+from .resilience import current_deadline, deadline_scope
+
+
+class FakePool:
+    def get(self, host, username, password):
+        return host
+
+
+def hosts(*names):
+    return [HostConfig(name, name, "user", "secret") for name in names]
+
+
+def test_fan_out_streams_results_and_times_out_slow_hosts():
+    delays = {"fast": 0.0, "medium": 0.1, "hung": 5.0}
+
+    def action(client):
+        time.sleep(delays[client])
+        return {"host": client}
+
+    fleet = Fleet(FakePool(), concurrency=3, timeout=0.3)
+    start = time.monotonic()
+    results = list(fleet.fan_out(action, hosts("hung", "medium", "fast")))
+
+    assert time.monotonic() - start < 1
+    assert [name for name, _ in results] == ["fast", "medium", "hung"]
+    assert results[2][1] == {"error": "Timed out after 0.3s"}
+
+
+def test_fan_out_bounds_concurrency():
+    running = []
+    peak = []
+
+    def action(client):
+        running.append(client)
+        peak.append(len(running))
+        time.sleep(0.05)
+        running.remove(client)
+        return {}
+
+    fleet = Fleet(FakePool(), concurrency=2, timeout=1)
+    results = dict(fleet.fan_out(action, hosts("a", "b", "c", "d", "e")))
+
+    assert results == {name: {} for name in "abcde"}
+    assert max(peak) == 2
+
+
+def test_fan_out_bounds_workers_by_the_host_timeout():
+    budgets = {}
+
+    def action(client):
+        budgets[client] = current_deadline().remaining()
+        return {}
+
+    fleet = Fleet(FakePool(), concurrency=2, timeout=0.5)
+    with deadline_scope(0.2):
+        dict(fleet.fan_out(action, hosts("a")))
+    dict(fleet.fan_out(action, hosts("b")))
+
+    assert 0 < budgets["a"] <= 0.2
+    assert 0.2 < budgets["b"] <= 0.5
+
+
+def test_fan_out_cancels_queued_hosts_when_caller_stops():
+    started = []
+
+    def action(client):
+        started.append(client)
+        time.sleep(0.05)
+        return {}
+
+    fleet = Fleet(FakePool(), concurrency=1, timeout=1)
+    results = fleet.fan_out(action, hosts("a", "b", "c", "d"))
+    next(results)
+    results.close()
+    time.sleep(0.2)
+
+    assert started == ["a", "b"]
@@ -1,8 +1,24 @@
 # handler.py
+import atexit
+import contextvars
 import json
 import logging
 import os
-from .ilo_redfish_controller import IloRedfishClient
+import re
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
+from .action_metrics import ActionMetrics
+from .client_pool import ClientPool
+from .codec import dumps
+from .fleet import Fleet, HostConfig
+from .jobs import JobTracker
+from .instrumentation import RequestMetrics
+from .projection import validate_fields
+from .resilience import OPEN, current_deadline, deadline_scope, shared_breakers
+from .telemetry import KINDS, TelemetrySampler, TelemetryStore
 
 # Suppress only the single InsecureRequestWarning
 logging.basicConfig(level=logging.INFO)
@@ -39,6 +55,150 @@ def get_config():
     return config["host"], config["username"], config["password"]
 
 
+def _parse_hosts(value):
+    """Parse ILO_HOSTS: comma separated "host" or "name=host" entries."""
+    hosts = {}
+    for entry in filter(None, (e.strip() for e in value.split(","))):
+        name, _, host = entry.rpartition("=")
+        hosts[name or host] = {"host": host}
+    return hosts
+
+
+def get_inventory():
+    """Get the iLO inventory from environment variables or a mounted file.
+
+    ILO_INVENTORY points to a JSON file mapping host names to objects with a
+    "host" and optional "username"/"password". Otherwise ILO_HOSTS lists the
+    hosts, and otherwise ILO_HOST is the only one. ILO_USERNAME and
+    ILO_PASSWORD are the default credentials.
+
+    Returns:
+        dict: Host name to HostConfig
+
+    Raises:
+        ConfigurationError: If the inventory is empty or incomplete
+    """
+    inventory_file = os.environ.get("ILO_INVENTORY")
+    if inventory_file:
+        try:
+            with open(inventory_file) as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise ConfigurationError(f"Cannot read inventory {inventory_file}: {e}")
+    elif os.environ.get("ILO_HOSTS"):
+        entries = _parse_hosts(os.environ["ILO_HOSTS"])
+    elif os.environ.get("ILO_HOST"):
+        entries = {os.environ["ILO_HOST"]: {"host": os.environ["ILO_HOST"]}}
+    else:
+        raise ConfigurationError("Missing required configuration: host")
+
+    inventory = {}
+    for name, entry in entries.items():
+        host = HostConfig(
+            name=name,
+            host=entry.get("host", name),
+            username=entry.get("username") or os.environ.get("ILO_USERNAME"),
+            password=entry.get("password") or os.environ.get("ILO_PASSWORD"),
+        )
+        missing = [k for k in ("username", "password") if not getattr(host, k)]
+        if missing:
+            raise ConfigurationError(
+                f"Missing required configuration for {name}: {', '.join(missing)}"
+            )
+        inventory[name] = host
+    return inventory
+
+
+def select_hosts(inventory, selector):
+    """Select hosts from the inventory.
+
+    Args:
+        inventory (dict): Host name to HostConfig
+        selector (str | list): "all", or a list of host names
+
+    Returns:
+        list: Selected HostConfig objects
+
+    Raises:
+        ConfigurationError: If a host is not in the inventory
+    """
+    if selector == "all":
+        return list(inventory.values())
+    names = [selector] if isinstance(selector, str) else selector
+    unknown = [name for name in names if name not in inventory]
+    if unknown:
+        raise ConfigurationError(f"Unknown hosts: {', '.join(unknown)}")
+    return [inventory[name] for name in names]
+
+
+# Per-endpoint latency, bytes and retries of every pooled client
+request_metrics = RequestMetrics()
+# Per-action latency, errors and in-flight actions
+action_metrics = ActionMetrics("ilo")
+
+
+def create_client(host, username, password):
+    """Build a client configured from environment variables.
+
+    Args:
+        host (str): iLO hostname or IP address
+        username (str): iLO username
+        password (str): iLO password
+
+    Returns:
+        IloRedfishClient: The client
+    """
+    # Loads requests, left out of the handler import to keep cold starts short
+    from .ilo_redfish_controller import IloRedfishClient
+
+    client = IloRedfishClient(
+        host,
+        username,
+        password,
+        use_sessions=os.environ.get("ILO_AUTH", "session") == "session",
+        pool_size=int(os.environ.get("ILO_POOL_SIZE", 10)),
+        response_cache_size=int(os.environ.get("ILO_RESPONSE_CACHE_SIZE", 64)),
+        timeout=float(os.environ.get("ILO_REQUEST_TIMEOUT", 10)),
+    )
+    client.add_hook(request_metrics.record)
+    return client
+
+
+# Clients (session tokens and keep-alive connections) outlive invocations
+client_pool = ClientPool(create_client)
+atexit.register(client_pool.close)
+fleet = Fleet(
+    client_pool,
+    concurrency=int(os.environ.get("ILO_FLEET_CONCURRENCY", 8)),
+    timeout=float(os.environ.get("ILO_HOST_TIMEOUT", 30)),
+)
+
+
+def _close_on_sigterm():
+    """Log out of iLO sessions when the function container is stopped.
+
+    The previous disposition is kept: a Python handler is chained, the
+    default action exits and an ignored SIGTERM stays ignored.
+    """
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def shutdown(signum, frame):
+        client_pool.close()
+        if callable(previous):
+            previous(signum, frame)
+        elif previous in (signal.SIG_DFL, None):
+            raise SystemExit(0)
+
+    try:
+        signal.signal(signal.SIGTERM, shutdown)
+    except ValueError:
+        # Not imported from the main thread, atexit still applies
+        pass
+
+
+_close_on_sigterm()
+
+
 def parse_request(event):
     """Parse the request data from the event.
 
@@ -58,32 +218,372 @@ def parse_request(event):
         return {"action": default_action}
 
 
+# Power actions are followed until the server reaches the target state
+job_tracker = JobTracker(
+    min_interval=float(os.environ.get("ILO_JOB_MIN_INTERVAL", 1)),
+    max_interval=float(os.environ.get("ILO_JOB_MAX_INTERVAL", 10)),
+    timeout=float(os.environ.get("ILO_JOB_TIMEOUT", 600)),
+    restart_grace=float(os.environ.get("ILO_JOB_RESTART_GRACE", 60)),
+)
+
+
+def _wait_for_job(job_id, request_data):
+    """Wait for a job if request_data has "wait" (timeout in "timeout").
+
+    The wait ends early when the invocation's deadline comes first.
+    """
+    job = job_tracker.get(job_id)
+    if job is not None and request_data.get("wait"):
+        timeout = float(request_data.get("timeout", 60))
+        deadline = current_deadline()
+        if deadline is not None:
+            timeout = min(timeout, deadline.remaining())
+        job = job_tracker.wait(job_id, timeout)
+    return job
+
+
 def handle_power_control(client, request_data):
     """Handle power control action.
 
     Args:
         client (IloRedfishClient): The client instance
-        request_data (dict): The request data
+        request_data (dict): The request data, with "wait": true to block
+            until the target power state is reached (at most "timeout" s)
 
     Returns:
-        dict: Result of the power control operation
+        dict: Result of the power control operation and its job
     """
     power_action = request_data.get("power_action")
     if not power_action:
         return {"error": "Missing power_action parameter"}
-    return client.set_power_state(power_action)
+    result = job_tracker.submit(client, power_action)
+    job = _wait_for_job(result.get("job_id"), request_data)
+    return {**result, **job.to_dict()} if job is not None else result
+
+
+def handle_job_status(client, request_data):
+    """Handle job_status action.
+
+    Args:
+        client (IloRedfishClient): The client instance
+        request_data (dict): The request data, with "job_id" and optionally
+            "wait"/"timeout" to block until the job finished
+
+    Returns:
+        dict: The job with its status and observed power state transitions
+    """
+    job_id = request_data.get("job_id")
+    if not job_id:
+        return {"error": "Missing job_id parameter"}
+    job = job_tracker.get(job_id)
+    if job is None or job.host != client.host:
+        return {"error": f"Unknown job: {job_id}"}
+    return (_wait_for_job(job_id, request_data) or job).to_dict()
+
+
+SNAPSHOT_SECTIONS = {
+    "system": attrgetter("get_system_info"),
+    "thermal": attrgetter("get_thermal_info"),
+    "power": attrgetter("get_power_info"),
+    "managers": attrgetter("get_manager_info"),
+    "storage": attrgetter("get_storage_info"),
+}
+DEFAULT_SNAPSHOT_SECTIONS = ["system", "thermal", "power"]
+
+snapshot_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("ILO_SNAPSHOT_WORKERS", 8)),
+    thread_name_prefix="snapshot",
+)
+
+
+def validate_max_age(value):
+    """Normalize a "max_age" request parameter.
+
+    Args:
+        value (Any): Seconds as a number or numeric string, or None
+
+    Returns:
+        float: The max age, None if not given
+
+    Raises:
+        ValueError: If the value is not a non-negative number
+    """
+    if value is None:
+        return None
+    try:
+        max_age = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"max_age must be a number of seconds, got {value!r}")
+    if not max_age >= 0:
+        raise ValueError(f"max_age must not be negative, got {value!r}")
+    return max_age
+
+
+def _timed(read, max_age, fields):
+    start = time.perf_counter()
+    result = read(max_age=max_age, fields=fields)
+    return result, round((time.perf_counter() - start) * 1000, 2)
+
+
+def handle_snapshot(client, request_data):
+    """Handle snapshot action: fetch several sections concurrently.
+
+    Args:
+        client (IloRedfishClient): The client instance
+        request_data (dict): The request data, optionally with a "sections"
+            list (system, thermal, power, managers, storage), "max_age" and
+            "fields" mapping section names to field lists
+
+    Returns:
+        dict: One key per section plus per-section "timings" (ms) and "errors"
+    """
+    sections = request_data.get("sections") or DEFAULT_SNAPSHOT_SECTIONS
+    unknown = [s for s in sections if s not in SNAPSHOT_SECTIONS]
+    if unknown:
+        return {"error": f"Unknown sections: {', '.join(unknown)}"}
+
+    fields = request_data.get("fields") or {}
+    if not isinstance(fields, dict):
+        return {"error": "fields must map section names to field lists"}
+    max_age = validate_max_age(request_data.get("max_age"))
+
+    start = time.perf_counter()
+    futures = {
+        section: snapshot_executor.submit(
+            contextvars.copy_context().run,
+            _timed,
+            SNAPSHOT_SECTIONS[section](client),
+            max_age,
+            validate_fields(fields.get(section)),
+        )
+        for section in sections
+    }
+    result = {"timings": {}, "errors": {}}
+    for section, future in futures.items():
+        try:
+            data, elapsed = future.result()
+        except Exception as e:
+            data, elapsed = {"error": str(e)}, None
+        result["timings"][section] = elapsed
+        if "error" in data:
+            result["errors"][section] = data["error"]
+        else:
+            result[section] = data
+    result["timings"]["total"] = round((time.perf_counter() - start) * 1000, 2)
+    return result
+
+
+def handle_stats(client, _):
+    """Handle stats action: cache, session, pool and circuit breaker counters."""
+    return {
+        **client.stats(),
+        "pool": client_pool.stats(),
+        "jobs": job_tracker.stats(),
+        "requests": [r for r in request_metrics.summary() if r["host"] == client.host],
+        "actions": action_metrics.summary(),
+    }
+
+
+telemetry_store = TelemetryStore(
+    raw_size=int(os.environ.get("ILO_TELEMETRY_RAW_SIZE", 720)),
+    minute_size=int(os.environ.get("ILO_TELEMETRY_MINUTE_SIZE", 1440)),
+)
+telemetry_sampler = None
+if os.environ.get("ILO_TELEMETRY", "disabled") == "enabled":
+    telemetry_sampler = TelemetrySampler(
+        lambda func: fleet.fan_out(func, list(get_inventory().values())),
+        telemetry_store,
+        interval=float(os.environ.get("ILO_TELEMETRY_INTERVAL", 30)),
+    )
+
+
+def handle_telemetry(client, request_data):
+    """Handle telemetry action: windowed sensor aggregates of the sampler.
+
+    Args:
+        client (IloRedfishClient): The client instance
+        request_data (dict): The request data, optionally with "window"
+            (seconds, default 300) and "kinds" (temperature, fan, power)
+
+    Returns:
+        dict: kind -> sensor name -> min/max/avg/p50/p95/p99/count
+    """
+    window = float(request_data.get("window", 300))
+    kinds = request_data.get("kinds")
+    unknown = [kind for kind in kinds or [] if kind not in KINDS]
+    if unknown:
+        return {"error": f"Unknown kinds: {', '.join(unknown)}"}
+    return {
+        "host": client.host,
+        "window": window,
+        "sampling": telemetry_sampler is not None,
+        "sensors": telemetry_store.query(client.host, window, kinds),
+    }
+
+
+def read_action(read):
+    """Build the handler of a read action.
+
+    Read actions accept "max_age" (seconds) to allow cached data without a
+    round trip and "fields" to only return the listed properties.
+
+    Args:
+        read (callable): Client method taking max_age and fields
+
+    Returns:
+        callable: Action handler
+    """
+
+    def handler(client, request_data):
+        return read(client)(
+            max_age=validate_max_age(request_data.get("max_age")),
+            fields=validate_fields(request_data.get("fields")),
+        )
+
+    return handler
 
 
 # Action mapping to avoid long if-elif chain
 ACTION_HANDLERS = {
-    "system_info": lambda client, _: client.get_system_info(),
-    "thermal": lambda client, _: client.get_thermal_info(),
-    "power": lambda client, _: client.get_power_info(),
-    "power_state": lambda client, _: client.get_power_state(),
+    "system_info": read_action(SNAPSHOT_SECTIONS["system"]),
+    "thermal": read_action(SNAPSHOT_SECTIONS["thermal"]),
+    "power": read_action(SNAPSHOT_SECTIONS["power"]),
+    "power_state": lambda client, req: client.get_power_state(
+        validate_max_age(req.get("max_age"))
+    ),
     "power_control": handle_power_control,
+    "job_status": handle_job_status,
+    "snapshot": handle_snapshot,
+    "stats": handle_stats,
+    "telemetry": handle_telemetry,
 }
 
 
+def run_action(action, client, request_data):
+    """Run an action handler, recording its latency and outcome.
+
+    Args:
+        action (str): Name of the action in ACTION_HANDLERS
+        client (IloRedfishClient): The client instance
+        request_data (dict): The request data
+
+    Returns:
+        The result of the handler
+    """
+    with action_metrics.track(action, client.host) as outcome:
+        result = ACTION_HANDLERS[action](client, request_data)
+        outcome.error = isinstance(result, dict) and "error" in result
+    return result
+
+
+def with_circuit(client, result):
+    """Add the host's circuit breaker state to an error result.
+
+    Args:
+        client (IloRedfishClient): The client that produced the result
+        result: Result of an action handler
+
+    Returns:
+        The result, with "circuit" when it is an error
+    """
+    if isinstance(result, dict) and "error" in result:
+        return {**result, "circuit": client.breaker.to_dict()}
+    return result
+
+
+def handle_fleet(action, request_data):
+    """Run an action on the hosts selected by request_data["hosts"].
+
+    Args:
+        action (str): Name of the action in ACTION_HANDLERS
+        request_data (dict): The request data
+
+    Returns:
+        str: JSON document with per-host results and errors, or one JSON
+            line per host in completion order with "format": "ndjson"
+    """
+    hosts = select_hosts(get_inventory(), request_data["hosts"])
+    results = fleet.fan_out(
+        lambda client: with_circuit(client, run_action(action, client, request_data)),
+        hosts,
+    )
+
+    if request_data.get("format") == "ndjson":
+        return "".join(
+            dumps({"host": name, "result": result}) + "\n" for name, result in results
+        )
+
+    response = {"hosts": {}, "errors": {}}
+    for name, result in results:
+        response["hosts"][name] = result
+        if isinstance(result, dict) and "error" in result:
+            response["errors"][name] = result["error"]
+    return dumps(response)
+
+
+def prewarm():
+    """Do the expensive first-request work ahead of the first request.
+
+    Imports the Redfish client (requests, urllib3). With ILO_PREWARM=connect
+    it also opens the pooled client of every inventory host: session login,
+    TLS handshake and the service root read. The function template can call
+    this at container start; with ILO_PREWARM set it runs on a background
+    thread when the handler is imported, so the watchdog starts serving
+    while it loads.
+    """
+    from . import ilo_redfish_controller  # noqa: F401
+
+    if os.environ.get("ILO_PREWARM") != "connect":
+        return
+    try:
+        hosts = list(get_inventory().values())
+    except ConfigurationError as e:
+        logger.warning(f"Not prewarming clients: {str(e)}")
+        return
+    for name, result in fleet.fan_out(
+        lambda client: {"select": client.supports("SelectQuery")}, hosts
+    ):
+        if "error" in result:
+            logger.warning(f"Prewarming {name} failed: {result['error']}")
+
+
+def render_metrics():
+    """Render all metrics in Prometheus text exposition format."""
+    lines = (
+        telemetry_store.render_prometheus()
+        + request_metrics.render_prometheus()
+        + shared_breakers.render_prometheus()
+        + action_metrics.render_prometheus()
+    )
+    return "\n".join(lines) + "\n"
+
+
+def _parse_duration(value):
+    """Parse a Go duration such as "10s", "1m30s" or "500ms" into seconds."""
+    units = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts:
+        return float(value)
+    return sum(float(amount) * units[unit] for amount, unit in parts)
+
+
+def request_budget():
+    """Get the seconds an invocation may spend on Redfish requests.
+
+    ILO_DEADLINE sets it directly. Otherwise it is the watchdog's
+    exec_timeout (10s by default) minus ILO_DEADLINE_MARGIN seconds, so the
+    function still answers before the watchdog kills it.
+
+    Returns:
+        float: The budget in seconds
+    """
+    if os.environ.get("ILO_DEADLINE"):
+        return float(os.environ["ILO_DEADLINE"])
+    exec_timeout = _parse_duration(os.environ.get("exec_timeout") or "10s")
+    margin = float(os.environ.get("ILO_DEADLINE_MARGIN", 1))
+    return max(exec_timeout - margin, 1.0)
+
+
 def handle(event, context):
     """Handle incoming requests to the function.
 
@@ -92,27 +592,58 @@ def handle(event, context):
         context (dict): Context information about the function
 
     Returns:
-        str: JSON response with requested information
+        str: JSON response with requested information; requests to
+            ``/metrics`` get the Prometheus text exposition. Errors of a host
+            whose circuit breaker is open are answered with 503 and
+            Retry-After.
     """
-    try:
-        # Get and validate configuration
-        ilo_host, ilo_username, ilo_password = get_config()
-        logger.info(event)
+    if telemetry_sampler is not None:
+        telemetry_sampler.start()
+    if getattr(event, "path", None) == "/metrics":
+        return {
+            "statusCode": 200,
+            "body": render_metrics(),
+            "headers": {"Content-Type": "text/plain; version=0.0.4"},
+        }
 
+    try:
         request_data = parse_request(event)
-        client = IloRedfishClient(ilo_host, ilo_username, ilo_password)
 
         action = request_data.get("action", "system_info")
-        handler = ACTION_HANDLERS.get(action)
+        if action not in ACTION_HANDLERS:
+            return json.dumps({"error": f"Unknown action: {action}"})
+        logger.debug(f"Running {action}")
 
-        if not handler:
-            result = {"error": f"Unknown action: {action}"}
-        else:
-            result = handler(client, request_data)
+        with deadline_scope(request_budget()):
+            if request_data.get("hosts"):
+                return handle_fleet(action, request_data)
 
-        return json.dumps(result)
+            # Get and validate configuration
+            ilo_host, ilo_username, ilo_password = get_config()
+            client = client_pool.get(ilo_host, ilo_username, ilo_password)
+            result = with_circuit(client, run_action(action, client, request_data))
 
-    except ConfigurationError as e:
+        if (
+            client.breaker.state == OPEN
+            and isinstance(result, dict)
+            and "error" in result
+        ):
+            # Tell callers when it is worth trying again
+            return {
+                "statusCode": 503,
+                "body": dumps(result),
+                "headers": {
+                    "Content-Type": "application/json",
+                    "Retry-After": str(int(client.breaker.retry_after()) + 1),
+                },
+            }
+        return dumps(result)
+
+    except (ConfigurationError, ValueError) as e:
         return json.dumps({"error": str(e)})
     except Exception as e:
         return json.dumps({"error": f"Unexpected error: {str(e)}"})
+
+
+if os.environ.get("ILO_PREWARM", "disabled") in ("enabled", "connect"):
+    threading.Thread(target=prewarm, name="prewarm", daemon=True).start()
@@ -1,4 +1,14 @@
-from .handler import handle
+import json
+import signal
+import time
+import types
+
+import pytest
+
+from . import handler
+from .handler import handle, handle_snapshot
+from .jobs import PowerJob
+from .mock_redfish import MockRedfishServer
 
 # Test your handler here
 
@@ -6,6 +16,138 @@ from .handler import handle
 # https://docs.openfaas.com/reference/yaml/#function-build-args-build-args
 
 
-def test_handle():
-    # assert handle("input") == "input"
-    pass
+class SlowClient:
+    """Answers every read after a fixed delay, like a busy iLO."""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def _read(self, data):
+        time.sleep(self.delay)
+        return data
+
+    def get_system_info(self, max_age=None, fields=None):
+        return self._read({"PowerState": "On"})
+
+    def get_thermal_info(self, max_age=None, fields=None):
+        return self._read({"Temperatures": []})
+
+    def get_power_info(self, max_age=None, fields=None):
+        return self._read({"error": "API request failed: 503"})
+
+
+@pytest.fixture
+def ilo(monkeypatch):
+    with MockRedfishServer(reset_delay=0.05) as server:
+        monkeypatch.setenv("ILO_HOST", server.url)
+        monkeypatch.setenv("ILO_USERNAME", "admin")
+        monkeypatch.setenv("ILO_PASSWORD", "password")
+        monkeypatch.setattr(handler.job_tracker, "min_interval", 0.02)
+        yield server
+        handler.client_pool.close()
+
+
+def call(body):
+    return json.loads(handle(types.SimpleNamespace(body=json.dumps(body)), None))
+
+
+def test_handle(ilo):
+    assert call({"action": "power_state"}) == {"PowerState": "On"}
+    assert call({"action": "system_info", "fields": ["Model"]}) == {
+        "Model": "ProLiant DL380 Gen10"
+    }
+
+    job = call({"action": "power_control", "power_action": "ForceOff", "wait": True})
+    assert (job["status"], job["power_state"]) == ("completed", "Off")
+
+    snapshot = call({"action": "snapshot", "sections": ["system", "power"]})
+    assert snapshot["system"]["PowerState"] == "Off"
+    assert snapshot["errors"] == {}
+
+    stats = call({"action": "stats"})
+    assert stats["logins"] == 1
+    assert stats["actions"]["power_state"]["count"] == 1
+    assert stats["actions"]["stats"]["in_flight"] == 1
+    # Systems was only listed once, everything else went to the member
+    assert ilo.requests[("GET", "/redfish/v1/Systems")] == 1
+
+    metrics = handle(types.SimpleNamespace(body="", path="/metrics"), None)
+    assert 'redfish_request_duration_seconds_count{host="' in metrics["body"]
+    assert 'ilo_action_errors_total{action="snapshot",target="' in metrics["body"]
+
+
+def test_warm_restart_job_completes_while_power_stays_on(monkeypatch):
+    with MockRedfishServer(reset_delay=0.05, warm_reset=True) as server:
+        monkeypatch.setenv("ILO_HOST", server.url)
+        monkeypatch.setenv("ILO_USERNAME", "admin")
+        monkeypatch.setenv("ILO_PASSWORD", "password")
+        monkeypatch.setattr(handler.job_tracker, "min_interval", 0.02)
+        try:
+            job = call(
+                {"action": "power_control", "power_action": "ForceRestart", "wait": 5}
+            )
+        finally:
+            handler.client_pool.close()
+
+    assert (job["status"], job["completed_by"]) == ("completed", "boot_progress")
+    assert job["power_state"] == "On"
+    assert job["transitions"] == []
+
+
+def test_job_status_of_another_host_does_not_wait(ilo, monkeypatch):
+    job = PowerJob("job-1", "other-ilo", "On", "On", status="running")
+    monkeypatch.setattr(handler.job_tracker, "_jobs", {job.id: job})
+
+    start = time.monotonic()
+    status = call({"action": "job_status", "job_id": job.id, "wait": True})
+    assert status["error"] == "Unknown job: job-1"
+    assert time.monotonic() - start < 0.5
+
+
+def test_max_age_is_validated(ilo):
+    assert call({"action": "power_state", "max_age": "30"}) == {"PowerState": "On"}
+    assert call({"action": "system_info", "max_age": "soon"}) == {
+        "error": "max_age must be a number of seconds, got 'soon'"
+    }
+    assert call({"action": "snapshot", "max_age": -1}) == {
+        "error": "max_age must not be negative, got -1"
+    }
+
+
+def test_snapshot_fetches_sections_concurrently():
+    start = time.perf_counter()
+    result = handle_snapshot(SlowClient(0.2), {})
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.4
+    assert result["system"] == {"PowerState": "On"}
+    assert result["thermal"] == {"Temperatures": []}
+    assert "power" not in result
+    assert result["errors"] == {"power": "API request failed: 503"}
+    assert set(result["timings"]) == {"system", "thermal", "power", "total"}
+
+
+def test_snapshot_rejects_unknown_sections():
+    assert handle_snapshot(SlowClient(0), {"sections": ["bios"]}) == {
+        "error": "Unknown sections: bios"
+    }
+
+
+@pytest.mark.parametrize(
+    "previous, exits", [(signal.SIG_DFL, True), (signal.SIG_IGN, False)]
+)
+def test_sigterm_keeps_previous_disposition(monkeypatch, previous, exits):
+    closed = []
+    monkeypatch.setattr(handler.client_pool, "close", lambda: closed.append(1))
+    original = signal.signal(signal.SIGTERM, previous)
+    try:
+        handler._close_on_sigterm()
+        shutdown = signal.getsignal(signal.SIGTERM)
+        if exits:
+            with pytest.raises(SystemExit):
+                shutdown(signal.SIGTERM, None)
+        else:
+            shutdown(signal.SIGTERM, None)
+    finally:
+        signal.signal(signal.SIGTERM, original)
+    assert closed == [1]
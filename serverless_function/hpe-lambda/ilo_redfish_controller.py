@@ -1,13 +1,24 @@
 import logging
+import threading
+import time
 import requests
 from dataclasses import dataclass
-from typing import Optional, Dict, Any, List
-from urllib.parse import urljoin
+from typing import Optional, Dict, Any, Callable, List, Tuple
+from urllib.parse import urlencode, urljoin, urlsplit
+from requests.adapters import HTTPAdapter
 from urllib3.exceptions import InsecureRequestWarning
+from .codec import loads
+from .instrumentation import RequestEvent
+from .projection import project, select_query
+from .resilience import CircuitBreaker, RetryPolicy, current_deadline, shared_breakers
+from .resource_cache import ResourceCache
+from .response_cache import ResponseCache
 
 # Suppress only the single InsecureRequestWarning
 requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class RedfishEndpoints:
@@ -15,9 +26,12 @@ class RedfishEndpoints:
 
     SYSTEMS = "/Systems"
     CHASSIS = "/Chassis"
+    MANAGERS = "/Managers"
     THERMAL = "/Thermal"
     POWER = "/Power"
+    STORAGE = "/Storage"
     RESET_ACTION = "/Actions/ComputerSystem.Reset"
+    SESSIONS = "/SessionService/Sessions"
 
 
 class RedfishError(Exception):
@@ -26,6 +40,31 @@ class RedfishError(Exception):
     pass
 
 
+class ResourceNotFoundError(RedfishError):
+    """Raised when the Redfish API answers 404."""
+
+    pass
+
+
+class CircuitOpenError(RedfishError):
+    """Raised instead of sending a request while the host's breaker is open."""
+
+    pass
+
+
+class DeadlineExceededError(RedfishError):
+    """Raised when the invocation's deadline leaves no time for a request."""
+
+    pass
+
+
+# Shared by all clients so warm invocations skip collection lookups
+shared_resource_cache = ResourceCache.from_env()
+
+# Only these are retried, a repeated action could e.g. reset a server twice
+IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+
 class IloRedfishClient:
     """Client for interacting with HPE iLO Redfish API."""
 
@@ -37,117 +76,618 @@ class IloRedfishClient:
         "PushPowerButton",
     ]
 
-    def __init__(self, host: str, username: str, password: str):
+    def __init__(
+        self,
+        host: str,
+        username: str,
+        password: str,
+        resource_cache: Optional[ResourceCache] = None,
+        use_sessions: bool = True,
+        pool_size: int = 10,
+        response_cache_size: int = 64,
+        timeout: float = 10.0,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
         """Initialize Redfish client with connection details.
 
         Args:
-            host (str): iLO hostname or IP address
+            host (str): iLO hostname or IP address, or a base URL such as
+                "http://127.0.0.1:8000" (e.g. a mock server)
             username (str): iLO username
             password (str): iLO password
+            resource_cache (Optional[ResourceCache]): Cache of resolved member
+                URLs, the process-wide one by default
+            use_sessions (bool): Authenticate with a SessionService token
+                instead of sending basic auth on every request
+            pool_size (int): Maximum number of keep-alive connections
+            response_cache_size (int): Maximum number of cached GET responses
+            timeout (float): Seconds a single request may take, less when the
+                current deadline is closer
+            retry_policy (Optional[RetryPolicy]): Backoff for retried GETs,
+                configured from the environment by default
+            breaker (Optional[CircuitBreaker]): Circuit breaker, the shared
+                one of the host by default
         """
-        self.base_url = f"https://{host}/redfish/v1"
+        self.host = host
+        root = host if "://" in host else f"https://{host}"
+        self.base_url = f"{root}/redfish/v1"
+        self.resource_cache = resource_cache or shared_resource_cache
         self.auth = (username, password)
+        self.use_sessions = use_sessions
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.headers = {"Content-Type": "application/json"}
+        self.response_cache = ResponseCache(max_entries=response_cache_size)
+        self._features: Optional[Dict[str, Any]] = None
+        self.token: Optional[str] = None
+        self.session_url: Optional[str] = None
+        self.logins = 0
+        self._auth_lock = threading.Lock()
+        self.hooks: List[Callable[[RequestEvent], None]] = []
+        self.timeout = timeout
+        self.retry_policy = retry_policy or RetryPolicy.from_env()
+        self.breaker = breaker or shared_breakers.get(host)
+
+    def add_hook(self, hook: Callable[[RequestEvent], None]) -> None:
+        """Call ``hook`` with a RequestEvent after every Redfish request.
 
-    def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+        Args:
+            hook (Callable[[RequestEvent], None]): Receives the event; it runs
+                on the requesting thread and should be cheap
+        """
+        self.hooks.append(hook)
+
+    def login(self) -> Optional[str]:
+        """Open a Redfish session and keep its X-Auth-Token.
+
+        Falls back to basic auth when the service has no SessionService.
+
+        Returns:
+            Optional[str]: The session token, None when using basic auth
+
+        Raises:
+            RedfishError: If the login fails
+        """
+        username, password = self.auth
+        try:
+            response = self.session.request(
+                "POST",
+                self._url(RedfishEndpoints.SESSIONS),
+                verify=False,
+                headers=self.headers,
+                json={"UserName": username, "Password": password},
+                timeout=self._request_timeout(),
+            )
+        except requests.exceptions.RequestException as e:
+            raise RedfishError(f"Login failed: {str(e)}") from e
+
+        token = response.headers.get("X-Auth-Token")
+        if response.status_code in (404, 405, 501) or (response.ok and not token):
+            logger.warning(f"No session service on {self.host}, using basic auth")
+            self.use_sessions = False
+            return None
+        if not response.ok:
+            raise RedfishError(f"Login failed: HTTP {response.status_code}")
+
+        self.token = token
+        self.session_url = response.headers.get("Location")
+        self.logins += 1
+        return token
+
+    def logout(self) -> None:
+        """Delete the Redfish session, if one is open."""
+        with self._auth_lock:
+            token, session_url = self.token, self.session_url
+            self.token = self.session_url = None
+        if not token or not session_url:
+            return
+        try:
+            self.session.request(
+                "DELETE",
+                self._url(session_url),
+                verify=False,
+                headers={**self.headers, "X-Auth-Token": token},
+                timeout=self.timeout,
+            )
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Logout from {self.host} failed: {str(e)}")
+
+    def close(self) -> None:
+        """Log out and close pooled connections."""
+        self.logout()
+        self.session.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache and session counters of this client."""
+        return {
+            "host": self.host,
+            "logins": self.logins,
+            "resource_cache": self.resource_cache.stats(),
+            "response_cache": self.response_cache.stats(),
+            "circuit": self.breaker.to_dict(),
+        }
+
+    def _get_token(self, stale: Optional[str] = None) -> Optional[str]:
+        """Get the session token, logging in if there is none or it is stale."""
+        with self._auth_lock:
+            if self.token is None or self.token == stale:
+                self.token = None
+                return self.login()
+            return self.token
+
+    def _url(self, endpoint: str) -> str:
+        """Build the absolute URL of an endpoint.
+
+        Endpoints are either relative to the service root ("/Systems") or
+        absolute paths taken from "@odata.id" ("/redfish/v1/Systems/1/").
+        """
+        if endpoint.startswith("/redfish/"):
+            return urljoin(self.base_url, endpoint)
+        return urljoin(f"{self.base_url}/", endpoint.lstrip("/"))
+
+    def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        max_age: Optional[float] = None,
+        query: Optional[Dict[str, str]] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
         """Make a request to the Redfish API.
 
+        GET responses are cached: a cached response younger than ``max_age``
+        is returned without a request, otherwise it is revalidated with
+        If-None-Match and reused on 304. Cached data is shared, callers must
+        not modify it.
+
+        Every attempt is bounded by the current deadline and goes through the
+        host's circuit breaker. GETs are retried with jittered backoff on
+        connection errors, timeouts and 429/5xx answers while the deadline
+        leaves time for it; other methods are never retried.
+
         Args:
             method (str): HTTP method (GET, POST, etc.)
             endpoint (str): API endpoint
+            max_age (Optional[float]): Accept cached data up to this many
+                seconds old without asking the iLO
+            query (Optional[Dict[str, str]]): OData query options ($select, ...)
             **kwargs: Additional arguments to pass to requests
 
         Returns:
             dict: Response data
 
         Raises:
+            CircuitOpenError: If the host's circuit breaker is open
+            DeadlineExceededError: If the deadline passed before a request
             RedfishError: If the request fails
         """
+        start = None
+        status = None
+        size = 0
+        retries = 0
         try:
-            url = urljoin(self.base_url, endpoint.lstrip("/"))
-            response = self.session.request(
-                method,
-                url,
-                auth=self.auth,
-                verify=False,
-                headers=self.headers,
-                **kwargs,
-            )
+            url = self._url(endpoint)
+            if query:
+                url = f"{url}?{urlencode(query, safe='$,/().=')}"
+            cached = self.response_cache.get(url) if method == "GET" else None
+            if cached is not None and max_age is not None and cached.age <= max_age:
+                self.response_cache.record_hit(cached, revalidated=False)
+                return cached.data
+
+            headers = {}
+            if cached is not None and cached.etag:
+                headers["If-None-Match"] = cached.etag
+
+            idempotent = method in IDEMPOTENT_METHODS
+            start = time.perf_counter()
+            attempt = 0
+            while True:
+                attempt += 1
+                try:
+                    response, reauthenticated = self._attempt(
+                        method, url, headers, **kwargs
+                    )
+                except (
+                    requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout,
+                ) as e:
+                    delay = self._retry_delay(idempotent, attempt)
+                    if delay is None:
+                        self.breaker.record_failure()
+                        raise
+                    logger.warning(f"Retrying {method} {url} in {delay:.2f}s: {e}")
+                except requests.exceptions.RequestException:
+                    self.breaker.record_failure()
+                    raise
+                except DeadlineExceededError:
+                    raise
+                except RedfishError as e:
+                    # Login failed: unreachable counts, rejected credentials do not
+                    if isinstance(e.__cause__, requests.exceptions.RequestException):
+                        self.breaker.record_failure()
+                    raise
+                else:
+                    retries += reauthenticated
+                    status = response.status_code
+                    if status not in self.retry_policy.statuses:
+                        break
+                    delay = self._retry_delay(
+                        idempotent, attempt, response.headers.get("Retry-After")
+                    )
+                    if delay is None:
+                        break
+                    self.breaker.release()
+                    logger.warning(f"Retrying {method} {url} in {delay:.2f}s: {status}")
+                retries += 1
+                time.sleep(delay)
+            self._record_response(response)
+
+            size = len(response.content)
+            if response.status_code == 304 and cached is not None:
+                self.response_cache.record_hit(cached, revalidated=True)
+                return cached.data
+            if response.status_code == 404:
+                raise ResourceNotFoundError(f"Resource not found: {endpoint}")
             response.raise_for_status()
-            return response.json() if response.content else {}
+            data = loads(response.content) if response.content else {}
+
+            if method == "GET":
+                self.response_cache.record_miss()
+                self.response_cache.put(
+                    url, response.headers.get("ETag"), data, len(response.content)
+                )
+            else:
+                # Actions change state behind cached resources
+                self.response_cache.clear()
+            return data
         except requests.exceptions.RequestException as e:
             raise RedfishError(f"API request failed: {str(e)}")
+        finally:
+            if start is not None and self.hooks:
+                event = RequestEvent(
+                    host=self.host,
+                    method=method,
+                    endpoint=urlsplit(url).path,
+                    status=status,
+                    elapsed=time.perf_counter() - start,
+                    bytes=size,
+                    retries=retries,
+                )
+                for hook in self.hooks:
+                    hook(event)
+
+    def _request_timeout(self) -> float:
+        """Get the timeout of the next request, bounded by the deadline.
 
-    def _get_first_member_url(self, collection_endpoint: str) -> str:
-        """Get the URL of the first member in a collection.
-
-        Args:
-            collection_endpoint (str): Collection endpoint path
+        Raises:
+            DeadlineExceededError: If the deadline already passed
+        """
+        deadline = current_deadline()
+        if deadline is None:
+            return self.timeout
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            raise DeadlineExceededError(
+                f"Deadline of {deadline.budget}s exceeded for {self.host}"
+            )
+        return min(self.timeout, remaining)
+
+    def _retry_delay(
+        self, idempotent: bool, attempt: int, retry_after: Optional[str] = None
+    ) -> Optional[float]:
+        """Get the delay before retrying, None if there is no retry left."""
+        if not idempotent:
+            return None
+        delay = self.retry_policy.delay(attempt, retry_after)
+        deadline = current_deadline()
+        if delay is not None and deadline is not None:
+            if delay >= deadline.remaining():
+                return None
+        return delay
+
+    def _attempt(
+        self, method: str, url: str, headers: Dict[str, str], **kwargs
+    ) -> Tuple[requests.Response, bool]:
+        """Send one attempt of a request through the circuit breaker.
+
+        A 401 on a session token logs in again and resends once. The outcome
+        is left to the caller, which counts at most one breaker failure per
+        request, after its retries.
 
         Returns:
-            str: URL of the first member
+            Tuple[requests.Response, bool]: The response and whether it took
+                a new login
 
         Raises:
-            RedfishError: If no members found
+            CircuitOpenError: If the breaker refused the request
+            DeadlineExceededError: If the deadline passed or cut the request short
+        """
+        timeout = self._request_timeout()
+        if not self.breaker.allow():
+            raise CircuitOpenError(
+                f"Circuit open for {self.host}, "
+                f"retry in {self.breaker.retry_after():.0f}s"
+            )
+        try:
+            token = self._get_token() if self.use_sessions else None
+            response = self._send(method, url, token, headers, timeout, **kwargs)
+            reauthenticated = response.status_code == 401 and bool(token)
+            if reauthenticated:
+                # Session expired or was deleted on the iLO: log in again
+                token = self._get_token(stale=token)
+                response = self._send(method, url, token, headers, timeout, **kwargs)
+        except requests.exceptions.Timeout as e:
+            self.breaker.release()
+            if timeout < self.timeout:
+                # Cut short by our own deadline, not the iLO's fault
+                raise DeadlineExceededError(
+                    f"Deadline exceeded after {timeout:.1f}s for {self.host}"
+                ) from e
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        return response, reauthenticated
+
+    def _record_response(self, response: requests.Response) -> None:
+        """Tell the breaker how the last attempt of a request was answered.
+
+        Only 5xx answers count as failures. A 429, or a 503 with Retry-After,
+        is an iLO shedding load, which retries ride out: it counts neither
+        way.
         """
+        status = response.status_code
+        if status == 429 or (status == 503 and "Retry-After" in response.headers):
+            self.breaker.release()
+        elif status >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        token: Optional[str],
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """Send a request with the session token, or basic auth without one."""
+        headers = {**self.headers, **(headers or {})}
+        timeout = self.timeout if timeout is None else timeout
+        if token:
+            headers["X-Auth-Token"] = token
+            return self.session.request(
+                method, url, verify=False, headers=headers, timeout=timeout, **kwargs
+            )
+        return self.session.request(
+            method,
+            url,
+            auth=self.auth,
+            verify=False,
+            headers=headers,
+            timeout=timeout,
+            **kwargs,
+        )
+
+    def _resolve_member_url(self, collection_endpoint: str) -> str:
+        """Fetch a collection and cache the URL of its first member."""
         data = self._make_request("GET", collection_endpoint)
         if not data.get("Members"):
             raise RedfishError(f"No members found in {collection_endpoint}")
-        return data["Members"][0]["@odata.id"]
+        member_url = data["Members"][0]["@odata.id"]
+        self.resource_cache.put(self.base_url, collection_endpoint, member_url)
+        return member_url
+
+    def _member_request(
+        self, method: str, collection_endpoint: str, path: str = "", **kwargs
+    ) -> Dict[str, Any]:
+        """Make a request to (a sub-resource of) the first collection member.
+
+        If the member URL came from the cache and no longer exists, it is
+        resolved again and the request retried once.
+
+        Args:
+            method (str): HTTP method (GET, POST, etc.)
+            collection_endpoint (str): Collection endpoint path
+            path (str): Path appended to the member URL
+            **kwargs: Additional arguments to pass to requests
+
+        Returns:
+            dict: Response data
 
-    def get_system_info(self) -> Dict[str, Any]:
+        Raises:
+            RedfishError: If the request fails
+        """
+        cached = self.resource_cache.get(self.base_url, collection_endpoint)
+        member_url = cached or self._resolve_member_url(collection_endpoint)
+        try:
+            return self._make_request(method, member_url.rstrip("/") + path, **kwargs)
+        except ResourceNotFoundError:
+            if cached is None:
+                raise
+            self.resource_cache.invalidate(self.base_url, collection_endpoint)
+            member_url = self._resolve_member_url(collection_endpoint)
+            return self._make_request(method, member_url.rstrip("/") + path, **kwargs)
+
+    def supports(self, feature: str) -> bool:
+        """Check a ProtocolFeaturesSupported entry of the service root.
+
+        Args:
+            feature (str): Feature name, e.g. "SelectQuery" or "ExpandQuery"
+
+        Returns:
+            bool: True if the service advertises the feature
+        """
+        if self._features is None:
+            try:
+                root = self._make_request("GET", "/")
+            except ResourceNotFoundError:
+                root = {}
+            except RedfishError:
+                # Timeouts, open breakers, ...: assume no support for this
+                # request only, the next call asks again
+                return False
+            self._features = root.get("ProtocolFeaturesSupported") or {}
+        return bool(self._features.get(feature))
+
+    def _read(
+        self,
+        collection_endpoint: str,
+        path: str = "",
+        max_age: Optional[float] = None,
+        fields: Optional[List[str]] = None,
+        expand: bool = False,
+    ) -> Dict[str, Any]:
+        """Read (a sub-resource of) the first collection member.
+
+        Fields are requested with $select when the service supports it and
+        always trimmed client-side.
+
+        Args:
+            collection_endpoint (str): Collection endpoint path
+            path (str): Path appended to the member URL
+            max_age (Optional[float]): Accept cached data up to this many seconds old
+            fields (Optional[List[str]]): Fields to return, everything if empty
+            expand (bool): Inline the members of a collection ($expand)
+
+        Returns:
+            dict: Response data
+
+        Raises:
+            RedfishError: If the request fails
+        """
+        query = {}
+        if fields and self.supports("SelectQuery"):
+            query["$select"] = select_query(fields)
+        if expand and self.supports("ExpandQuery"):
+            query["$expand"] = ".($levels=1)"
+        data = self._member_request(
+            "GET", collection_endpoint, path, max_age=max_age, query=query
+        )
+        return project(data, fields)
+
+    def get_system_info(
+        self, max_age: Optional[float] = None, fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
         """Get basic system information.
 
+        Args:
+            max_age (Optional[float]): Accept cached data up to this many seconds old
+            fields (Optional[List[str]]): Fields to return, everything if empty
+
         Returns:
             dict: System information
         """
         try:
-            system_url = self._get_first_member_url(RedfishEndpoints.SYSTEMS)
-            return self._make_request("GET", system_url)
+            return self._read(RedfishEndpoints.SYSTEMS, max_age=max_age, fields=fields)
         except RedfishError as e:
             return {"error": str(e)}
 
-    def get_thermal_info(self) -> Dict[str, Any]:
+    def get_thermal_info(
+        self, max_age: Optional[float] = None, fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
         """Get thermal information (temperatures, fans).
 
+        Args:
+            max_age (Optional[float]): Accept cached data up to this many seconds old
+            fields (Optional[List[str]]): Fields to return, everything if empty
+
         Returns:
             dict: Thermal information
         """
         try:
-            chassis_url = self._get_first_member_url(RedfishEndpoints.CHASSIS)
-            thermal_url = f"{chassis_url}{RedfishEndpoints.THERMAL}"
-            return self._make_request("GET", thermal_url)
+            return self._read(
+                RedfishEndpoints.CHASSIS,
+                RedfishEndpoints.THERMAL,
+                max_age=max_age,
+                fields=fields,
+            )
         except RedfishError as e:
             return {"error": str(e)}
 
-    def get_power_info(self) -> Dict[str, Any]:
+    def get_power_info(
+        self, max_age: Optional[float] = None, fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
         """Get power information.
 
+        Args:
+            max_age (Optional[float]): Accept cached data up to this many seconds old
+            fields (Optional[List[str]]): Fields to return, everything if empty
+
         Returns:
             dict: Power information
         """
         try:
-            chassis_url = self._get_first_member_url(RedfishEndpoints.CHASSIS)
-            power_url = f"{chassis_url}{RedfishEndpoints.POWER}"
-            return self._make_request("GET", power_url)
+            return self._read(
+                RedfishEndpoints.CHASSIS,
+                RedfishEndpoints.POWER,
+                max_age=max_age,
+                fields=fields,
+            )
         except RedfishError as e:
             return {"error": str(e)}
 
-    def get_power_state(self) -> Dict[str, Any]:
-        """Get the current power state of the server.
+    def get_manager_info(
+        self, max_age: Optional[float] = None, fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Get information about the iLO itself (firmware, network, ...).
+
+        Args:
+            max_age (Optional[float]): Accept cached data up to this many seconds old
+            fields (Optional[List[str]]): Fields to return, everything if empty
 
         Returns:
-            dict: Power state information
+            dict: Manager information
+        """
+        try:
+            return self._read(RedfishEndpoints.MANAGERS, max_age=max_age, fields=fields)
+        except RedfishError as e:
+            return {"error": str(e)}
+
+    def get_storage_info(
+        self, max_age: Optional[float] = None, fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Get the storage collection of the system.
+
+        Members are inlined when the service supports $expand.
+
+        Args:
+            max_age (Optional[float]): Accept cached data up to this many seconds old
+            fields (Optional[List[str]]): Fields to return, everything if empty
+
+        Returns:
+            dict: Storage information
         """
         try:
-            system_info = self.get_system_info()
-            if "error" in system_info:
-                return system_info
-            return {"PowerState": system_info.get("PowerState", "Unknown")}
+            return self._read(
+                RedfishEndpoints.SYSTEMS,
+                RedfishEndpoints.STORAGE,
+                max_age=max_age,
+                fields=fields,
+                expand=True,
+            )
         except RedfishError as e:
             return {"error": str(e)}
 
+    def get_power_state(self, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """Get the current power state of the server.
+
+        Args:
+            max_age (Optional[float]): Accept cached data up to this many seconds old
+
+        Returns:
+            dict: Power state information
+        """
+        system_info = self.get_system_info(max_age=max_age, fields=["PowerState"])
+        if "error" in system_info:
+            return system_info
+        return {"PowerState": system_info.get("PowerState", "Unknown")}
+
     def set_power_state(self, power_action: str) -> Dict[str, Any]:
         """Set the power state of the server.
 
@@ -156,7 +696,8 @@ class IloRedfishClient:
                               Valid values: "On", "ForceOff", "GracefulShutdown", "ForceRestart", "PushPowerButton"
 
         Returns:
-            dict: Result of the power action request
+            dict: Result of the power action request, with the URL of the
+                Task when the service returned one
         """
         if power_action not in self.VALID_POWER_ACTIONS:
             return {
@@ -164,11 +705,32 @@ class IloRedfishClient:
             }
 
         try:
-            system_url = self._get_first_member_url(RedfishEndpoints.SYSTEMS)
-            reset_url = f"{system_url}{RedfishEndpoints.RESET_ACTION}"
-            response = self._make_request(
-                "POST", reset_url, json={"ResetType": power_action}
+            response = self._member_request(
+                "POST",
+                RedfishEndpoints.SYSTEMS,
+                RedfishEndpoints.RESET_ACTION,
+                json={"ResetType": power_action},
             )
-            return {"success": f"Power action '{power_action}' initiated successfully"}
+            result = {
+                "success": f"Power action '{power_action}' initiated successfully"
+            }
+            if "TaskState" in response:
+                # The service runs the reset as a Task we can follow
+                result["task"] = response.get("@odata.id")
+            return result
         except RedfishError as e:
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
+
+    def get_task(self, task_url: str) -> Dict[str, Any]:
+        """Get a TaskService task, e.g. one returned by a reset action.
+
+        Args:
+            task_url (str): The "@odata.id" of the task
+
+        Returns:
+            dict: Task information (TaskState, TaskStatus, Messages, ...)
+        """
+        try:
+            return self._make_request("GET", task_url)
+        except RedfishError as e:
+            return {"error": str(e)}
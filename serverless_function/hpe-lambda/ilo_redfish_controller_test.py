@@ -0,0 +1,391 @@
+import json
+import threading
+import time
+
+import requests
+
+from .ilo_redfish_controller import IloRedfishClient
+from .resilience import OPEN, CircuitBreaker, RetryPolicy, deadline_scope
+from .resource_cache import ResourceCache
+from .response_cache import ResponseCache
+
+ROOT = "https://ilo/redfish/v1"
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None, headers=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.data = data or {}
+        self.headers = headers or {}
+        self.content = json.dumps(self.data).encode() if status_code != 304 else b""
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error")
+
+    def json(self):
+        return self.data
+
+
+class FakeSession:
+    """Serves Redfish resources from a dict and records requested URLs."""
+
+    def __init__(self, resources):
+        self.resources = resources
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url))
+        if url not in self.resources:
+            return FakeResponse(404)
+        return FakeResponse(200, self.resources[url])
+
+
+class FakeSessionService(FakeSession):
+    """A FakeSession that requires an X-Auth-Token from the SessionService."""
+
+    def __init__(self, resources):
+        super().__init__(resources)
+        self.tokens = set()
+        self.issued = 0
+
+    def request(self, method, url, headers=None, **kwargs):
+        self.requests.append((method, url))
+        if url == f"{ROOT}/SessionService/Sessions" and method == "POST":
+            self.issued += 1
+            token = f"token-{self.issued}"
+            self.tokens.add(token)
+            location = f"/redfish/v1/SessionService/Sessions/{self.issued}/"
+            return FakeResponse(
+                201, headers={"X-Auth-Token": token, "Location": location}
+            )
+        token = (headers or {}).get("X-Auth-Token")
+        if token not in self.tokens:
+            return FakeResponse(401)
+        if method == "DELETE":
+            self.tokens.discard(token)
+            return FakeResponse(200)
+        if url not in self.resources:
+            return FakeResponse(404)
+        return FakeResponse(200, self.resources[url])
+
+
+def make_client(resources, cache, use_sessions=False):
+    client = IloRedfishClient(
+        "ilo", "user", "secret", resource_cache=cache, use_sessions=use_sessions
+    )
+    client.session = FakeSession(resources)
+    return client
+
+
+def members(*urls):
+    return {"Members": [{"@odata.id": url} for url in urls]}
+
+
+def test_member_urls_are_resolved_once_and_shared():
+    cache = ResourceCache()
+    resources = {
+        f"{ROOT}/Systems": members("/redfish/v1/Systems/1/"),
+        f"{ROOT}/Systems/1": {"PowerState": "On"},
+        f"{ROOT}/Chassis": members("/redfish/v1/Chassis/1/"),
+        f"{ROOT}/Chassis/1/Thermal": {"Temperatures": []},
+    }
+    client = make_client(resources, cache)
+
+    assert client.get_power_state() == {"PowerState": "On"}
+    assert client.get_thermal_info() == {"Temperatures": []}
+
+    warm = make_client(resources, cache)
+    assert warm.get_system_info() == {"PowerState": "On"}
+    assert warm.get_thermal_info() == {"Temperatures": []}
+    assert warm.session.requests == [
+        ("GET", f"{ROOT}/Systems/1"),
+        ("GET", f"{ROOT}/Chassis/1/Thermal"),
+    ]
+
+
+def test_stale_member_url_is_resolved_again_on_404():
+    cache = ResourceCache()
+    cache.put(ROOT, "/Systems", "/redfish/v1/Systems/old/")
+    client = make_client(
+        {
+            f"{ROOT}/Systems": members("/redfish/v1/Systems/1/"),
+            f"{ROOT}/Systems/1": {"PowerState": "Off"},
+        },
+        cache,
+    )
+
+    assert client.get_power_state() == {"PowerState": "Off"}
+    assert cache.get(ROOT, "/Systems") == "/redfish/v1/Systems/1/"
+    assert cache.invalidations == 1
+
+
+def test_session_token_is_reused_and_renewed_on_401():
+    cache = ResourceCache()
+    cache.put(ROOT, "/Systems", "/redfish/v1/Systems/1/")
+    client = make_client({}, cache, use_sessions=True)
+    client.session = FakeSessionService({f"{ROOT}/Systems/1": {"PowerState": "On"}})
+
+    client.get_power_state()
+    client.get_power_state()
+    assert client.logins == 1
+
+    # iLO dropped the session (timeout, reset, ...)
+    client.session.tokens.clear()
+    assert client.get_power_state() == {"PowerState": "On"}
+    assert client.logins == 2
+
+    client.logout()
+    assert client.session.tokens == set()
+    assert client.session.requests[-1] == (
+        "DELETE",
+        f"{ROOT}/SessionService/Sessions/2/",
+    )
+
+
+class FakeEtagSession(FakeSession):
+    """A FakeSession answering If-None-Match with 304 while the ETag matches."""
+
+    def __init__(self, resources):
+        super().__init__(resources)
+        self.etags = {url: '"1"' for url in resources}
+
+    def request(self, method, url, headers=None, **kwargs):
+        self.requests.append((method, url))
+        if method != "GET":
+            return FakeResponse(200)
+        etag = self.etags[url]
+        if (headers or {}).get("If-None-Match") == etag:
+            return FakeResponse(304)
+        return FakeResponse(200, self.resources[url], headers={"ETag": etag})
+
+
+def test_conditional_get_and_max_age():
+    cache = ResourceCache()
+    cache.put(ROOT, "/Chassis", "/redfish/v1/Chassis/1/")
+    cache.put(ROOT, "/Systems", "/redfish/v1/Systems/1/")
+    thermal = f"{ROOT}/Chassis/1/Thermal"
+    client = make_client({}, cache)
+    client.session = FakeEtagSession({thermal: {"Fans": [{"Reading": 20}] * 50}})
+
+    first = client.get_thermal_info()
+    assert client.get_thermal_info() == first
+    assert client.get_thermal_info(max_age=60) == first
+    assert len(client.session.requests) == 2
+
+    client.session.resources[thermal] = {"Fans": []}
+    client.session.etags[thermal] = '"2"'
+    assert client.get_thermal_info() == {"Fans": []}
+
+    stats = client.response_cache.stats()
+    assert (stats["revalidated"], stats["fresh_hits"], stats["misses"]) == (1, 1, 2)
+    assert stats["bytes_saved"] == 2 * len(json.dumps(first))
+
+    client.set_power_state("On")
+    assert client.response_cache.stats()["size"] == 0
+
+
+def test_fields_use_select_when_supported_and_are_trimmed_anyway():
+    system = {
+        "PowerState": "On",
+        "Status": {"Health": "OK", "State": "Enabled"},
+        "Memory": {"TotalSystemMemoryGiB": 64},
+    }
+    cache = ResourceCache()
+    cache.put(ROOT, "/Systems", "/redfish/v1/Systems/1/")
+    fields = ["PowerState", "Status.Health"]
+    expected = {"PowerState": "On", "Status": {"Health": "OK"}}
+
+    legacy = make_client({f"{ROOT}/Systems/1": system, f"{ROOT}/": {}}, cache)
+    assert legacy.get_system_info(fields=fields) == expected
+
+    selecting = make_client(
+        {
+            f"{ROOT}/": {"ProtocolFeaturesSupported": {"SelectQuery": True}},
+            f"{ROOT}/Systems/1?$select=PowerState,Status/Health": expected,
+            f"{ROOT}/Systems/1?$select=PowerState": {"PowerState": "On"},
+        },
+        cache,
+    )
+    assert selecting.get_system_info(fields=fields) == expected
+    assert selecting.get_power_state() == {"PowerState": "On"}
+    assert selecting.session.requests[-1] == (
+        "GET",
+        f"{ROOT}/Systems/1?$select=PowerState",
+    )
+
+
+def test_failed_feature_probe_is_retried():
+    client = make_flaky_client(
+        [requests.exceptions.ConnectionError("reset")] * 3,
+        breaker=CircuitBreaker(failure_threshold=10, reset_timeout=60),
+    )
+    client.session.resources[f"{ROOT}/"] = {
+        "ProtocolFeaturesSupported": {"SelectQuery": True}
+    }
+    client._features = None
+
+    assert client.supports("SelectQuery") is False
+    assert client._features is None
+    assert client.supports("SelectQuery") is True
+
+
+class FlakySession(FakeSession):
+    """A FakeSession failing with the queued outcomes before it recovers.
+
+    Outcomes are HTTP status codes, responses or exceptions to raise.
+    """
+
+    def __init__(self, resources, outcomes):
+        super().__init__(resources)
+        self.outcomes = list(outcomes)
+        self.timeouts = []
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+        if self.outcomes:
+            self.requests.append((method, url))
+            outcome = self.outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            if isinstance(outcome, FakeResponse):
+                return outcome
+            return FakeResponse(outcome)
+        return super().request(method, url, **kwargs)
+
+
+def make_flaky_client(outcomes, breaker=None):
+    cache = ResourceCache()
+    cache.put(ROOT, "/Systems", "/redfish/v1/Systems/1/")
+    client = IloRedfishClient(
+        "ilo",
+        "user",
+        "secret",
+        resource_cache=cache,
+        use_sessions=False,
+        retry_policy=RetryPolicy(attempts=3, base_delay=0.001),
+        breaker=breaker or CircuitBreaker(failure_threshold=3, reset_timeout=60),
+    )
+    client.session = FlakySession({f"{ROOT}/Systems/1": {"PowerState": "On"}}, outcomes)
+    client._features = {}
+    return client
+
+
+def test_gets_are_retried_on_transient_errors_but_actions_are_not():
+    events = []
+    client = make_flaky_client([503, requests.exceptions.ConnectionError("reset")])
+    client.add_hook(events.append)
+
+    assert client.get_power_state() == {"PowerState": "On"}
+    assert len(client.session.requests) == 3
+    assert events[-1].retries == 2
+    assert client.breaker.failures == 0
+
+    client.session.outcomes = [requests.exceptions.ConnectionError("reset")]
+    assert "error" in client.set_power_state("On")
+    assert client.session.outcomes == []
+    assert events[-1].retries == 0
+
+
+def test_breaker_opens_after_consecutive_failures_and_fails_fast():
+    client = make_flaky_client([503] * 9)
+
+    # Retries of one request count as one failure
+    assert "error" in client.get_power_state()
+    assert client.breaker.failures == 1
+    assert "error" in client.get_power_state()
+    assert "error" in client.get_power_state()
+    assert client.breaker.state == OPEN
+
+    error = client.get_power_state()["error"]
+    assert error.startswith("Circuit open for ilo")
+    assert len(client.session.requests) == 9
+    assert client.stats()["circuit"]["rejected"] == 1
+
+    # After the reset timeout one probe closes it again
+    client.breaker.reset_timeout = 0
+    assert client.get_power_state() == {"PowerState": "On"}
+    assert client.breaker.to_dict()["state"] == "closed"
+
+
+def test_load_shedding_is_not_a_host_failure():
+    shedding = [
+        FakeResponse(429),
+        FakeResponse(503, headers={"Retry-After": "0"}),
+    ]
+    client = make_flaky_client(shedding * 6)
+
+    for _ in range(4):
+        assert "error" in client.get_power_state()
+    assert client.breaker.failures == 0
+    assert client.breaker.state != OPEN
+
+
+def test_requests_are_bounded_by_the_deadline():
+    client = make_flaky_client([])
+
+    with deadline_scope(0.5):
+        client.get_power_state()
+    assert 0 < client.session.timeouts[-1] <= 0.5
+
+    with deadline_scope(0.01):
+        time.sleep(0.02)
+        error = client.get_power_state()["error"]
+    assert error.startswith("Deadline of 0.01s exceeded")
+    assert len(client.session.timeouts) == 1
+
+    client.get_power_state()
+    assert client.session.timeouts[-1] == client.timeout
+
+
+def test_response_cache_is_safe_across_threads():
+    cache = ResponseCache(max_entries=8)
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(2000):
+                url = f"/redfish/v1/{(n + i) % 16}"
+                cache.put(url, None, {}, 10)
+                entry = cache.get(url)
+                if entry is not None:
+                    cache.record_hit(entry, revalidated=False)
+                if i % 100 == 0:
+                    cache.clear()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert cache.stats()["size"] <= 8
+
+
+def test_resource_cache_is_safe_across_threads():
+    cache = ResourceCache()
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(2000):
+                root = f"https://ilo-{(n + i) % 4}/redfish/v1"
+                cache.put(root, f"/Systems/{i % 50}", "/redfish/v1/Systems/1/")
+                cache.get(root, "/Systems/0")
+                if i % 10 == 0:
+                    cache.invalidate(root)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert cache.stats()["invalidations"] > 0
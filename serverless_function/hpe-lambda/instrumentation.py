@@ -0,0 +1,109 @@
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .prometheus import Histogram, escape_label
+
+# Upper bounds in seconds, iLO calls range from a few ms to several seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class RequestEvent:
+    """One Redfish request as seen by IloRedfishClient._make_request."""
+
+    host: str
+    method: str
+    endpoint: str
+    status: Optional[int]
+    elapsed: float
+    bytes: int = 0
+    retries: int = 0
+
+
+@dataclass
+class EndpointStats:
+    latency: Histogram
+    bytes: int = 0
+    retries: int = 0
+    errors: int = 0
+
+
+class RequestMetrics:
+    """Per-endpoint request metrics, fed by IloRedfishClient hooks.
+
+    Use ``client.add_hook(metrics.record)``; one instance can be shared by
+    all pooled clients.
+    """
+
+    def __init__(self):
+        self._endpoints: Dict[Tuple[str, str, str], EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, event: RequestEvent) -> None:
+        """Record a request event."""
+        key = (event.host, event.method, event.endpoint)
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = EndpointStats(Histogram(LATENCY_BUCKETS))
+            stats.latency.observe(event.elapsed)
+            stats.bytes += event.bytes
+            stats.retries += event.retries
+            if event.status is None or event.status >= 400:
+                stats.errors += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Get count, latency quantiles, bytes and retries per endpoint."""
+        with self._lock:
+            items = list(self._endpoints.items())
+        return [
+            {
+                "host": host,
+                "method": method,
+                "endpoint": endpoint,
+                "count": stats.latency.count,
+                "avg": stats.latency.sum / stats.latency.count,
+                "p50_le": stats.latency.quantile(0.5),
+                "p95_le": stats.latency.quantile(0.95),
+                "bytes": stats.bytes,
+                "retries": stats.retries,
+                "errors": stats.errors,
+            }
+            for (host, method, endpoint), stats in items
+        ]
+
+    def render_prometheus(self) -> List[str]:
+        """Render the metrics in Prometheus text exposition format."""
+        with self._lock:
+            items = list(self._endpoints.items())
+        histogram = "redfish_request_duration_seconds"
+        lines = [
+            f"# HELP {histogram} Redfish request latency.",
+            f"# TYPE {histogram} histogram",
+        ]
+        counters = {
+            "redfish_response_bytes_total": ("bytes", "Response body bytes."),
+            "redfish_request_retries_total": ("retries", "Retried requests."),
+            "redfish_request_errors_total": ("errors", "Failed requests."),
+        }
+        labelled = [(_labels(*key), stats) for key, stats in items]
+        for labels, stats in labelled:
+            lines += stats.latency.render(histogram, labels)
+        for name, (attr, help_text) in counters.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, stats in labelled:
+                lines.append(f"{name}{{{labels}}} {getattr(stats, attr)}")
+        return lines
+
+
+def _labels(host: str, method: str, endpoint: str) -> str:
+    return (
+        f'host="{escape_label(host)}",method="{method}",'
+        f'endpoint="{escape_label(endpoint)}"'
+    )
@@ -0,0 +1,281 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+TIMED_OUT = "timed_out"
+FINISHED = (COMPLETED, FAILED, TIMED_OUT)
+
+# Power action -> PowerState the server ends up in (None: opposite of now)
+TARGET_STATES = {
+    "On": "On",
+    "ForceOff": "Off",
+    "GracefulShutdown": "Off",
+    "ForceRestart": "On",
+    "PushPowerButton": None,
+}
+FAILED_TASK_STATES = ("Exception", "Killed", "Cancelled")
+# Read while a restart is tracked: a warm reset keeps PowerState On, but
+# the boot progress (Redfish) or POST state (iLO) moves
+RESTART_FIELDS = ["PowerState", "BootProgress.LastState", "Oem.Hpe.PostState"]
+
+
+def _boot_state(system: Dict[str, Any]) -> Optional[Tuple[Any, Any]]:
+    """Get the boot progress and POST state of a system, None if unknown."""
+    boot = (
+        (system.get("BootProgress") or {}).get("LastState"),
+        ((system.get("Oem") or {}).get("Hpe") or {}).get("PostState"),
+    )
+    return boot if any(boot) else None
+
+
+@dataclass
+class PowerJob:
+    """A power action and the state transitions observed since it was sent."""
+
+    id: str
+    host: str
+    action: str
+    target_state: str
+    initial_state: Optional[str] = None
+    initial_boot_state: Optional[Tuple[Any, Any]] = None
+    status: str = PENDING
+    task: Optional[str] = None
+    error: Optional[str] = None
+    completed_by: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    polls: int = 0
+    transitions: List[Tuple[float, str]] = field(default_factory=list)
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def is_warm_restart(self) -> bool:
+        """A restart from On, which may never leave PowerState On."""
+        return self.action == "ForceRestart" and self.initial_state == "On"
+
+    @property
+    def power_state(self) -> Optional[str]:
+        return self.transitions[-1][1] if self.transitions else self.initial_state
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "host": self.host,
+            "action": self.action,
+            "target_state": self.target_state,
+            "status": self.status,
+            "power_state": self.power_state,
+            "transitions": [
+                {"at": at, "power_state": state} for at, state in self.transitions
+            ],
+            "polls": self.polls,
+            "task": self.task,
+            "error": self.error,
+            "completed_by": self.completed_by,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobTracker:
+    """Sends power actions and follows them until the target state is reached.
+
+    Every job is watched by a daemon thread polling the power state. The
+    interval starts at ``min_interval`` and grows up to ``max_interval``
+    while nothing changes, dropping back after each transition. If the
+    service answered the reset with a Task, its TaskState is checked too so
+    a failed task fails the job early.
+
+    A ForceRestart from On is a warm reset on iLO and PowerState usually
+    stays On throughout. Such a job completes when PowerState went through
+    Off, when its task completed, when the boot progress or POST state
+    changed, or after ``restart_grace`` seconds without any of these.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 1.0,
+        max_interval: float = 10.0,
+        timeout: float = 600.0,
+        max_jobs: int = 100,
+        restart_grace: float = 60.0,
+    ):
+        """Initialize the tracker.
+
+        Args:
+            min_interval (float): First poll interval in seconds
+            max_interval (float): Largest poll interval in seconds
+            timeout (float): Seconds after which a job is marked timed out
+            max_jobs (int): Jobs kept; the oldest finished ones are dropped
+            restart_grace (float): Seconds after which a restart that stayed
+                On without any other sign of the reset counts as done
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.timeout = timeout
+        self.max_jobs = max_jobs
+        self.restart_grace = restart_grace
+        self._jobs: "OrderedDict[str, PowerJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, client: Any, action: str) -> Dict[str, Any]:
+        """Send a power action and start tracking it.
+
+        Args:
+            client (IloRedfishClient): Client of the server
+            action (str): Power action, e.g. "On" or "ForceRestart"
+
+        Returns:
+            dict: The job, or an error if the power state could not be read
+                or the action could not be sent
+        """
+        if action not in TARGET_STATES:
+            return client.set_power_state(action)
+
+        if action == "ForceRestart":
+            system = client.get_system_info(fields=RESTART_FIELDS)
+        else:
+            system = client.get_power_state()
+        if "error" in system:
+            # Without the initial state the job would track the wrong transition
+            return {"error": f"Could not read the power state: {system['error']}"}
+        initial = system.get("PowerState")
+        boot = _boot_state(system) if action == "ForceRestart" else None
+        target = TARGET_STATES[action]
+        if target is None:
+            target = "Off" if initial == "On" else "On"
+
+        result = client.set_power_state(action)
+        if "error" in result:
+            return result
+
+        job = PowerJob(
+            id=uuid.uuid4().hex[:12],
+            host=client.host,
+            action=action,
+            target_state=target,
+            initial_state=initial,
+            initial_boot_state=boot,
+            status=RUNNING,
+            task=result.get("task"),
+        )
+        self._add(job)
+        threading.Thread(
+            target=self._watch, args=(client, job), name=f"job-{job.id}", daemon=True
+        ).start()
+        return {**result, **job.to_dict()}
+
+    def _add(self, job: PowerJob) -> None:
+        with self._lock:
+            self._jobs[job.id] = job
+            finished = [j.id for j in self._jobs.values() if j.status in FINISHED]
+            while len(self._jobs) > self.max_jobs and finished:
+                del self._jobs[finished.pop(0)]
+
+    def get(self, job_id: str) -> Optional[PowerJob]:
+        return self._jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: float) -> Optional[PowerJob]:
+        """Block until a job finished or ``timeout`` seconds passed."""
+        job = self.get(job_id)
+        if job is not None:
+            job.done.wait(timeout)
+        return job
+
+    def _finish(
+        self,
+        job: PowerJob,
+        status: str,
+        error: Optional[str] = None,
+        completed_by: Optional[str] = None,
+    ) -> None:
+        job.status = status
+        job.error = error
+        job.completed_by = completed_by
+        job.finished_at = time.time()
+        job.done.set()
+
+    def _reached(
+        self,
+        job: PowerJob,
+        state: str,
+        boot: Optional[Tuple[Any, Any]],
+        task_state: Optional[str],
+        elapsed: float,
+    ) -> Optional[str]:
+        """Get why the job is done, None while it is not."""
+        if state != job.target_state:
+            return None
+        if not job.is_warm_restart:
+            return "power_state"
+        # Still On is not enough: wait for a sign that the reset happened
+        if any(s != "On" for _, s in job.transitions):
+            return "power_state"
+        if task_state == "Completed":
+            return "task"
+        if boot is not None and boot != job.initial_boot_state:
+            return "boot_progress"
+        if elapsed >= self.restart_grace:
+            return "grace"
+        return None
+
+    def _read_state(
+        self, client: Any, job: PowerJob
+    ) -> Tuple[Optional[str], Optional[Tuple[Any, Any]]]:
+        if not job.is_warm_restart:
+            return client.get_power_state().get("PowerState"), None
+        system = client.get_system_info(fields=RESTART_FIELDS)
+        return system.get("PowerState"), _boot_state(system)
+
+    def _watch(self, client: Any, job: PowerJob) -> None:
+        start = time.monotonic()
+        deadline = start + self.timeout
+        interval = self.min_interval
+        last_state = job.initial_state
+        try:
+            while time.monotonic() < deadline:
+                job.polls += 1
+
+                task_state = None
+                if job.task:
+                    task_state = client.get_task(job.task).get("TaskState")
+                    if task_state in FAILED_TASK_STATES:
+                        self._finish(job, FAILED, f"Task {task_state}")
+                        return
+
+                state, boot = self._read_state(client, job)
+                if state and state != last_state:
+                    job.transitions.append((time.time(), state))
+                    last_state = state
+                    interval = self.min_interval
+                else:
+                    interval = min(interval * 1.5, self.max_interval)
+
+                reason = state and self._reached(
+                    job, state, boot, task_state, time.monotonic() - start
+                )
+                if reason:
+                    self._finish(job, COMPLETED, completed_by=reason)
+                    return
+                time.sleep(interval)
+            self._finish(job, TIMED_OUT, f"{job.target_state} not reached in time")
+        except Exception as e:
+            logger.warning(f"Error tracking job {job.id}: {str(e)}")
+            self._finish(job, FAILED, str(e))
+
+    def stats(self) -> Dict[str, int]:
+        """Count jobs by status."""
+        counts: Dict[str, int] = {}
+        for job in list(self._jobs.values()):
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
@@ -0,0 +1,127 @@
+from .jobs import COMPLETED, TIMED_OUT, JobTracker
+
+
+class FakeServer:
+    """Reports a scripted PowerState sequence after a power action."""
+
+    host = "10.0.0.80"
+
+    def __init__(self, state, script=()):
+        self.state = state
+        self.script = list(script)
+        self.polls = 0
+
+    def set_power_state(self, action):
+        return {"success": f"Power action '{action}' initiated successfully"}
+
+    def get_power_state(self, max_age=None):
+        self.polls += 1
+        if self.script:
+            self.state = self.script.pop(0)
+        return {"PowerState": self.state}
+
+    def get_system_info(self, max_age=None, fields=None):
+        return self.get_power_state()
+
+
+class WarmResettingServer(FakeServer):
+    """Stays On through a restart, only the POST state moves."""
+
+    def __init__(self, post_states, task_states=()):
+        super().__init__("On")
+        self.post_states = list(post_states)
+        self.task_states = list(task_states)
+
+    def set_power_state(self, action):
+        result = super().set_power_state(action)
+        return {**result, "task": "/redfish/v1/TaskService/Tasks/1/"}
+
+    def get_task(self, task_url):
+        state = self.task_states.pop(0) if self.task_states else "Running"
+        return {"TaskState": state}
+
+    def get_system_info(self, max_age=None, fields=None):
+        post_state = self.post_states.pop(0) if self.post_states else None
+        system = {"PowerState": "On"}
+        if post_state:
+            system["Oem"] = {"Hpe": {"PostState": post_state}}
+        return system
+
+
+def make_tracker(**kwargs):
+    return JobTracker(min_interval=0.01, max_interval=0.05, **kwargs)
+
+
+def test_restart_completes_after_going_through_off():
+    # first poll is the initial state read before the action
+    server = FakeServer("On", ["On", "On", "On", "Off", "Off", "On"])
+    tracker = make_tracker()
+
+    job = tracker.submit(server, "ForceRestart")
+    assert job["status"] == "running" and job["target_state"] == "On"
+
+    done = tracker.wait(job["job_id"], timeout=2)
+    assert done.status == COMPLETED
+    assert done.completed_by == "power_state"
+    assert [state for _, state in done.transitions] == ["Off", "On"]
+
+
+def test_warm_restart_completes_on_post_state_change():
+    server = WarmResettingServer(["FinishedPost", "FinishedPost", "InPost"])
+    tracker = make_tracker()
+
+    job = tracker.submit(server, "ForceRestart")
+    done = tracker.wait(job["job_id"], timeout=2)
+
+    assert (done.status, done.completed_by) == (COMPLETED, "boot_progress")
+    assert done.transitions == []
+
+
+def test_warm_restart_completes_on_task_or_after_grace():
+    tracker = make_tracker(restart_grace=0.1)
+
+    by_task = tracker.submit(
+        WarmResettingServer([], ["Running", "Completed"]), "ForceRestart"
+    )
+    by_grace = tracker.submit(WarmResettingServer([]), "ForceRestart")
+
+    assert tracker.wait(by_task["job_id"], timeout=2).completed_by == "task"
+    done = tracker.wait(by_grace["job_id"], timeout=2)
+    assert (done.status, done.completed_by) == (COMPLETED, "grace")
+
+
+def test_push_button_targets_opposite_state_and_times_out():
+    tracker = make_tracker(timeout=0.2)
+    job = tracker.submit(FakeServer("Off"), "PushPowerButton")
+    assert job["target_state"] == "On"
+
+    done = tracker.wait(job["job_id"], timeout=2)
+    assert done.status == TIMED_OUT
+    assert tracker.stats() == {TIMED_OUT: 1}
+
+
+def test_invalid_action_creates_no_job():
+    class Rejecting(FakeServer):
+        def set_power_state(self, action):
+            return {"error": f"Invalid power action: {action}"}
+
+    tracker = make_tracker()
+    assert "job_id" not in tracker.submit(Rejecting("On"), "Reboot")
+    assert tracker.stats() == {}
+
+
+def test_unreadable_power_state_fails_the_submission():
+    class Unreachable(FakeServer):
+        def get_power_state(self, max_age=None):
+            return {"error": "API request failed: 503"}
+
+        def set_power_state(self, action):
+            raise AssertionError("action sent without a known initial state")
+
+    tracker = make_tracker()
+    for action in ("PushPowerButton", "ForceRestart"):
+        result = tracker.submit(Unreachable("On"), action)
+        assert result == {
+            "error": "Could not read the power state: API request failed: 503"
+        }
+    assert tracker.stats() == {}
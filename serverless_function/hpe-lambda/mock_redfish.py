@@ -0,0 +1,375 @@
+"""Local mock of an HPE iLO Redfish service.
+
+Serves the resources IloRedfishClient uses (service root, Systems, Chassis
+Thermal/Power, Managers, Storage, SessionService and the reset action) with
+ETags, basic and session auth, optional $select support and configurable
+latency. Serves HTTPS when given a certificate, plain HTTP otherwise.
+
+Usage:
+    python mock_redfish.py --port 8443 --latency 0.05 --certfile cert.pem --keyfile key.pem
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import ssl
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = "/redfish/v1"
+SYSTEM = f"{ROOT}/Systems/1"
+CHASSIS = f"{ROOT}/Chassis/1"
+MANAGER = f"{ROOT}/Managers/1"
+SESSIONS = f"{ROOT}/SessionService/Sessions"
+RESET = f"{SYSTEM}/Actions/ComputerSystem.Reset"
+# iLO answers successful actions with an "error" object carrying Base.Success
+ILO_SUCCESS = {
+    "error": {
+        "code": "iLO.0.10.ExtendedInfo",
+        "message": "See @Message.ExtendedInfo for more information.",
+        "@Message.ExtendedInfo": [{"MessageId": "Base.1.4.Success"}],
+    }
+}
+
+
+def _collection(*members: str) -> Dict[str, Any]:
+    return {
+        "Members": [{"@odata.id": f"{m}/"} for m in members],
+        "Members@odata.count": len(members),
+    }
+
+
+class MockRedfishServer:
+    """A threaded mock iLO, bound to an ephemeral port by default."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        temperatures: int = 40,
+        fans: int = 8,
+        select: bool = False,
+        reset_delay: float = 0.1,
+        warm_reset: bool = False,
+        username: str = "admin",
+        password: str = "password",
+        certfile: Optional[str] = None,
+        keyfile: Optional[str] = None,
+    ):
+        """Initialize the server.
+
+        Args:
+            host (str): Address to bind
+            port (int): Port to bind, 0 for an ephemeral one
+            latency (float): Delay added to every request in seconds
+            temperatures (int): Number of temperature sensors (payload size)
+            fans (int): Number of fans
+            select (bool): Advertise and honour $select
+            reset_delay (float): Seconds a reset takes to change PowerState
+            warm_reset (bool): ForceRestart keeps PowerState On and only moves
+                the POST state, like a real iLO
+            username (str): Accepted username
+            password (str): Accepted password
+            certfile (Optional[str]): PEM certificate, enables HTTPS
+            keyfile (Optional[str]): PEM private key of the certificate
+        """
+        self.latency = latency
+        self.latencies: Dict[str, float] = {}
+        self.select = select
+        self.reset_delay = reset_delay
+        self.warm_reset = warm_reset
+        self.credentials = (username, password)
+        self.power_state = "On"
+        self.post_state = "FinishedPost"
+        self.sessions: Dict[str, str] = {}
+        self.requests: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self._resources = self._build(temperatures, fans)
+
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.httpd.daemon_threads = True
+        self.scheme = "http"
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            self.httpd.socket = context.wrap_socket(self.httpd.socket, server_side=True)
+            self.scheme = "https"
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"{self.scheme}://{host}:{port}"
+
+    def _build(self, temperatures: int, fans: int) -> Dict[str, Dict[str, Any]]:
+        status = {"Health": "OK", "State": "Enabled"}
+        return {
+            f"{ROOT}": {
+                "@odata.id": f"{ROOT}/",
+                "RedfishVersion": "1.6.0",
+                "Systems": {"@odata.id": f"{ROOT}/Systems/"},
+                "Chassis": {"@odata.id": f"{ROOT}/Chassis/"},
+                "Managers": {"@odata.id": f"{ROOT}/Managers/"},
+                "ProtocolFeaturesSupported": {"SelectQuery": self.select},
+            },
+            f"{ROOT}/Systems": _collection(SYSTEM),
+            f"{ROOT}/Chassis": _collection(CHASSIS),
+            f"{ROOT}/Managers": _collection(MANAGER),
+            SYSTEM: {
+                "@odata.id": f"{SYSTEM}/",
+                "Id": "1",
+                "Manufacturer": "HPE",
+                "Model": "ProLiant DL380 Gen10",
+                "SerialNumber": "MOCK0001",
+                "BiosVersion": "U30 v2.80",
+                "MemorySummary": {"TotalSystemMemoryGiB": 256, "Status": status},
+                "ProcessorSummary": {"Count": 2, "Model": "Intel(R) Xeon(R) Gold"},
+                "Status": status,
+                "Boot": {"BootSourceOverrideTarget": "None"},
+            },
+            f"{SYSTEM}/Storage": _collection(f"{SYSTEM}/Storage/DE00A000"),
+            f"{CHASSIS}/Thermal": {
+                "@odata.id": f"{CHASSIS}/Thermal/",
+                "Temperatures": [
+                    {
+                        "MemberId": str(i),
+                        "Name": f"{i:02d}-Sensor",
+                        "ReadingCelsius": 20 + i % 40,
+                        "UpperThresholdCritical": 90,
+                        "UpperThresholdFatal": 100,
+                        "PhysicalContext": "SystemBoard",
+                        "Status": status,
+                    }
+                    for i in range(temperatures)
+                ],
+                "Fans": [
+                    {
+                        "MemberId": str(i),
+                        "Name": f"Fan {i + 1}",
+                        "Reading": 20 + i,
+                        "ReadingUnits": "Percent",
+                        "Status": status,
+                    }
+                    for i in range(fans)
+                ],
+            },
+            f"{CHASSIS}/Power": {
+                "@odata.id": f"{CHASSIS}/Power/",
+                "PowerControl": [
+                    {
+                        "MemberId": "0",
+                        "PowerConsumedWatts": 180,
+                        "PowerCapacityWatts": 1600,
+                        "PowerMetrics": {"AverageConsumedWatts": 175},
+                    }
+                ],
+                "PowerSupplies": [
+                    {"MemberId": str(i), "LastPowerOutputWatts": 90, "Status": status}
+                    for i in range(2)
+                ],
+            },
+            MANAGER: {
+                "@odata.id": f"{MANAGER}/",
+                "FirmwareVersion": "iLO 5 v2.72",
+                "Status": status,
+            },
+        }
+
+    def resource(self, path: str) -> Optional[Dict[str, Any]]:
+        """Get the current representation of a resource."""
+        data = self._resources.get(path.rstrip("/"))
+        if data is not None and path.rstrip("/") == SYSTEM:
+            data = {
+                **data,
+                "PowerState": self.power_state,
+                "Oem": {"Hpe": {"PostState": self.post_state}},
+            }
+        return data
+
+    def reset(self, reset_type: str) -> bool:
+        """Apply a reset action after ``reset_delay``."""
+        on, off = ("On", "FinishedPost"), ("Off", "PowerOff")
+        states = {"On": [on], "ForceOff": [off], "GracefulShutdown": [off]}
+        states["ForceRestart"] = (
+            [("On", "InPost"), on] if self.warm_reset else [off, on]
+        )
+        states["PushPowerButton"] = [off if self.power_state == "On" else on]
+        if reset_type not in states:
+            return False
+
+        def apply(remaining):
+            self.power_state, self.post_state = remaining[0]
+            if remaining[1:]:
+                _later(self.reset_delay, apply, remaining[1:])
+
+        _later(self.reset_delay, apply, states[reset_type])
+        return True
+
+    def start(self) -> "MockRedfishServer":
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, name="mock-redfish", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockRedfishServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def _later(delay: float, func, *args) -> None:
+    timer = threading.Timer(delay, func, args)
+    timer.daemon = True
+    timer.start()
+
+
+def _select(data: Dict[str, Any], select: str) -> Dict[str, Any]:
+    """Apply a $select value (top-level and "A/B" nested properties)."""
+    result: Dict[str, Any] = {}
+    for path in select.split(","):
+        source, target = data, result
+        parts = path.split("/")
+        for part in parts[:-1]:
+            if not isinstance(source.get(part), dict):
+                break
+            source = source[part]
+            target = target.setdefault(part, {})
+        else:
+            if parts[-1] in source:
+                target[parts[-1]] = source[parts[-1]]
+    return result
+
+
+def _make_handler(server: MockRedfishServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately, avoid Nagle/delayed ACK stalls
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+        def _reply(
+            self,
+            status: int,
+            data: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None,
+        ) -> None:
+            body = json.dumps(data).encode() if data is not None else b""
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            if body:
+                self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self) -> Dict[str, Any]:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length)) if length else {}
+
+        def _authorized(self) -> bool:
+            token = self.headers.get("X-Auth-Token")
+            if token:
+                return token in server.sessions
+            auth = self.headers.get("Authorization", "")
+            if not auth.startswith("Basic "):
+                return False
+            user, _, password = base64.b64decode(auth[6:]).decode().partition(":")
+            return (user, password) == server.credentials
+
+        def _begin(self) -> str:
+            path = urlsplit(self.path).path
+            key = (self.command, path)
+            with server._lock:
+                server.requests[key] = server.requests.get(key, 0) + 1
+            delay = server.latency
+            for prefix, latency in server.latencies.items():
+                if path.startswith(prefix):
+                    delay = latency
+            if delay:
+                time.sleep(delay)
+            return path
+
+        def do_GET(self) -> None:
+            path = self._begin()
+            if not self._authorized():
+                return self._reply(401, {"error": "Unauthorized"})
+            data = server.resource(path)
+            if data is None:
+                return self._reply(404, {"error": "Not found"})
+            select = parse_qs(urlsplit(self.path).query).get("$select")
+            if select and server.select:
+                data = _select(data, select[0])
+            payload = json.dumps(data, sort_keys=True).encode()
+            etag = f'W/"{hashlib.sha1(payload).hexdigest()[:16]}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._reply(304, headers={"ETag": etag})
+            self._reply(200, data, headers={"ETag": etag})
+
+        def do_POST(self) -> None:
+            path = self._begin().rstrip("/")
+            body = self._body()
+            if path == SESSIONS:
+                credentials = (body.get("UserName"), body.get("Password"))
+                if credentials != server.credentials:
+                    return self._reply(401, {"error": "Invalid credentials"})
+                session_id = uuid.uuid4().hex[:8]
+                token = uuid.uuid4().hex
+                server.sessions[token] = session_id
+                return self._reply(
+                    201,
+                    {"@odata.id": f"{SESSIONS}/{session_id}/"},
+                    headers={
+                        "X-Auth-Token": token,
+                        "Location": f"{SESSIONS}/{session_id}/",
+                    },
+                )
+            if not self._authorized():
+                return self._reply(401, {"error": "Unauthorized"})
+            if path == RESET and server.reset(body.get("ResetType")):
+                return self._reply(200, ILO_SUCCESS)
+            self._reply(400 if path == RESET else 404, {"error": "Bad request"})
+
+        def do_DELETE(self) -> None:
+            path = self._begin().rstrip("/")
+            token = self.headers.get("X-Auth-Token")
+            session_id = server.sessions.get(token)
+            if session_id is None or path != f"{SESSIONS}/{session_id}":
+                return self._reply(401, {"error": "Unauthorized"})
+            del server.sessions[token]
+            self._reply(200, ILO_SUCCESS)
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a mock iLO Redfish service")
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--select", action="store_true")
+    parser.add_argument("--certfile")
+    parser.add_argument("--keyfile")
+    args = parser.parse_args()
+    mock = MockRedfishServer(
+        port=args.port,
+        latency=args.latency,
+        select=args.select,
+        certfile=args.certfile,
+        keyfile=args.keyfile,
+    )
+    print(f"mock iLO on {mock.url}")
+    mock.httpd.serve_forever()
@@ -0,0 +1,65 @@
+from typing import Any, Dict, List, Optional
+
+
+def _tree(fields: List[str]) -> Dict[str, Any]:
+    """Turn dotted field paths into a nested dict of wanted keys."""
+    tree: Dict[str, Any] = {}
+    for field in fields:
+        node = tree
+        for part in field.split("."):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def _trim(value: Any, tree: Dict[str, Any]) -> Any:
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [_trim(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {key: _trim(value[key], sub) for key, sub in tree.items() if key in value}
+
+
+def project(data: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Keep only the given fields of a Redfish resource.
+
+    Fields are property names, with dots for nested properties. A path
+    through a list applies to every element, e.g. "Fans.Reading".
+
+    Args:
+        data (Dict[str, Any]): The resource
+        fields (Optional[List[str]]): Fields to keep, everything if empty
+
+    Returns:
+        Dict[str, Any]: A new, trimmed resource (errors are kept as they are)
+    """
+    if not fields or "error" in data:
+        return data
+    return _trim(data, _tree(fields))
+
+
+def select_query(fields: List[str]) -> str:
+    """Build the $select value for the given fields ("A.B" becomes "A/B")."""
+    return ",".join(field.replace(".", "/") for field in fields)
+
+
+def validate_fields(fields: Any) -> Optional[List[str]]:
+    """Normalize a "fields" request parameter.
+
+    Args:
+        fields (Any): A list of field names, a comma separated string or None
+
+    Returns:
+        Optional[List[str]]: The field names, None if not given
+
+    Raises:
+        ValueError: If fields is neither a list of strings nor a string
+    """
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = [f.strip() for f in fields.split(",") if f.strip()]
+    if not isinstance(fields, list) or not all(isinstance(f, str) for f in fields):
+        raise ValueError("fields must be a list of field names")
+    return fields
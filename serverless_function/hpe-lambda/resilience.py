@@ -0,0 +1,271 @@
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+# Gauge values of ilo_circuit_breaker_state
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class Deadline:
+    """Time budget shared by every Redfish request of one invocation."""
+
+    __slots__ = ("budget", "expires_at")
+
+    def __init__(self, budget: float):
+        """Initialize the deadline.
+
+        Args:
+            budget (float): Seconds from now until the deadline
+        """
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        """Seconds left, 0 once the deadline passed."""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+_deadline: ContextVar[Optional[Deadline]] = ContextVar("ilo_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Get the deadline of the running invocation, None outside of one."""
+    return _deadline.get()
+
+
+@contextmanager
+def deadline_scope(budget: float) -> Iterator[Deadline]:
+    """Run a block with a deadline that requests made inside it respect.
+
+    The deadline lives in a context variable. Work handed to executor
+    threads only sees it when submitted through
+    ``contextvars.copy_context().run``.
+
+    Args:
+        budget (float): Seconds the block may spend on Redfish requests
+
+    Yields:
+        Deadline: The deadline
+    """
+    deadline = Deadline(budget)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+@dataclass
+class RetryPolicy:
+    """Jittered exponential backoff for idempotent requests.
+
+    Delays are drawn uniformly from [0, min(max_delay, base_delay * 2**n)]
+    ("full jitter") so clients retrying against the same busy iLO spread
+    out instead of hitting it in lockstep.
+    """
+
+    attempts: int = 3
+    base_delay: float = 0.2
+    max_delay: float = 2.0
+    statuses: Tuple[int, ...] = (429, 502, 503, 504)
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        """Build the policy from ILO_RETRY_ATTEMPTS and ILO_RETRY_BASE_DELAY."""
+        return cls(
+            attempts=int(os.environ.get("ILO_RETRY_ATTEMPTS", 3)),
+            base_delay=float(os.environ.get("ILO_RETRY_BASE_DELAY", 0.2)),
+        )
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> Optional[float]:
+        """Get the delay before the next attempt.
+
+        Args:
+            attempt (int): Number of attempts made so far
+            retry_after (Optional[str]): Retry-After header of the response
+
+        Returns:
+            Optional[float]: Seconds to wait, None if the request should not
+                be retried
+        """
+        if attempt >= self.attempts:
+            return None
+        if retry_after:
+            try:
+                wait = float(retry_after)
+            except ValueError:
+                wait = None
+            if wait is not None:
+                # Honour the server, unless it asks for longer than we wait
+                return wait if wait <= self.max_delay else None
+        return random.uniform(
+            0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        )
+
+
+class CircuitBreaker:
+    """Fails requests to an unhealthy iLO fast instead of waiting on it.
+
+    After ``failure_threshold`` consecutive failed requests (connection
+    errors, timeouts, 5xx once retries are used up) the breaker opens and requests are refused for
+    ``reset_timeout`` seconds. Then a single probe request is let through
+    (half open): success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """Initialize the breaker.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the breaker
+            reset_timeout (float): Seconds the breaker stays open
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opens = 0
+        self.rejected = 0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self.retry_after() <= 0:
+            return HALF_OPEN
+        return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a probe through."""
+        if self._state != OPEN:
+            return 0.0
+        return max(self._opened_at + self.reset_timeout - time.monotonic(), 0.0)
+
+    def allow(self) -> bool:
+        """Check whether a request may be sent, counting it if refused."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and self.retry_after() <= 0:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        """The iLO answered: close the breaker."""
+        with self._lock:
+            self._state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        """The iLO did not answer or failed: open the breaker if it is time."""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opens += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Forget an allowed request that ended without telling us anything."""
+        with self._lock:
+            self._probing = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opens": self.opens,
+            "rejected": self.rejected,
+            "retry_after": round(self.retry_after(), 1),
+        }
+
+
+class CircuitBreakers:
+    """Process-wide circuit breakers, one per iLO host."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """Initialize the registry.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open a breaker
+            reset_timeout (float): Seconds a breaker stays open
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreakers":
+        """Build the registry from ILO_BREAKER_THRESHOLD and ILO_BREAKER_RESET."""
+        return cls(
+            failure_threshold=int(os.environ.get("ILO_BREAKER_THRESHOLD", 5)),
+            reset_timeout=float(os.environ.get("ILO_BREAKER_RESET", 30)),
+        )
+
+    def get(self, host: str) -> CircuitBreaker:
+        """Get the breaker of a host, creating it on first use."""
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(
+                    self.failure_threshold, self.reset_timeout
+                )
+            return breaker
+
+    def states(self) -> Dict[str, Dict[str, Any]]:
+        """Get the state of every breaker by host."""
+        with self._lock:
+            breakers = list(self._breakers.items())
+        return {host: breaker.to_dict() for host, breaker in breakers}
+
+    def render_prometheus(self) -> List[str]:
+        """Render breaker states in Prometheus text exposition format."""
+        with self._lock:
+            breakers = list(self._breakers.items())
+        lines = [
+            "# HELP ilo_circuit_breaker_state Circuit breaker state "
+            "(0 closed, 1 half open, 2 open).",
+            "# TYPE ilo_circuit_breaker_state gauge",
+        ]
+        for host, breaker in breakers:
+            lines.append(
+                f'ilo_circuit_breaker_state{{host="{host}"}} '
+                f"{STATE_VALUES[breaker.state]}"
+            )
+        for name, attr, help_text in (
+            ("ilo_circuit_breaker_opens_total", "opens", "Times the breaker opened."),
+            (
+                "ilo_circuit_breaker_rejected_total",
+                "rejected",
+                "Requests refused by an open breaker.",
+            ),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for host, breaker in breakers:
+                lines.append(f'{name}{{host="{host}"}} {getattr(breaker, attr)}')
+        return lines
+
+
+# One breaker per host, also shared by clients of different users
+shared_breakers = CircuitBreakers.from_env()
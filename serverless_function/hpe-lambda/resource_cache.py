@@ -0,0 +1,93 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+class ResourceCache:
+    """Process-wide map of resolved Redfish collection members.
+
+    Maps (service root, collection) to the URL of the member the client works
+    with, e.g. ``/redfish/v1/Systems`` to ``/redfish/v1/Systems/1/``, so that
+    the collection does not have to be fetched before every request. Entries
+    expire after ``ttl`` seconds and are dropped when the member returns 404.
+    Shared by the snapshot and fleet thread pools, so access is locked.
+    """
+
+    def __init__(self, ttl: float = 3600.0):
+        """Initialize the cache.
+
+        Args:
+            ttl (float): Seconds a resolved member URL stays valid
+        """
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ResourceCache":
+        """Build a cache configured from environment variables."""
+        return cls(ttl=float(os.environ.get("ILO_RESOURCE_CACHE_TTL", 3600)))
+
+    def get(self, service_root: str, collection: str) -> Optional[str]:
+        """Look up a resolved member URL, counting the hit or miss.
+
+        Args:
+            service_root (str): Redfish service root URL
+            collection (str): Collection endpoint path
+
+        Returns:
+            Optional[str]: The member URL, or None if unknown or expired
+        """
+        key = (service_root, collection)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[1] > self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def put(self, service_root: str, collection: str, member_url: str) -> None:
+        """Store a resolved member URL."""
+        with self._lock:
+            self._entries[(service_root, collection)] = (member_url, time.monotonic())
+
+    def invalidate(self, service_root: str, collection: Optional[str] = None) -> None:
+        """Drop one collection, or every collection of a service root."""
+        with self._lock:
+            keys = [
+                key
+                for key in self._entries
+                if key[0] == service_root and collection in (None, key[1])
+            ]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters.
+
+        Returns:
+            Dict[str, Any]: Size, hit/miss/invalidation counters and hit ratio
+        """
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
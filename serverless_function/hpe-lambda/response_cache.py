@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class CachedResponse:
+    """A decoded Redfish response and the validator it was served with."""
+
+    etag: Optional[str]
+    data: Dict[str, Any]
+    size: int
+    fetched_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class ResponseCache:
+    """Per-client cache of GET responses keyed by URL.
+
+    Entries are revalidated with If-None-Match, so an unchanged resource
+    costs a 304 without a body. Callers that accept slightly stale data can
+    skip the round trip entirely with a max age. The least recently used
+    entry is evicted once ``max_entries`` is reached. Snapshot and fleet
+    workers share a client, so all access goes through a lock.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        """Initialize the cache.
+
+        Args:
+            max_entries (int): Maximum number of cached responses
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self.fresh_hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """Look up a cached response without counting it."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def put(
+        self, url: str, etag: Optional[str], data: Dict[str, Any], size: int
+    ) -> None:
+        """Store a freshly downloaded response."""
+        entry = CachedResponse(etag=etag, data=data, size=size)
+        with self._lock:
+            self._entries[url] = entry
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_hit(self, entry: CachedResponse, revalidated: bool) -> None:
+        """Count a response served from the cache.
+
+        Args:
+            entry (CachedResponse): The entry that was served
+            revalidated (bool): True after a 304, False when served by max age
+        """
+        with self._lock:
+            if revalidated:
+                self.revalidated += 1
+                entry.fetched_at = time.monotonic()
+            else:
+                self.fresh_hits += 1
+            self.bytes_saved += entry.size
+
+    def record_miss(self) -> None:
+        """Count a response that had to be downloaded."""
+        with self._lock:
+            self.misses += 1
+
+    def clear(self) -> None:
+        """Drop all cached responses, e.g. after a state-changing request."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters.
+
+        Returns:
+            Dict[str, Any]: Size, hit/miss counters, hit ratio and bytes saved
+        """
+        hits = self.fresh_hits + self.revalidated
+        lookups = hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "fresh_hits": self.fresh_hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+        }
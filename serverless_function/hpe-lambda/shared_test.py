@@ -0,0 +1,22 @@
+import filecmp
+import os
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SHARED = os.path.join(HERE, os.pardir, "shared")
+
+
+@pytest.mark.skipif(
+    not os.path.isdir(SHARED) or os.path.samefile(HERE, SHARED),
+    reason="only checked from a function directory of the source tree",
+)
+def test_shared_modules_match_their_source():
+    names = sorted(name for name in os.listdir(SHARED) if name.endswith(".py"))
+    stale = [
+        name
+        for name in names
+        if not os.path.isfile(os.path.join(HERE, name))
+        or not filecmp.cmp(os.path.join(SHARED, name), os.path.join(HERE, name), False)
+    ]
+    assert stale == [], "run `just sync_shared` in serverless_function"
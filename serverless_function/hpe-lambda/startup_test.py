@@ -0,0 +1,64 @@
+"""Cold start budget: importing the handler must stay cheap.
+
+The handler is imported in a fresh interpreter, as the watchdog does when
+the function scales from zero. The tests fail when requests or urllib3
+is loaded at import time again, or when the import takes longer than
+ILO_IMPORT_BUDGET_MS (default 300, best of ILO_IMPORT_RUNS=3 runs).
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+LAZY_MODULES = ["requests", "urllib3"]
+BUDGET_MS = float(os.environ.get("ILO_IMPORT_BUDGET_MS", 300))
+RUNS = int(os.environ.get("ILO_IMPORT_RUNS", 3))
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {package}.handler
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"ms": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def import_handler():
+    """Import the handler in a new interpreter.
+
+    Returns:
+        tuple: (milliseconds, loaded module names, slowest imports)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SCRIPT.format(package=__package__)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env={**os.environ, "ILO_PREWARM": "disabled"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    report = json.loads(result.stdout.splitlines()[-1])
+    # "import time: self [us] | cumulative | imported package"
+    imports = []
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            imports.append((int(fields[1]) / 1000, fields[2].strip()))
+    return report["ms"], report["modules"], sorted(imports, reverse=True)[:8]
+
+
+def test_heavy_dependencies_are_loaded_lazily():
+    _, modules, _ = import_handler()
+
+    assert [name for name in LAZY_MODULES if name in modules] == []
+
+
+def test_import_time_budget():
+    runs = [import_handler() for _ in range(RUNS)]
+    elapsed, _, slowest = min(runs)
+
+    assert elapsed <= BUDGET_MS, (
+        f"Importing the handler took {elapsed:.0f}ms (budget {BUDGET_MS:.0f}ms), "
+        f"slowest imports (ms, cumulative): {slowest}"
+    )
@@ -0,0 +1,387 @@
+import logging
+import math
+import threading
+import time
+from array import array
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .prometheus import escape_label
+
+logger = logging.getLogger(__name__)
+
+# Sensor kind -> (Prometheus metric name, help text)
+KINDS = {
+    "temperature": ("ilo_temperature_celsius", "Latest temperature sensor reading."),
+    "fan": ("ilo_fan_reading", "Latest fan reading (RPM or percent, as reported)."),
+    "power": ("ilo_power_consumed_watts", "Latest power consumption."),
+}
+
+THERMAL_FIELDS = [
+    "Temperatures.Name",
+    "Temperatures.ReadingCelsius",
+    "Fans.Name",
+    "Fans.FanName",
+    "Fans.Reading",
+]
+POWER_FIELDS = ["PowerControl.Name", "PowerControl.PowerConsumedWatts"]
+PERCENTILES = (50, 95, 99)
+
+SensorKey = Tuple[str, str]
+
+
+def _zeros(typecode: str, size: int) -> array:
+    return array(typecode, bytes(array(typecode).itemsize * size))
+
+
+class RawRing:
+    """Fixed-size ring buffer of (timestamp, value) samples."""
+
+    __slots__ = ("capacity", "times", "values", "_head", "_size")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.times = _zeros("d", capacity)
+        self.values = _zeros("d", capacity)
+        self._head = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, timestamp: float, value: float) -> None:
+        self.times[self._head] = timestamp
+        self.values[self._head] = value
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    @property
+    def oldest(self) -> Optional[float]:
+        if not self._size:
+            return None
+        return self.times[(self._head - self._size) % self.capacity]
+
+    @property
+    def latest(self) -> Optional[float]:
+        if not self._size:
+            return None
+        return self.values[(self._head - 1) % self.capacity]
+
+    def since(self, since: float) -> List[float]:
+        """Values sampled at or after ``since``, oldest first."""
+        first = (self._head - self._size) % self.capacity
+        if first + self._size <= self.capacity:
+            times = self.times[first : first + self._size]
+            values = self.values[first : first + self._size]
+        else:
+            times = self.times[first:] + self.times[: self._head]
+            values = self.values[first:] + self.values[: self._head]
+        return [v for t, v in zip(times, values) if t >= since]
+
+
+class BucketRing:
+    """Fixed-size ring buffer of min/max/sum/count buckets."""
+
+    __slots__ = (
+        "resolution",
+        "capacity",
+        "start",
+        "min",
+        "max",
+        "sum",
+        "count",
+        "_head",
+        "_size",
+    )
+
+    def __init__(self, capacity: int, resolution: float):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.start = _zeros("d", capacity)
+        self.min = _zeros("d", capacity)
+        self.max = _zeros("d", capacity)
+        self.sum = _zeros("d", capacity)
+        self.count = _zeros("l", capacity)
+        self._head = 0
+        self._size = 0
+
+    def add(self, timestamp: float, value: float) -> None:
+        bucket_start = timestamp - timestamp % self.resolution
+        last = (self._head - 1) % self.capacity
+        if self._size and self.start[last] == bucket_start:
+            self.min[last] = min(self.min[last], value)
+            self.max[last] = max(self.max[last], value)
+            self.sum[last] += value
+            self.count[last] += 1
+            return
+        i = self._head
+        self.start[i] = bucket_start
+        self.min[i] = self.max[i] = self.sum[i] = value
+        self.count[i] = 1
+        self._head = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def since(self, since: float) -> Iterator[int]:
+        """Indices of buckets overlapping [since, now], oldest first."""
+        first = (self._head - self._size) % self.capacity
+        for n in range(self._size):
+            i = (first + n) % self.capacity
+            if self.start[i] + self.resolution >= since:
+                yield i
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    rank = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+class SensorSeries:
+    """One sensor kept as raw samples plus 1-minute buckets.
+
+    Windows covered by the raw ring get exact percentiles; longer windows
+    fall back to the minute buckets, where percentiles are computed over the
+    bucket averages.
+    """
+
+    def __init__(self, raw_size: int = 720, minute_size: int = 1440):
+        self.raw = RawRing(raw_size)
+        self.minutes = BucketRing(minute_size, 60.0)
+
+    def add(self, timestamp: float, value: float) -> None:
+        self.raw.add(timestamp, value)
+        self.minutes.add(timestamp, value)
+
+    @property
+    def latest(self) -> Optional[float]:
+        return self.raw.latest
+
+    def query(self, window: float, now: Optional[float] = None) -> Dict[str, Any]:
+        """Get min/max/avg/percentiles over the last ``window`` seconds.
+
+        Args:
+            window (float): Window length in seconds
+            now (Optional[float]): End of the window, defaults to the current time
+
+        Returns:
+            Dict[str, Any]: Aggregates and the resolution they were computed at
+        """
+        now = time.time() if now is None else now
+        since = now - window
+        raw_covers = len(self.raw) < self.raw.capacity or self.raw.oldest <= since
+        if raw_covers:
+            values = self.raw.since(since)
+            if not values:
+                return {"count": 0, "resolution": 0.0}
+            lo, hi, total, count = min(values), max(values), sum(values), len(values)
+        else:
+            buckets = list(self.minutes.since(since))
+            if not buckets:
+                return {"count": 0, "resolution": self.minutes.resolution}
+            m = self.minutes
+            values = [m.sum[i] / m.count[i] for i in buckets]
+            lo = min(m.min[i] for i in buckets)
+            hi = max(m.max[i] for i in buckets)
+            total = sum(m.sum[i] for i in buckets)
+            count = sum(m.count[i] for i in buckets)
+
+        ordered = sorted(values)
+        result = {"min": lo, "max": hi, "avg": total / count, "count": count}
+        for q in PERCENTILES:
+            result[f"p{q}"] = _percentile(ordered, q)
+        result["resolution"] = 0.0 if raw_covers else self.minutes.resolution
+        return result
+
+
+def extract_readings(
+    thermal: Dict[str, Any], power: Dict[str, Any]
+) -> Dict[SensorKey, float]:
+    """Pick sensor readings out of Thermal and Power resources.
+
+    Args:
+        thermal (Dict[str, Any]): Thermal resource (Temperatures, Fans)
+        power (Dict[str, Any]): Power resource (PowerControl)
+
+    Returns:
+        Dict[SensorKey, float]: (kind, sensor name) to reading
+    """
+    readings = {}
+    for i, sensor in enumerate(thermal.get("Temperatures") or []):
+        value = sensor.get("ReadingCelsius")
+        if value is not None:
+            readings[("temperature", sensor.get("Name") or f"temp{i}")] = float(value)
+    for i, fan in enumerate(thermal.get("Fans") or []):
+        value = fan.get("Reading")
+        if value is not None:
+            name = fan.get("Name") or fan.get("FanName") or f"fan{i}"
+            readings[("fan", name)] = float(value)
+    for i, control in enumerate(power.get("PowerControl") or []):
+        value = control.get("PowerConsumedWatts")
+        if value is not None:
+            readings[("power", control.get("Name") or f"control{i}")] = float(value)
+    return readings
+
+
+class TelemetryStore:
+    """Per-host sensor time series."""
+
+    def __init__(self, **series_sizes: int):
+        """Initialize the store.
+
+        Args:
+            **series_sizes (int): raw_size / minute_size per series
+        """
+        self.series_sizes = series_sizes
+        self._hosts: Dict[str, Dict[SensorKey, SensorSeries]] = {}
+        self._lock = threading.Lock()
+
+    def hosts(self) -> List[str]:
+        return list(self._hosts)
+
+    def record(
+        self,
+        host: str,
+        readings: Dict[SensorKey, float],
+        timestamp: Optional[float] = None,
+    ) -> None:
+        """Record one set of readings of a host.
+
+        Args:
+            host (str): iLO host
+            readings (Dict[SensorKey, float]): (kind, sensor name) to reading
+            timestamp (Optional[float]): Sample time, defaults to now
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            sensors = self._hosts.setdefault(host, {})
+            for key, value in readings.items():
+                series = sensors.get(key)
+                if series is None:
+                    series = sensors[key] = SensorSeries(**self.series_sizes)
+                series.add(timestamp, value)
+
+    def query(
+        self, host: str, window: float, kinds: Optional[Iterable[str]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Get windowed aggregates for every sensor of a host.
+
+        Args:
+            host (str): iLO host
+            window (float): Window length in seconds
+            kinds (Optional[Iterable[str]]): Only these sensor kinds
+
+        Returns:
+            Dict[str, Dict[str, Any]]: kind -> sensor name -> aggregates
+        """
+        now = time.time()
+        result: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for (kind, name), series in self._hosts.get(host, {}).items():
+                if kinds is None or kind in kinds:
+                    result.setdefault(kind, {})[name] = series.query(window, now)
+        return result
+
+    def render_prometheus(self) -> List[str]:
+        """Render the latest readings in Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for kind, (metric, help_text) in KINDS.items():
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} gauge")
+                for host, sensors in self._hosts.items():
+                    for (sensor_kind, name), series in sensors.items():
+                        if sensor_kind != kind or series.latest is None:
+                            continue
+                        labels = (
+                            f'host="{escape_label(host)}",sensor="{escape_label(name)}"'
+                        )
+                        lines.append(f"{metric}{{{labels}}} {series.latest}")
+        return lines
+
+
+def read_sensors(client: Any) -> Dict[SensorKey, float]:
+    """Read thermal and power sensors of one iLO.
+
+    Args:
+        client (IloRedfishClient): The client
+
+    Returns:
+        Dict[SensorKey, float]: (kind, sensor name) to reading
+    """
+    thermal = client.get_thermal_info(fields=THERMAL_FIELDS)
+    power = client.get_power_info(fields=POWER_FIELDS)
+    for data in (thermal, power):
+        if "error" in data:
+            logger.warning(f"Error sampling {client.host}: {data['error']}")
+    return extract_readings(thermal, power)
+
+
+class TelemetrySampler:
+    """Samples every iLO on a fixed interval on a daemon thread."""
+
+    def __init__(
+        self,
+        fan_out: Callable[[Callable[[Any], Any]], Iterable[Tuple[str, Any]]],
+        store: TelemetryStore,
+        interval: float = 30.0,
+    ):
+        """Initialize the sampler.
+
+        Args:
+            fan_out (Callable): Runs a function with the client of every host
+                and yields (host name, result) pairs
+            store (TelemetryStore): Where readings are recorded
+            interval (float): Seconds between samples
+        """
+        self.fan_out = fan_out
+        self.store = store
+        self.interval = interval
+        self.samples = 0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def sample_once(self) -> int:
+        """Sample every host once.
+
+        Returns:
+            int: Number of hosts with readings
+        """
+
+        def sample(client: Any) -> Tuple[str, Dict[SensorKey, float]]:
+            return client.host, read_sensors(client)
+
+        timestamp = time.time()
+        recorded = 0
+        for name, result in self.fan_out(sample):
+            if isinstance(result, dict) and "error" in result:
+                logger.warning(f"Error sampling {name}: {result['error']}")
+                continue
+            host, readings = result
+            if readings:
+                self.store.record(host, readings, timestamp)
+                recorded += 1
+        self.samples += 1
+        return recorded
+
+    def run(self) -> None:
+        """Sample until stopped."""
+        while not self._stopped.is_set():
+            try:
+                self.sample_once()
+            except Exception as e:
+                logger.warning(f"Telemetry sampling failed: {str(e)}")
+            self._stopped.wait(self.interval)
+
+    def start(self) -> None:
+        """Start the sampling thread, if it is not running yet."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(
+                    target=self.run, name="telemetry", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the sampling thread."""
+        self._stopped.set()
@@ -0,0 +1,49 @@
+from .telemetry import SensorSeries, TelemetrySampler, TelemetryStore
+
+
+def test_series_percentiles_and_downsampled_fallback():
+    series = SensorSeries(raw_size=100, minute_size=60)
+    now = 100_000.0
+    # one sample every 10s for 30 minutes, the raw ring keeps ~16 minutes
+    for n in range(180):
+        series.add(now - 1800 + n * 10, float(n % 100))
+
+    recent = series.query(300, now=now)
+    assert recent["resolution"] == 0.0
+    assert recent["count"] == 30
+    assert (recent["min"], recent["max"]) == (50.0, 79.0)
+    assert (recent["p50"], recent["p95"]) == (64.0, 78.0)
+
+    whole = series.query(1800, now=now)
+    assert whole["resolution"] == 60.0
+    assert whole["count"] == 180
+    assert (whole["min"], whole["max"]) == (0.0, 99.0)
+
+
+class FakeClient:
+    host = "10.0.0.80"
+
+    def get_thermal_info(self, fields=None):
+        return {
+            "Temperatures": [{"Name": "01-Inlet Ambient", "ReadingCelsius": 21}],
+            "Fans": [{"Name": "Fan 1", "Reading": 23}],
+        }
+
+    def get_power_info(self, fields=None):
+        return {"PowerControl": [{"PowerConsumedWatts": 142}]}
+
+
+def test_sampler_records_readings_and_exports_metrics():
+    store = TelemetryStore()
+    sampler = TelemetrySampler(
+        lambda func: [("dl380", func(FakeClient())), ("down", {"error": "timeout"})],
+        store,
+    )
+
+    assert sampler.sample_once() == 1
+    sensors = store.query("10.0.0.80", 60)
+    assert sensors["temperature"]["01-Inlet Ambient"]["avg"] == 21.0
+    assert sensors["power"]["control0"]["max"] == 142.0
+
+    metrics = store.render_prometheus()
+    assert 'ilo_fan_reading{host="10.0.0.80",sensor="Fan 1"} 23.0' in metrics
@@ -0,0 +1,182 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .prometheus import Histogram, escape_label
+
+# Upper bounds in seconds, from cached reads to slow discoveries and resets
+ACTION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+OTHER_TARGET = "other"
+
+SeriesKey = Tuple[str, str]
+
+
+class Outcome:
+    """Handed to the tracked block, which flags results that are errors."""
+
+    __slots__ = ("error",)
+
+    def __init__(self):
+        self.error = False
+
+
+class _Series:
+    __slots__ = ("latency", "errors")
+
+    def __init__(self):
+        self.latency = Histogram(ACTION_BUCKETS)
+        self.errors = 0
+
+    def merge(self, other: "_Series") -> None:
+        self.latency.merge(other.latency)
+        self.errors += other.errors
+
+
+class _Shard:
+    """Aggregates written by a single thread.
+
+    Only the owning thread writes, scrapes read and merge all shards, so
+    recording needs no lock.
+    """
+
+    __slots__ = ("series", "in_flight")
+
+    def __init__(self):
+        self.series: Dict[SeriesKey, _Series] = {}
+        self.in_flight: Dict[str, int] = {}
+
+
+class ActionMetrics:
+    """Per-action and per-target latency histograms, errors and in-flight gauges.
+
+    Every thread records into its own shard; the cost of merging is only
+    paid when the metrics are read. Targets (device or BMC addresses) beyond
+    ``max_targets`` are folded into one "other" series to bound cardinality.
+    """
+
+    def __init__(self, prefix: str, max_targets: int = 256):
+        """Initialize the metrics.
+
+        Args:
+            prefix (str): Metric name prefix, e.g. "kasa" or "ilo"
+            max_targets (int): Distinct targets tracked individually
+        """
+        self.prefix = prefix
+        self.max_targets = max_targets
+        self._targets = set()
+        self._shards: List[_Shard] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def _target(self, target: Optional[str]) -> str:
+        if not target:
+            return ""
+        if target in self._targets:
+            return target
+        if len(self._targets) >= self.max_targets:
+            return OTHER_TARGET
+        self._targets.add(target)
+        return target
+
+    @contextmanager
+    def track(self, action: str, target: Optional[str] = None) -> Iterator[Outcome]:
+        """Time a block as one execution of an action.
+
+        The block counts as an error when it raises or sets
+        ``outcome.error``. It must finish on the thread it started on (true
+        for synchronous code and for coroutines on one event loop).
+
+        Args:
+            action (str): Action name
+            target (Optional[str]): Device or host the action ran against
+
+        Yields:
+            Outcome: Set ``error`` to True for error results
+        """
+        shard = self._shard()
+        shard.in_flight[action] = shard.in_flight.get(action, 0) + 1
+        outcome = Outcome()
+        start = time.perf_counter()
+        try:
+            yield outcome
+        except BaseException:
+            outcome.error = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            shard.in_flight[action] -= 1
+            key = (action, self._target(target))
+            series = shard.series.get(key)
+            if series is None:
+                series = shard.series[key] = _Series()
+            series.latency.observe(elapsed)
+            series.errors += outcome.error
+
+    def _merged(self) -> Tuple[Dict[SeriesKey, _Series], Dict[str, int]]:
+        with self._lock:
+            shards = list(self._shards)
+        series: Dict[SeriesKey, _Series] = {}
+        in_flight: Dict[str, int] = {}
+        for shard in shards:
+            for key, values in list(shard.series.items()):
+                total = series.get(key)
+                if total is None:
+                    total = series[key] = _Series()
+                total.merge(values)
+            for action, count in list(shard.in_flight.items()):
+                in_flight[action] = in_flight.get(action, 0) + count
+        return series, in_flight
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Get count, errors, average and bucketed p50/p95 per action."""
+        series, in_flight = self._merged()
+        actions = {action: _Series() for action in in_flight}
+        for (action, _), values in series.items():
+            actions.setdefault(action, _Series()).merge(values)
+        return {
+            action: {
+                "count": values.latency.count,
+                "errors": values.errors,
+                "avg": (
+                    values.latency.sum / values.latency.count
+                    if values.latency.count
+                    else None
+                ),
+                "p50_le": values.latency.quantile(0.5),
+                "p95_le": values.latency.quantile(0.95),
+                "in_flight": in_flight.get(action, 0),
+            }
+            for action, values in actions.items()
+        }
+
+    def render_prometheus(self) -> List[str]:
+        """Render the metrics in Prometheus text exposition format."""
+        series, in_flight = self._merged()
+        duration = f"{self.prefix}_action_duration_seconds"
+        errors = f"{self.prefix}_action_errors_total"
+        gauge = f"{self.prefix}_actions_in_flight"
+        lines = [
+            f"# HELP {duration} Action latency by action and target.",
+            f"# TYPE {duration} histogram",
+        ]
+        items = sorted(series.items())
+        for (action, target), values in items:
+            labels = f'action="{action}",target="{escape_label(target)}"'
+            lines += values.latency.render(duration, labels)
+        lines += [f"# HELP {errors} Failed actions.", f"# TYPE {errors} counter"]
+        for (action, target), values in items:
+            labels = f'action="{action}",target="{escape_label(target)}"'
+            lines.append(f"{errors}{{{labels}}} {values.errors}")
+        lines += [f"# HELP {gauge} Actions running now.", f"# TYPE {gauge} gauge"]
+        for action, count in sorted(in_flight.items()):
+            lines.append(f'{gauge}{{action="{action}"}} {count}')
+        return lines
@@ -0,0 +1,145 @@
+"""Latency and throughput benchmarks against the local Kasa simulator.
+
+Skipped unless KASA_BENCH=1, e.g.:
+
+    KASA_BENCH=1 KASA_BENCH_DEVICES=1,10,100,500 pytest bench_test.py
+
+Results are written as JSON to KASA_BENCH_OUTPUT (default
+bench_results.json). When KASA_BENCH_BASELINE points to a previous result
+file, a run fails if single-command p50 or batch throughput regressed by
+more than KASA_BENCH_TOLERANCE (default 0.5, i.e. 50%).
+"""
+
+import json
+import os
+import platform
+import statistics
+import time
+import types
+from importlib import metadata
+
+import pytest
+
+from . import handler
+from .device_registry import DeviceRegistry
+from .poller import StateTable
+from .runtime import BackgroundLoop
+from .simulator import KasaSimulator
+
+pytestmark = pytest.mark.skipif(
+    os.environ.get("KASA_BENCH") != "1", reason="set KASA_BENCH=1 to run benchmarks"
+)
+
+DEVICE_COUNTS = [
+    int(n) for n in os.environ.get("KASA_BENCH_DEVICES", "1,10,100,500").split(",")
+]
+ITERATIONS = int(os.environ.get("KASA_BENCH_ITERATIONS", 50))
+OUTPUT = os.environ.get("KASA_BENCH_OUTPUT", "bench_results.json")
+BASELINE = os.environ.get("KASA_BENCH_BASELINE")
+TOLERANCE = float(os.environ.get("KASA_BENCH_TOLERANCE", 0.5))
+
+results = []
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def call(request):
+    return json.loads(
+        handler.handle(types.SimpleNamespace(body=json.dumps(request)), None)
+    )
+
+
+@pytest.fixture(scope="module")
+def network():
+    loop = BackgroundLoop(name="kasa-simulator")
+    loop.start()
+    yield loop
+    loop.stop()
+
+    report = {
+        "python": platform.python_version(),
+        "python_kasa": metadata.version("python-kasa"),
+        "timestamp": time.time(),
+        "iterations": ITERATIONS,
+        "results": results,
+    }
+    with open(OUTPUT, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+@pytest.mark.parametrize("count", DEVICE_COUNTS)
+def test_bench(network, count):
+    simulator = KasaSimulator(count, first_host="127.0.4.1", hub="127.0.0.4")
+    network.submit(simulator.start())
+    try:
+        manager = handler.KasaDeviceManager(
+            discovery_timeout=1,
+            registry=DeviceRegistry(max_size=max(count, 1)),
+            states=StateTable(),
+            discovery_target=simulator.hub,
+        )
+        request_handler = handler.RequestHandler(
+            manager, groups={"all": simulator.hosts}
+        )
+        handler._request_handler = request_handler
+
+        discovery_cold, listed = timed(call, {"action": "discover"})
+        assert len(listed["devices"]) == count
+        discovery_cached, _ = timed(call, {"action": "discover"})
+
+        target = simulator.hosts[0]
+        via_handle = []
+        via_process_request = []
+        for i in range(ITERATIONS):
+            request = {
+                "action": "set_device_state",
+                "ip_address": target,
+                "power_state": i % 2 == 0,
+            }
+            elapsed, result = timed(call, request)
+            assert result["success"]
+            via_handle.append(elapsed)
+            elapsed, result = timed(
+                handler.runtime.submit, request_handler.process_request(request)
+            )
+            via_process_request.append(elapsed)
+
+        batch_time, batch = timed(
+            call, {"action": "batch_device_state", "group": "all", "power_state": True}
+        )
+        assert batch["success"], batch["failed"]
+    finally:
+        network.submit(simulator.stop())
+        handler._request_handler = None
+
+    result = {
+        "devices": count,
+        "discovery_cold_s": discovery_cold,
+        "discovery_cached_s": discovery_cached,
+        "command_p50_ms": statistics.median(via_handle) * 1000,
+        "command_p95_ms": percentile(via_handle, 0.95) * 1000,
+        "process_request_p50_ms": statistics.median(via_process_request) * 1000,
+        "batch_s": batch_time,
+        "batch_devices_per_s": count / batch_time,
+    }
+    results.append(result)
+
+    if BASELINE:
+        with open(BASELINE) as f:
+            baseline = {r["devices"]: r for r in json.load(f)["results"]}
+        previous = baseline.get(count)
+        if previous:
+            limit = 1 + TOLERANCE
+            assert result["command_p50_ms"] <= previous["command_p50_ms"] * limit
+            assert (
+                result["batch_devices_per_s"] * limit >= previous["batch_devices_per_s"]
+            )
@@ -0,0 +1,171 @@
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+
+@dataclass
+class RegistryEntry:
+    """A known device handle and its last-known state."""
+
+    device: Any
+    is_on: Optional[bool] = None
+    updated_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    connected: bool = True
+
+
+class DeviceRegistry:
+    """In-process registry of discovered Kasa devices.
+
+    Maps IP address to device handle so that commands to known devices can
+    talk to the host directly instead of running a discovery first. Entries
+    expire after ``ttl`` seconds and the least recently used entry is evicted
+    once ``max_size`` is reached.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_size: int = 256):
+        """Initialize the registry.
+
+        Args:
+            ttl (float): Seconds an entry stays valid after it was last refreshed
+            max_size (int): Maximum number of devices kept in the registry
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, RegistryEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> "DeviceRegistry":
+        """Build a registry configured from environment variables."""
+        return cls(
+            ttl=float(os.environ.get("KASA_REGISTRY_TTL", 300)),
+            max_size=int(os.environ.get("KASA_REGISTRY_SIZE", 256)),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, ip_address: str) -> bool:
+        return ip_address in self._entries
+
+    def get(self, ip_address: str) -> Optional[RegistryEntry]:
+        """Look up a device, counting the hit or miss.
+
+        Args:
+            ip_address (str): The IP address of the device
+
+        Returns:
+            Optional[RegistryEntry]: The entry, or None if unknown or expired
+        """
+        entry = self._entries.get(ip_address)
+        now = time.monotonic()
+        if entry is None or now - entry.updated_at > self.ttl:
+            if entry is not None:
+                del self._entries[ip_address]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(ip_address)
+        entry.last_used = now
+        entry.connected = True
+        self.hits += 1
+        return entry
+
+    def peek(self, ip_address: str) -> Optional[RegistryEntry]:
+        """Look up a device without counting it or marking it as used.
+
+        Args:
+            ip_address (str): The IP address of the device
+
+        Returns:
+            Optional[RegistryEntry]: The entry, or None if unknown or expired
+        """
+        entry = self._entries.get(ip_address)
+        if entry is None or time.monotonic() - entry.updated_at > self.ttl:
+            return None
+        return entry
+
+    def put(self, ip_address: str, device: Any) -> RegistryEntry:
+        """Register or refresh a device handle.
+
+        Args:
+            ip_address (str): The IP address of the device
+            device (Any): The device handle
+
+        Returns:
+            RegistryEntry: The stored entry
+        """
+        entry = self._entries.get(ip_address)
+        if entry is None or entry.device is not device:
+            entry = RegistryEntry(device=device)
+            self._entries[ip_address] = entry
+        else:
+            entry.updated_at = entry.last_used = time.monotonic()
+            entry.connected = True
+        entry.is_on = getattr(device, "is_on", entry.is_on)
+        self._entries.move_to_end(ip_address)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def update_state(self, ip_address: str, is_on: bool) -> None:
+        """Record the last-known power state of a registered device."""
+        entry = self._entries.get(ip_address)
+        if entry is not None:
+            entry.is_on = is_on
+            entry.updated_at = time.monotonic()
+
+    def items(self) -> List[Tuple[str, RegistryEntry]]:
+        """Get all (ip, entry) pairs without counting lookups."""
+        return list(self._entries.items())
+
+    def idle(self, max_idle: float) -> List[Tuple[str, RegistryEntry]]:
+        """Get connected entries that have not been used for ``max_idle`` seconds.
+
+        Args:
+            max_idle (float): Idle time in seconds
+
+        Returns:
+            List[Tuple[str, RegistryEntry]]: Idle (ip, entry) pairs
+        """
+        cutoff = time.monotonic() - max_idle
+        return [
+            (ip, entry)
+            for ip, entry in self._entries.items()
+            if entry.connected and entry.last_used < cutoff
+        ]
+
+    def invalidate(self, ip_address: str) -> None:
+        """Drop a device, e.g. after a command to it failed."""
+        if self._entries.pop(ip_address, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop all registered devices."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get registry counters.
+
+        Returns:
+            Dict[str, Any]: Size, hit/miss/eviction counters and hit ratio
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
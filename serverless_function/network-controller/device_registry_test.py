@@ -0,0 +1,49 @@
+import time
+
+from .device_registry import DeviceRegistry
+
+
+class FakeDevice:
+    def __init__(self, is_on=False):
+        self.is_on = is_on
+
+
+def test_entries_expire_after_ttl():
+    registry = DeviceRegistry(ttl=0.05)
+    registry.put("10.0.0.1", FakeDevice())
+
+    assert registry.get("10.0.0.1") is not None
+    time.sleep(0.06)
+    assert registry.peek("10.0.0.1") is None
+    assert registry.get("10.0.0.1") is None
+    assert "10.0.0.1" not in registry
+    assert registry.stats()["hits"] == registry.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    registry = DeviceRegistry(max_size=2)
+    registry.put("10.0.0.1", FakeDevice())
+    registry.put("10.0.0.2", FakeDevice())
+    registry.get("10.0.0.1")
+    registry.put("10.0.0.3", FakeDevice())
+
+    assert [ip for ip, _ in registry.items()] == ["10.0.0.1", "10.0.0.3"]
+    assert registry.stats()["evictions"] == 1
+
+
+def test_put_keeps_entry_of_same_handle_and_tracks_state():
+    registry = DeviceRegistry()
+    device = FakeDevice(is_on=True)
+    entry = registry.put("10.0.0.1", device)
+    registry.update_state("10.0.0.1", False)
+
+    assert registry.put("10.0.0.1", device) is entry
+    assert entry.is_on is True
+    registry.update_state("10.0.0.1", False)
+    assert registry.peek("10.0.0.1").is_on is False
+    assert registry.put("10.0.0.1", FakeDevice()) is not entry
+
+    registry.invalidate("10.0.0.1")
+    registry.invalidate("10.0.0.1")
+    assert len(registry) == 0
+    assert registry.stats()["invalidations"] == 1
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Optional,
+    Tuple,
+)
+
+logger = logging.getLogger("smart-device-controller")
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into a single execution.
+
+    While a call for a key is in flight, further callers for that key await
+    the same result instead of starting their own. The call runs in its own
+    task, so cancelling one caller does not cancel it for the others. Completed results are
+    kept for ``ttl`` seconds so that repeated identical queries are served
+    without running the call again.
+    """
+
+    def __init__(self, ttl: float = 0.0):
+        """Initialize the coalescer.
+
+        Args:
+            ttl (float): Seconds a completed result is reused, 0 to disable
+        """
+        self.ttl = ttl
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``func`` for ``key`` unless a call or fresh result already exists.
+
+        Args:
+            key (Hashable): Identifies identical calls
+            func (Callable[[], Awaitable[Any]]): Creates the coroutine to run
+
+        Returns:
+            Any: The (possibly shared) result
+
+        Raises:
+            Exception: Whatever ``func`` raised, propagated to every waiter
+        """
+        cached = self._results.get(key)
+        if cached is not None:
+            if time.monotonic() - cached[0] <= self.ttl:
+                self.cache_hits += 1
+                return cached[1]
+            del self._results[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self._run(key, func))
+            # Mark retrieved so an error after every caller gave up is not logged
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+            self.calls += 1
+        # A caller that is cancelled (e.g. by its own timeout) only stops
+        # waiting, the shared call keeps running for the others
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            result = await func()
+        finally:
+            del self._inflight[key]
+        if self.ttl > 0:
+            self._results[key] = (time.monotonic(), result)
+        return result
+
+    def forget(self, key: Hashable) -> None:
+        """Drop the cached result for ``key``."""
+        self._results.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get coalescing counters.
+
+        Returns:
+            Dict[str, Any]: Executed, coalesced and cached call counts
+        """
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "cache_hits": self.cache_hits,
+            "cache_ttl": self.ttl,
+        }
+
+
+def scapy_arp_scan(
+    subnet: str, timeout: float = 2.0, interface: Optional[str] = None
+) -> Dict[str, str]:
+    """ARP-sweep a subnet with scapy (blocking, needs NET_ADMIN/NET_RAW).
+
+    Args:
+        subnet (str): Subnet in CIDR notation, e.g. 192.168.1.0/24
+        timeout (float): Seconds to wait for ARP replies
+        interface (Optional[str]): Interface to send on, scapy's default if None
+
+    Returns:
+        Dict[str, str]: MAC address -> IP address of every host that answered
+    """
+    from scapy.all import ARP, Ether, srp
+
+    answered, _ = srp(
+        Ether(dst="ff:ff:ff:ff:ff:ff") / ARP(pdst=subnet),
+        timeout=timeout,
+        iface=interface,
+        verbose=False,
+    )
+    return {reply.hwsrc.lower(): reply.psrc for _, reply in answered}
+
+
+class ArpSweepDiscovery:
+    """Discovers devices by ARP-sweeping a subnet and probing live hosts only.
+
+    Keeps a MAC -> IP index between sweeps: hosts whose address did not
+    change keep their previous probe result, only new or moved hosts (and
+    hosts whose probe failed or timed out) are probed again. Probes run in
+    parallel and results are yielded as they arrive.
+    """
+
+    def __init__(
+        self,
+        probe: Callable[[str], Awaitable[Any]],
+        arp_scan: Callable[[str], Dict[str, str]] = scapy_arp_scan,
+        concurrency: int = 64,
+        probe_timeout: float = 2.0,
+    ):
+        """Initialize the sweeper.
+
+        Args:
+            probe (Callable[[str], Awaitable[Any]]): Returns the device at an IP
+                address, or None if it is not a Kasa device
+            arp_scan (Callable[[str], Dict[str, str]]): Blocking subnet sweep
+                returning MAC -> IP
+            concurrency (int): Maximum number of probes in flight
+            probe_timeout (float): Timeout per probe in seconds
+        """
+        self.probe = probe
+        self.arp_scan = arp_scan
+        self.concurrency = concurrency
+        self.probe_timeout = probe_timeout
+        self.index: Dict[str, str] = {}
+        self.devices: Dict[str, Any] = {}
+        self.probes = 0
+
+    async def _probe(self, mac: str, ip_address: str) -> Tuple[str, Optional[Any]]:
+        self.probes += 1
+        try:
+            device = await asyncio.wait_for(self.probe(ip_address), self.probe_timeout)
+        except Exception as e:
+            # Not indexed, so the host is probed again on the next sweep
+            logger.debug(f"Probe of {ip_address} failed: {str(e)}")
+            return ip_address, None
+        # Recorded here rather than by the consumer so that probes finishing
+        # after the consumer stopped iterating are not lost
+        self.index[mac] = ip_address
+        if device is not None:
+            self.devices[ip_address] = device
+        return ip_address, device
+
+    async def sweep(
+        self, subnet: str, full: bool = False
+    ) -> AsyncIterator[Tuple[str, Any, bool]]:
+        """Sweep a subnet and yield the Kasa devices on it.
+
+        Args:
+            subnet (str): Subnet in CIDR notation
+            full (bool): Re-probe every live host, not only changed ones
+
+        Yields:
+            Tuple[str, Any, bool]: (ip, device, probed) - probed is False for
+                devices reused from the previous sweep
+        """
+        loop = asyncio.get_running_loop()
+        live = await loop.run_in_executor(None, self.arp_scan, subnet)
+
+        live_ips = set(live.values())
+        for ip_address in [ip for ip in self.devices if ip not in live_ips]:
+            del self.devices[ip_address]
+
+        # Hosts only enter the index once a probe gave a clear answer
+        index, to_probe, reused = {}, [], []
+        for mac, ip_address in live.items():
+            if full or self.index.get(mac) != ip_address:
+                self.devices.pop(ip_address, None)
+                to_probe.append((mac, ip_address))
+            else:
+                index[mac] = ip_address
+                if ip_address in self.devices:
+                    reused.append(ip_address)
+        self.index = index
+        for ip_address in reused:
+            yield ip_address, self.devices[ip_address], False
+
+        semaphore = asyncio.Semaphore(max(self.concurrency, 1))
+
+        async def bounded_probe(mac: str, ip_address: str) -> Tuple[str, Optional[Any]]:
+            async with semaphore:
+                return await self._probe(mac, ip_address)
+
+        probes = [bounded_probe(mac, ip) for mac, ip in to_probe]
+        for next_result in asyncio.as_completed(probes):
+            ip_address, device = await next_result
+            if device is not None:
+                yield ip_address, device, True
@@ -0,0 +1,159 @@
+import asyncio
+import time
+
+from .discovery import ArpSweepDiscovery, SingleFlight
+
+
+class FakeResponder:
+    """Stands in for a LAN: answers ARP sweeps and Kasa probes from a table."""
+
+    def __init__(self, hosts):
+        # mac -> (ip, is_kasa, probe delay in seconds)
+        self.hosts = dict(hosts)
+        self.probed = []
+
+    def arp_scan(self, subnet):
+        return {mac: ip for mac, (ip, _, _) in self.hosts.items()}
+
+    async def probe(self, ip_address):
+        self.probed.append(ip_address)
+        for ip, is_kasa, delay in self.hosts.values():
+            if ip == ip_address:
+                await asyncio.sleep(delay)
+                return {"host": ip} if is_kasa else None
+        return None
+
+
+def collect(sweeper, subnet="10.0.0.0/24", full=False):
+    async def run():
+        return [item async for item in sweeper.sweep(subnet, full=full)]
+
+    return asyncio.run(run())
+
+
+def test_sweep_streams_devices_as_probes_complete():
+    lan = FakeResponder(
+        {
+            "aa:00": ("10.0.0.2", True, 0.2),
+            "aa:01": ("10.0.0.3", True, 0.01),
+            "aa:02": ("10.0.0.4", False, 0.01),
+        }
+    )
+    sweeper = ArpSweepDiscovery(lan.probe, arp_scan=lan.arp_scan)
+
+    async def first_result():
+        start = time.monotonic()
+        async for ip_address, _, probed in sweeper.sweep("10.0.0.0/24"):
+            return ip_address, probed, time.monotonic() - start
+
+    ip_address, probed, elapsed = asyncio.run(first_result())
+    assert (ip_address, probed) == ("10.0.0.3", True)
+    assert elapsed < 0.2
+
+
+def test_rescan_only_probes_changed_hosts():
+    lan = FakeResponder(
+        {
+            "aa:00": ("10.0.0.2", True, 0),
+            "aa:01": ("10.0.0.3", True, 0),
+            "aa:02": ("10.0.0.4", False, 0),
+        }
+    )
+    sweeper = ArpSweepDiscovery(lan.probe, arp_scan=lan.arp_scan)
+    assert {ip for ip, _, _ in collect(sweeper)} == {"10.0.0.2", "10.0.0.3"}
+
+    lan.probed.clear()
+    lan.hosts["aa:01"] = ("10.0.0.9", True, 0)
+    del lan.hosts["aa:00"]
+    results = {ip: probed for ip, _, probed in collect(sweeper)}
+
+    assert lan.probed == ["10.0.0.9"]
+    assert results == {"10.0.0.9": True}
+    assert sweeper.devices.keys() == {"10.0.0.9"}
+
+    lan.probed.clear()
+    collect(sweeper, full=True)
+    assert sorted(lan.probed) == ["10.0.0.4", "10.0.0.9"]
+
+
+def test_failed_probes_are_retried_on_next_sweep():
+    lan = FakeResponder(
+        {"aa:00": ("10.0.0.2", True, 0.5), "aa:01": ("10.0.0.3", False, 0)}
+    )
+    sweeper = ArpSweepDiscovery(lan.probe, arp_scan=lan.arp_scan, probe_timeout=0.05)
+    assert collect(sweeper) == []
+
+    # The busy plug answers now, the host that is not a plug is not re-probed
+    lan.probed.clear()
+    lan.hosts["aa:00"] = ("10.0.0.2", True, 0)
+    assert [(ip, probed) for ip, _, probed in collect(sweeper)] == [("10.0.0.2", True)]
+    assert lan.probed == ["10.0.0.2"]
+
+
+def test_single_flight_shares_inflight_call():
+    calls = []
+
+    async def discover():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"10.0.0.2": "device"}
+
+    async def run():
+        flight = SingleFlight(ttl=10)
+        results = await asyncio.gather(*(flight.do(None, discover) for _ in range(5)))
+        cached = await flight.do(None, discover)
+        return results, cached, flight.stats()
+
+    results, cached, stats = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(r == {"10.0.0.2": "device"} for r in results + [cached])
+    assert stats["coalesced"] == 4
+    assert stats["cache_hits"] == 1
+
+
+def test_single_flight_propagates_errors_without_caching_them():
+    calls = []
+
+    async def discover():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise OSError("network unreachable")
+        return {}
+
+    async def run():
+        flight = SingleFlight(ttl=10)
+        first = await asyncio.gather(
+            *(flight.do(None, discover) for _ in range(3)), return_exceptions=True
+        )
+        second = await flight.do(None, discover)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert [type(e) for e in first] == [OSError] * 3
+    assert second == {}
+    assert len(calls) == 2
+
+
+def test_single_flight_survives_cancelled_leader():
+    calls = []
+
+    async def discover():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"10.0.0.2": "device"}
+
+    async def run():
+        flight = SingleFlight()
+        leader = asyncio.ensure_future(
+            asyncio.wait_for(flight.do(None, discover), 0.01)
+        )
+        await asyncio.sleep(0.001)
+        assert flight.stats()["calls"] == 1
+        follower = await flight.do(None, discover)
+        return leader, follower
+
+    leader, follower = asyncio.run(run())
+    assert isinstance(leader.exception(), asyncio.TimeoutError)
+    assert follower == {"10.0.0.2": "device"}
+    assert len(calls) == 1
@@ -0,0 +1,333 @@
+import asyncio
+import logging
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .prometheus import escape_label
+from .snapshot import emeter_values, read_emeter
+
+logger = logging.getLogger("smart-device-controller")
+
+METRICS = ("power", "voltage")
+
+
+class SeriesTier:
+    """Fixed-size ring buffer of aggregated buckets for one metric.
+
+    Each bucket holds its start time, min, max, sum and count in preallocated
+    arrays, so memory does not grow with uptime. With ``resolution`` 0 every
+    sample is its own bucket (raw tier); otherwise samples are folded into
+    buckets ``resolution`` seconds wide.
+    """
+
+    __slots__ = (
+        "resolution",
+        "capacity",
+        "start",
+        "min",
+        "max",
+        "sum",
+        "count",
+        "_head",
+        "_size",
+    )
+
+    def __init__(self, capacity: int, resolution: float = 0.0):
+        """Initialize the tier.
+
+        Args:
+            capacity (int): Number of buckets kept
+            resolution (float): Bucket width in seconds, 0 for raw samples
+        """
+        self.resolution = resolution
+        self.capacity = capacity
+        self.start = array("d", bytes(8 * capacity))
+        self.min = array("d", bytes(8 * capacity))
+        self.max = array("d", bytes(8 * capacity))
+        self.sum = array("d", bytes(8 * capacity))
+        self.count = array("l", bytes(array("l").itemsize * capacity))
+        self._head = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, timestamp: float, value: float) -> None:
+        """Add a sample, opening a new bucket when needed."""
+        if self.resolution:
+            bucket_start = timestamp - timestamp % self.resolution
+            last = (self._head - 1) % self.capacity
+            if self._size and self.start[last] == bucket_start:
+                self.min[last] = min(self.min[last], value)
+                self.max[last] = max(self.max[last], value)
+                self.sum[last] += value
+                self.count[last] += 1
+                return
+        else:
+            bucket_start = timestamp
+
+        i = self._head
+        self.start[i] = bucket_start
+        self.min[i] = self.max[i] = self.sum[i] = value
+        self.count[i] = 1
+        self._head = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def _indices(self) -> Iterable[int]:
+        """Bucket indices from oldest to newest."""
+        first = (self._head - self._size) % self.capacity
+        return ((first + n) % self.capacity for n in range(self._size))
+
+    @property
+    def oldest(self) -> Optional[float]:
+        """Start time of the oldest bucket."""
+        if not self._size:
+            return None
+        return self.start[(self._head - self._size) % self.capacity]
+
+    @property
+    def latest(self) -> Optional[float]:
+        """Last value added (the mean of the newest bucket)."""
+        if not self._size:
+            return None
+        i = (self._head - 1) % self.capacity
+        return self.sum[i] / self.count[i]
+
+    def aggregate(self, since: float) -> Optional[Dict[str, float]]:
+        """Aggregate buckets starting at or after ``since``.
+
+        Returns:
+            Optional[Dict[str, float]]: min/max/avg/count, None if no data
+        """
+        lo = hi = None
+        total = 0.0
+        count = 0
+        for i in self._indices():
+            if self.start[i] + self.resolution < since:
+                continue
+            lo = self.min[i] if lo is None else min(lo, self.min[i])
+            hi = self.max[i] if hi is None else max(hi, self.max[i])
+            total += self.sum[i]
+            count += self.count[i]
+        if not count:
+            return None
+        return {"min": lo, "max": hi, "avg": total / count, "count": count}
+
+
+class MetricSeries:
+    """A metric kept at raw, 1-minute and 1-hour resolution."""
+
+    def __init__(
+        self, raw_size: int = 720, minute_size: int = 1440, hour_size: int = 720
+    ):
+        self.tiers = (
+            SeriesTier(raw_size),
+            SeriesTier(minute_size, 60.0),
+            SeriesTier(hour_size, 3600.0),
+        )
+
+    def add(self, timestamp: float, value: float) -> None:
+        for tier in self.tiers:
+            tier.add(timestamp, value)
+
+    @property
+    def latest(self) -> Optional[float]:
+        return self.tiers[0].latest
+
+    def query(self, window: float, now: Optional[float] = None) -> Dict[str, Any]:
+        """Get min/max/avg over the last ``window`` seconds.
+
+        Uses the finest tier that still covers the whole window.
+
+        Args:
+            window (float): Window length in seconds
+            now (Optional[float]): End of the window, defaults to the current time
+
+        Returns:
+            Dict[str, Any]: Aggregates and the resolution they were computed at
+        """
+        now = time.time() if now is None else now
+        since = now - window
+        tier = self.tiers[-1]
+        for candidate in self.tiers:
+            oldest = candidate.oldest
+            if oldest is None:
+                continue
+            full = len(candidate) == candidate.capacity
+            if not full or oldest <= since:
+                tier = candidate
+                break
+        result = tier.aggregate(since) or {
+            "min": None,
+            "max": None,
+            "avg": None,
+            "count": 0,
+        }
+        result["resolution"] = tier.resolution
+        return result
+
+
+class EmeterStore:
+    """Bounded per-device emeter time series.
+
+    Samples are recorded on the event loop while ``/metrics`` renders on the
+    request thread, so every access holds a lock.
+    """
+
+    def __init__(self, max_devices: int = 64, **series_sizes: int):
+        """Initialize the store.
+
+        Args:
+            max_devices (int): Devices kept; the least recently sampled is dropped
+            **series_sizes (int): raw_size / minute_size / hour_size per series
+        """
+        self.max_devices = max_devices
+        self.series_sizes = series_sizes
+        self._devices: "OrderedDict[str, Dict[str, MetricSeries]]" = OrderedDict()
+        self._labels: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, ip_address: str) -> bool:
+        with self._lock:
+            return ip_address in self._devices
+
+    def devices(self) -> List[str]:
+        with self._lock:
+            return list(self._devices)
+
+    def record(
+        self,
+        ip_address: str,
+        values: Dict[str, float],
+        timestamp: Optional[float] = None,
+        labels: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Record one emeter reading of a device.
+
+        Args:
+            ip_address (str): The IP address of the device
+            values (Dict[str, float]): Metric values, e.g. power and voltage
+            timestamp (Optional[float]): Sample time, defaults to now
+            labels (Optional[Dict[str, str]]): Extra labels for the exposition
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            series = self._devices.get(ip_address)
+            if series is None:
+                series = {m: MetricSeries(**self.series_sizes) for m in METRICS}
+                self._devices[ip_address] = series
+                while len(self._devices) > self.max_devices:
+                    dropped, _ = self._devices.popitem(last=False)
+                    self._labels.pop(dropped, None)
+            else:
+                self._devices.move_to_end(ip_address)
+            if labels:
+                self._labels[ip_address] = labels
+
+            for metric in METRICS:
+                value = values.get(metric)
+                if value is not None:
+                    series[metric].add(timestamp, float(value))
+
+    def query(self, ip_address: str, metric: str, window: float) -> Dict[str, Any]:
+        """Get windowed aggregates for one device metric.
+
+        Raises:
+            KeyError: If the device or metric has no series
+        """
+        with self._lock:
+            return self._devices[ip_address][metric].query(window)
+
+    def render_prometheus(self) -> List[str]:
+        """Render the latest readings in Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for metric, unit in (("power", "watts"), ("voltage", "volts")):
+                name = f"kasa_emeter_{metric}_{unit}"
+                lines.append(f"# HELP {name} Latest emeter {metric} reading.")
+                lines.append(f"# TYPE {name} gauge")
+                for ip_address, series in self._devices.items():
+                    value = series[metric].latest
+                    if value is None:
+                        continue
+                    labels = {"ip": ip_address, **self._labels.get(ip_address, {})}
+                    label_text = ",".join(
+                        f'{k}="{escape_label(v)}"' for k, v in labels.items()
+                    )
+                    lines.append(f"{name}{{{label_text}}} {value}")
+        return lines
+
+
+async def read_realtime(device: Any) -> Optional[Dict[str, float]]:
+    """Query the realtime emeter values of a device.
+
+    Args:
+        device (Any): A Kasa device handle
+
+    Returns:
+        Optional[Dict[str, float]]: Emeter values, or None if the device has no emeter
+    """
+    if not getattr(device, "has_emeter", False):
+        return None
+    get_realtime = getattr(device, "get_emeter_realtime", None)
+    if get_realtime is not None:
+        return emeter_values(await get_realtime())
+    await device.update()
+    return read_emeter(device)
+
+
+class EmeterSampler:
+    """Samples emeter-capable devices on a fixed interval."""
+
+    def __init__(
+        self,
+        devices: Callable[[], List[Tuple[str, Any]]],
+        store: EmeterStore,
+        interval: float = 10.0,
+        timeout: float = 5.0,
+    ):
+        """Initialize the sampler.
+
+        Args:
+            devices (Callable[[], List[Tuple[str, Any]]]): Returns the (ip, device) pairs to sample
+            store (EmeterStore): Where readings are recorded
+            interval (float): Seconds between samples
+            timeout (float): Timeout per device read in seconds
+        """
+        self.devices = devices
+        self.store = store
+        self.interval = interval
+        self.timeout = timeout
+
+    async def sample_once(self) -> int:
+        """Read every emeter-capable device once.
+
+        Returns:
+            int: Number of readings recorded
+        """
+
+        async def sample(ip_address: str, device: Any) -> bool:
+            try:
+                values = await asyncio.wait_for(read_realtime(device), self.timeout)
+            except Exception as e:
+                logger.warning(f"Error reading emeter of {ip_address}: {str(e)}")
+                return False
+            if not values:
+                return False
+            alias = getattr(device, "alias", None)
+            self.store.record(
+                ip_address, values, labels={"alias": alias} if alias else None
+            )
+            return True
+
+        results = await asyncio.gather(*(sample(ip, dev) for ip, dev in self.devices()))
+        return sum(results)
+
+    async def run(self) -> None:
+        """Sample forever."""
+        while True:
+            await self.sample_once()
+            await asyncio.sleep(self.interval)
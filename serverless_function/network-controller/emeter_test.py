@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+from .emeter import EmeterSampler, EmeterStore, MetricSeries, SeriesTier
+
+
+def test_tier_folds_samples_into_buckets_and_wraps():
+    tier = SeriesTier(capacity=2, resolution=60)
+    for timestamp, value in ((0, 1.0), (30, 3.0), (60, 5.0), (125, 7.0)):
+        tier.add(timestamp, value)
+
+    assert len(tier) == 2
+    assert tier.oldest == 60
+    assert tier.latest == 7.0
+    assert tier.aggregate(0) == {"min": 5.0, "max": 7.0, "avg": 6.0, "count": 2}
+
+
+def test_query_uses_finest_tier_covering_window():
+    series = MetricSeries(raw_size=10, minute_size=10, hour_size=10)
+    for second in range(0, 600, 10):
+        series.add(second, float(second))
+
+    recent = series.query(50, now=600)
+    older = series.query(500, now=600)
+
+    assert recent["resolution"] == 0 and recent["count"] == 5
+    assert older["resolution"] == 60 and older["min"] == 60.0
+
+
+def test_store_drops_least_recently_sampled_device():
+    store = EmeterStore(max_devices=2, raw_size=4, minute_size=4, hour_size=4)
+    store.record("10.0.0.1", {"power": 1.0}, labels={"alias": 'lamp "A"'})
+    store.record("10.0.0.2", {"power": 2.0})
+    store.record("10.0.0.1", {"power": 3.0})
+    store.record("10.0.0.3", {"power": 4.0})
+
+    assert store.devices() == ["10.0.0.1", "10.0.0.3"]
+    lines = store.render_prometheus()
+    assert 'kasa_emeter_power_watts{ip="10.0.0.1",alias="lamp \\"A\\""} 3.0' in lines
+
+
+def test_sampler_skips_failing_and_plain_devices():
+    class Plug:
+        has_emeter = True
+
+        def __init__(self, power):
+            self.power = power
+
+        async def get_emeter_realtime(self):
+            if self.power is None:
+                raise OSError("unreachable")
+            return {"power": self.power, "voltage": 230.0}
+
+    class Switch:
+        has_emeter = False
+
+    store = EmeterStore()
+    sampler = EmeterSampler(
+        lambda: [
+            ("10.0.0.1", Plug(5.0)),
+            ("10.0.0.2", Plug(None)),
+            ("10.0.0.3", Switch()),
+        ],
+        store,
+    )
+
+    assert asyncio.run(sampler.sample_once()) == 1
+    assert store.devices() == ["10.0.0.1"]
+
+
+def test_store_renders_while_another_thread_records():
+    store = EmeterStore(max_devices=8)
+    errors = []
+
+    def record():
+        for i in range(5000):
+            store.record(f"10.0.0.{i % 32}", {"power": float(i)}, timestamp=i)
+
+    writer = threading.Thread(target=record)
+    writer.start()
+    try:
+        while writer.is_alive():
+            store.render_prometheus()
+    except RuntimeError as e:
+        errors.append(e)
+    writer.join()
+
+    assert errors == []
+    assert len(store.devices()) == 8
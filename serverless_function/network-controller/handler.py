@@ -1,16 +1,76 @@
 import json
 import logging
 import asyncio
+import inspect
+import os
+import threading
 from dataclasses import dataclass
-from typing import Dict, List, Tuple, Any, Optional, Union
+from typing import TYPE_CHECKING, Dict, List, Tuple, Any, Optional, Union
 from enum import Enum
 
-# For TP-Link Kasa devices
-from kasa import Discover, SmartDevice
+if TYPE_CHECKING:
+    # For TP-Link Kasa devices; imported where used, it pulls in aiohttp
+    from kasa import SmartDevice
+
+from .action_metrics import ActionMetrics
+from .device_registry import DeviceRegistry
+from .discovery import ArpSweepDiscovery, SingleFlight, scapy_arp_scan
+from .emeter import METRICS, EmeterSampler, EmeterStore
+from .poller import DevicePoller, StateTable
+from .runtime import BackgroundLoop
+from .scenes import ExecutionPlan, Scene, SceneError, SceneStore, ScheduleRunner
+from .scheduler import SET_STATE, TOGGLE, CommandScheduler
+from .snapshot import DeviceSnapshot, dumps, dumps_ndjson, project_snapshots
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("smart-device-controller")
 
+# Shared across invocations so that warm containers keep known devices
+device_registry = DeviceRegistry.from_env()
+state_table = StateTable()
+emeter_store = EmeterStore(max_devices=device_registry.max_size)
+action_metrics = ActionMetrics("kasa", max_targets=device_registry.max_size)
+scene_store = SceneStore.from_env()
+
+
+class RuntimeConfig:
+    """Runtime settings read from environment variables."""
+
+    MODE = os.environ.get("KASA_RUNTIME", "persistent")
+    REQUEST_TIMEOUT = float(os.environ.get("KASA_REQUEST_TIMEOUT", 30))
+    IDLE_TIMEOUT = float(os.environ.get("KASA_IDLE_TIMEOUT", 60))
+    BATCH_CONCURRENCY = int(os.environ.get("KASA_BATCH_CONCURRENCY", 16))
+    BATCH_TIMEOUT = float(os.environ.get("KASA_BATCH_TIMEOUT", 10))
+    GROUPS = os.environ.get("KASA_GROUPS", "{}")
+    DISCOVERY_TARGET = os.environ.get("KASA_DISCOVERY_TARGET", "255.255.255.255")
+    DISCOVERY_TIMEOUT = int(os.environ.get("KASA_DISCOVERY_TIMEOUT", 5))
+    DISCOVERY_CACHE_TTL = float(os.environ.get("KASA_DISCOVERY_CACHE_TTL", 2))
+    POLLER = os.environ.get("KASA_POLLER", "disabled")
+    POLL_MIN_INTERVAL = float(os.environ.get("KASA_POLL_MIN_INTERVAL", 2))
+    POLL_MAX_INTERVAL = float(os.environ.get("KASA_POLL_MAX_INTERVAL", 60))
+    POLL_REDISCOVER_EVERY = int(os.environ.get("KASA_POLL_REDISCOVER_EVERY", 10))
+    ARP_SUBNET = os.environ.get("KASA_ARP_SUBNET")
+    ARP_INTERFACE = os.environ.get("KASA_ARP_INTERFACE")
+    ARP_TIMEOUT = float(os.environ.get("KASA_ARP_TIMEOUT", 2))
+    EMETER_SAMPLER = os.environ.get("KASA_EMETER_SAMPLER", "disabled")
+    EMETER_INTERVAL = float(os.environ.get("KASA_EMETER_INTERVAL", 10))
+    PREWARM = os.environ.get("KASA_PREWARM", "disabled")
+    SCHEDULER = os.environ.get("KASA_SCHEDULER", "enabled")
+    SCHEDULE_GRACE = float(os.environ.get("KASA_SCHEDULE_GRACE", 60))
+
+
+def discovery_timeout_kwargs(timeout: int) -> Dict[str, int]:
+    """Get the discovery timeout keyword for the installed python-kasa.
+
+    python-kasa 0.5 calls it ``timeout``; later versions renamed it to
+    ``discovery_timeout`` and use ``timeout`` for device queries.
+    """
+    from kasa import Discover
+
+    if "discovery_timeout" in inspect.signature(Discover.discover).parameters:
+        return {"discovery_timeout": timeout}
+    return {"timeout": timeout}
+
 
 class DeviceError(Exception):
     """Base exception for device-related errors."""
@@ -27,11 +87,24 @@ class ActionError(Exception):
 class DeviceAction(Enum):
     """Available device actions."""
 
+    DISCOVER = "discover"
     LIST = "get_device_list"
     TOGGLE = "toggle_device"
     SET_STATE = "set_device_state"
     TOGGLE_STATIC = "toggle_device_static"
     GET_DEVICE = "get_device"
+    STATS = "get_stats"
+    BATCH = "batch_device_state"
+    WATCH = "watch_devices"
+    ARP_DISCOVER = "arp_discover"
+    EMETER_STATS = "get_emeter_stats"
+    METRICS = "metrics"
+    SCENES = "get_scenes"
+    SAVE_SCENE = "save_scene"
+    DELETE_SCENE = "delete_scene"
+    APPLY_SCENE = "apply_scene"
+    SAVE_SCHEDULE = "save_schedule"
+    DELETE_SCHEDULE = "delete_schedule"
 
     @classmethod
     def list_actions(cls) -> List[str]:
@@ -42,19 +115,50 @@ class DeviceAction(Enum):
 class KasaDeviceManager:
     """Manages TP-Link Kasa smart devices."""
 
-    def __init__(self, discovery_timeout: int = 5):
+    def __init__(
+        self,
+        discovery_timeout: int = RuntimeConfig.DISCOVERY_TIMEOUT,
+        registry: Optional[DeviceRegistry] = None,
+        states: Optional[StateTable] = None,
+        discovery_target: str = RuntimeConfig.DISCOVERY_TARGET,
+    ):
         """Initialize the Kasa device manager.
 
         Args:
             discovery_timeout (int): Timeout for device discovery in seconds
+            registry (Optional[DeviceRegistry]): Registry of known devices,
+                defaults to the process-wide registry
+            states (Optional[StateTable]): Versioned device states,
+                defaults to the process-wide state table
+            discovery_target (str): Broadcast address used when discovery
+                has no explicit target
         """
         self.discovery_timeout = discovery_timeout
+        self.discovery_target = discovery_target
+        self.registry = registry if registry is not None else device_registry
+        self.states = states if states is not None else state_table
+        self.commands = CommandScheduler(
+            self._toggle_device_now, self._set_device_state_now
+        )
+        self.sweeper = ArpSweepDiscovery(
+            self._probe_host,
+            arp_scan=lambda subnet: scapy_arp_scan(
+                subnet, RuntimeConfig.ARP_TIMEOUT, RuntimeConfig.ARP_INTERFACE
+            ),
+            concurrency=RuntimeConfig.BATCH_CONCURRENCY * 4,
+            probe_timeout=discovery_timeout,
+        )
+        self.discovery = SingleFlight(ttl=RuntimeConfig.DISCOVERY_CACHE_TTL)
 
     async def discover_devices(self, target: Optional[str] = None) -> Dict[str, Any]:
         """Discover Kasa devices on the network.
 
+        Concurrent discoveries of the same target share one broadcast, and
+        results are reused for DISCOVERY_CACHE_TTL seconds.
+
         Args:
-            target (Optional[str]): Optional target IP or subnet for discovery
+            target (Optional[str]): Optional target IP or subnet for discovery,
+                defaults to the manager's discovery target (broadcast)
 
         Returns:
             Dict[str, Any]: Dictionary of discovered devices
@@ -62,34 +166,106 @@ class KasaDeviceManager:
         Raises:
             DeviceError: If discovery fails
         """
-        try:
-            return await Discover.discover(
-                target=target, timeout=self.discovery_timeout
+
+        async def discover() -> Dict[str, Any]:
+            from kasa import Discover
+
+            devices = await Discover.discover(
+                target=target or self.discovery_target,
+                **discovery_timeout_kwargs(self.discovery_timeout),
             )
+            for addr, dev in devices.items():
+                self._remember(addr, dev)
+            return devices
+
+        try:
+            return dict(await self.discovery.do(target, discover))
         except Exception as e:
             raise DeviceError(f"Error discovering devices: {str(e)}")
 
-    async def get_device_list(self) -> List[Dict[str, Any]]:
-        """Get a list of all Kasa devices with their status.
+    async def _probe_host(self, ip_address: str) -> Optional["SmartDevice"]:
+        """Probe a single host for a Kasa device and register it."""
+        from kasa import Discover
+
+        device = await Discover.discover_single(
+            ip_address, **discovery_timeout_kwargs(self.discovery_timeout)
+        )
+        if device is not None:
+            self._remember(ip_address, device)
+        return device
+
+    async def sweep_devices(
+        self, subnet: str, full: bool = False, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Discover devices by ARP-sweeping a subnet and probing live hosts.
+
+        Args:
+            subnet (str): Subnet in CIDR notation
+            full (bool): Re-probe every live host, not only new or moved ones
+            timeout (Optional[float]): Return what was found after this many
+                seconds; remaining probes keep registering devices in the background
 
         Returns:
-            List[Dict[str, Any]]: List of devices with their properties
+            Dict[str, Any]: Devices found so far, by IP address
+
+        Raises:
+            DeviceError: If the sweep fails
         """
-        try:
-            devices = await self.discover_devices()
-            device_list = []
+        devices: Dict[str, Any] = {}
 
-            for addr, dev in devices.items():
-                device_list.append((addr, dev.__dict__))
+        async def collect() -> None:
+            async for ip_address, device, _ in self.sweeper.sweep(subnet, full=full):
+                devices[ip_address] = device
 
-            return device_list
+        try:
+            await asyncio.wait_for(collect(), timeout)
+        except asyncio.TimeoutError:
+            pass
         except Exception as e:
-            logger.error(f"Error getting device list: {str(e)}")
-            return [{"error": str(e)}]
+            raise DeviceError(f"Error sweeping {subnet}: {str(e)}")
+        return devices
+
+    def _remember(
+        self, ip_address: str, device: Any, is_on: Optional[bool] = None
+    ) -> bool:
+        """Register a device and record its snapshot in the state table.
 
-    async def get_device(self, ip_address: str) -> SmartDevice:
+        Args:
+            ip_address (str): The IP address of the device
+            device (Any): The device handle
+            is_on (Optional[bool]): Power state to record instead of the cached one
+
+        Returns:
+            bool: True if the recorded state changed
+        """
+        self.registry.put(ip_address, device)
+        snapshot = DeviceSnapshot.from_device(ip_address, device)
+        if is_on is not None:
+            snapshot.is_on = is_on
+            self.registry.update_state(ip_address, is_on)
+        return self.states.update(snapshot)
+
+    def invalidate_device(self, ip_address: str) -> None:
+        """Forget everything known about a device, e.g. after a failed command."""
+        self.registry.invalidate(ip_address)
+        self.discovery.forget(ip_address)
+
+    async def get_device_list(self) -> List[DeviceSnapshot]:
+        """Get a list of all Kasa devices with their status.
+
+        Returns:
+            List[DeviceSnapshot]: Snapshots of the discovered devices
+        """
+        devices = await self.discover_devices()
+        return [DeviceSnapshot.from_device(addr, dev) for addr, dev in devices.items()]
+
+    async def get_device(self, ip_address: str) -> "SmartDevice":
         """Get a specific device by IP address.
 
+        Devices already in the registry are refreshed directly from the host;
+        unknown devices, and registered ones whose refresh fails (stale
+        handle, device moved), are located through a targeted discovery.
+
         Args:
             ip_address (str): The IP address of the device
 
@@ -99,15 +275,27 @@ class KasaDeviceManager:
         Raises:
             DeviceError: If device not found or error occurs
         """
+        entry = self.registry.get(ip_address)
+        if entry is not None:
+            try:
+                await entry.device.update()
+                self._remember(ip_address, entry.device)
+                return entry.device
+            except Exception as e:
+                logger.info(f"Rediscovering {ip_address} after error: {str(e)}")
+                self.invalidate_device(ip_address)
+
         try:
             devices = await self.discover_devices(target=ip_address)
             if ip_address not in devices:
                 raise DeviceError(f"Device not found at {ip_address}")
-
             device = devices[ip_address]
+
             await device.update()
+            self._remember(ip_address, device)
             return device
         except Exception as e:
+            self.invalidate_device(ip_address)
             raise DeviceError(f"Error getting device {ip_address}: {str(e)}")
 
     async def _execute_device_action(
@@ -125,17 +313,40 @@ class KasaDeviceManager:
         """
         try:
             device = await self.get_device(ip_address)
-            return await action(device, *args)
+            result = await action(device, *args)
+            self._remember(ip_address, device, is_on=result["new_state"])
+            return result
         except DeviceError as e:
             return {"success": False, "error": str(e)}
         except Exception as e:
             logger.error(f"Error executing action on device {ip_address}: {str(e)}")
+            self.invalidate_device(ip_address)
             return {"success": False, "error": str(e)}
 
-    async def toggle_device(self, ip_address: str) -> Dict[str, Any]:
-        """Toggle the power state of a device."""
+    async def toggle_device(
+        self, ip_address: str, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Toggle the power state of a device.
+
+        Commands are queued per device, see CommandScheduler.
+        """
+        return await self.commands.submit(ip_address, TOGGLE, timeout=timeout)
+
+    async def set_device_state(
+        self, ip_address: str, power_state: bool, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Set a device to a specific power state.
 
-        async def toggle_action(device: SmartDevice) -> Dict[str, Any]:
+        Commands are queued per device, see CommandScheduler.
+        """
+        return await self.commands.submit(
+            ip_address, SET_STATE, power_state, timeout=timeout
+        )
+
+    async def _toggle_device_now(self, ip_address: str) -> Dict[str, Any]:
+        """Toggle the power state of a device, bypassing the command queue."""
+
+        async def toggle_action(device: "SmartDevice") -> Dict[str, Any]:
             previous_state = device.is_on
             if previous_state:
                 await device.turn_off()
@@ -150,12 +361,12 @@ class KasaDeviceManager:
 
         return await self._execute_device_action(ip_address, toggle_action)
 
-    async def set_device_state(
+    async def _set_device_state_now(
         self, ip_address: str, power_state: bool
     ) -> Dict[str, Any]:
-        """Set a device to a specific power state."""
+        """Set a device to a specific power state, bypassing the command queue."""
 
-        async def set_state_action(device: SmartDevice) -> Dict[str, Any]:
+        async def set_state_action(device: "SmartDevice") -> Dict[str, Any]:
             previous_state = device.is_on
             if power_state:
                 await device.turn_on()
@@ -170,12 +381,173 @@ class KasaDeviceManager:
 
         return await self._execute_device_action(ip_address, set_state_action)
 
+    async def batch_device_state(
+        self,
+        ip_addresses: List[str],
+        power_state: Optional[bool],
+        concurrency: int = RuntimeConfig.BATCH_CONCURRENCY,
+        timeout: float = RuntimeConfig.BATCH_TIMEOUT,
+    ) -> Dict[str, Any]:
+        """Set or toggle the power state of several devices concurrently.
+
+        Every device gets its own timeout, so a slow or failing device does
+        not hold back the others. A command that is still queued when its
+        timeout expires is withdrawn and fails; one that already started is
+        reported as pending, since it will still change the device.
+
+        Args:
+            ip_addresses (List[str]): Device IP addresses
+            power_state (Optional[bool]): Target power state, None to toggle
+            concurrency (int): Maximum number of devices commanded at once
+            timeout (float): Timeout per device in seconds
+
+        Returns:
+            Dict[str, Any]: Overall success, the result for each device and
+                the failed and pending devices
+        """
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+        async def run(ip_address: str) -> Dict[str, Any]:
+            async with semaphore:
+                if power_state is None:
+                    return await self.toggle_device(ip_address, timeout)
+                return await self.set_device_state(ip_address, power_state, timeout)
+
+        unique_ips = list(dict.fromkeys(ip_addresses))
+        results = dict(
+            zip(unique_ips, await asyncio.gather(*(run(ip) for ip in unique_ips)))
+        )
+        pending = [ip for ip, r in results.items() if r.get("pending")]
+        failed = [
+            ip
+            for ip, r in results.items()
+            if not r.get("success") and not r.get("pending")
+        ]
+        return {
+            "success": not failed and not pending,
+            "results": results,
+            "failed": failed,
+            "pending": pending,
+        }
+
+    async def apply_scene(
+        self, scene: Scene, force: bool = False, dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """Bring the devices of a scene to their target states.
+
+        Only devices whose cached state differs from the target (or is not
+        known) get a command; both target states are commanded concurrently.
+
+        Args:
+            scene (Scene): The compiled scene
+            force (bool): Command every device, whatever its cached state
+            dry_run (bool): Only return the plan
+
+        Returns:
+            Dict[str, Any]: Overall success, the plan and the result for
+                each commanded device
+        """
+        plan = ExecutionPlan.build(scene, self.registry, force)
+        if dry_run:
+            return {"success": True, "commands": plan.size, "plan": plan.to_dict()}
+
+        batches = [(state, ips) for state, ips in plan.commands.items() if ips]
+        outcomes = await asyncio.gather(
+            *(self.batch_device_state(ips, state) for state, ips in batches)
+        )
+        failed = [ip for outcome in outcomes for ip in outcome["failed"]]
+        pending = [ip for outcome in outcomes for ip in outcome["pending"]]
+        return {
+            "success": not failed and not pending,
+            "commands": plan.size,
+            "plan": plan.to_dict(),
+            "results": {
+                ip: result
+                for outcome in outcomes
+                for ip, result in outcome["results"].items()
+            },
+            "failed": failed,
+            "pending": pending,
+        }
+
+    async def refresh_devices(self, discover: bool = False) -> int:
+        """Refresh the state of every registered device.
+
+        Devices that cannot be reached are dropped and reported as removed.
+
+        Args:
+            discover (bool): Also run a discovery to pick up new devices
+                (always done while no device is registered)
+
+        Returns:
+            int: Number of devices whose state changed
+        """
+        discovered: Dict[str, Any] = {}
+        before = self.states.version
+        if discover or not len(self.registry):
+            self.discovery.forget(None)
+            discovered = await self.discover_devices()
+        changed = self.states.version - before
+
+        semaphore = asyncio.Semaphore(RuntimeConfig.BATCH_CONCURRENCY)
+
+        async def refresh(ip_address: str, device: Any) -> bool:
+            async with semaphore:
+                try:
+                    await asyncio.wait_for(device.update(), RuntimeConfig.BATCH_TIMEOUT)
+                except Exception as e:
+                    logger.warning(f"Error refreshing device {ip_address}: {str(e)}")
+                    self.invalidate_device(ip_address)
+                    return self.states.remove(ip_address)
+                return self._remember(ip_address, device)
+
+        results = await asyncio.gather(
+            *(
+                refresh(ip, entry.device)
+                for ip, entry in self.registry.items()
+                if ip not in discovered
+            )
+        )
+        return changed + sum(results)
+
+    async def close_idle_connections(self, max_idle: float) -> int:
+        """Close connections to devices that have not been used recently.
+
+        The devices stay registered, the next command simply reconnects.
+
+        Args:
+            max_idle (float): Idle time in seconds after which to disconnect
+
+        Returns:
+            int: Number of connections closed
+        """
+        closed = 0
+        for ip_address, entry in self.registry.idle(max_idle):
+            try:
+                disconnect = getattr(entry.device, "disconnect", None)
+                if disconnect is not None:
+                    await disconnect()
+                else:
+                    await entry.device.protocol.close()
+                closed += 1
+            except Exception as e:
+                logger.warning(f"Error closing connection to {ip_address}: {str(e)}")
+            entry.connected = False
+        return closed
+
 
 class RequestHandler:
     """Handles incoming requests and routes them to appropriate handlers."""
 
-    def __init__(self):
-        self.kasa_manager = KasaDeviceManager()
+    def __init__(
+        self,
+        kasa_manager: Optional[KasaDeviceManager] = None,
+        groups: Optional[Dict[str, List[str]]] = None,
+        scenes: Optional[SceneStore] = None,
+    ):
+        self.kasa_manager = kasa_manager or KasaDeviceManager()
+        self.groups = groups if groups is not None else json.loads(RuntimeConfig.GROUPS)
+        self.scenes = scenes if scenes is not None else scene_store
 
     def _validate_ip_address(self, request_data: Dict[str, Any]) -> str:
         """Validate and return IP address from request data."""
@@ -189,15 +561,51 @@ class RequestHandler:
         devices = await self.kasa_manager.discover_devices(request_data.get("target"))
         return {"devices": {k: v.model for k, v in devices.items()}}
 
-    async def handle_device_list(self, _: Dict[str, Any]) -> Dict[str, Any]:
+    def _validate_fields(self, request_data: Dict[str, Any]) -> List[str]:
+        """Validate and return the requested snapshot field projection."""
+        try:
+            return DeviceSnapshot.validate_fields(request_data.get("fields"))
+        except ValueError as e:
+            raise ActionError(str(e))
+
+    async def handle_arp_discover(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle ARP-sweep discovery request."""
+        subnet = request_data.get("subnet", RuntimeConfig.ARP_SUBNET)
+        if not subnet:
+            raise ActionError("Subnet is required (or set KASA_ARP_SUBNET)")
+        fields = self._validate_fields(request_data)
+        timeout = min(
+            float(request_data.get("timeout", RuntimeConfig.REQUEST_TIMEOUT)),
+            RuntimeConfig.REQUEST_TIMEOUT * 0.9,
+        )
+        devices = await self.kasa_manager.sweep_devices(
+            subnet, full=bool(request_data.get("full", False)), timeout=timeout
+        )
+        return {
+            "devices": project_snapshots(
+                (DeviceSnapshot.from_device(ip, dev) for ip, dev in devices.items()),
+                fields,
+            )
+        }
+
+    async def handle_device_list(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """Handle device list request."""
-        device_list = await self.kasa_manager.get_device_list()
-        return {"devices": device_list}
+        fields = self._validate_fields(request_data)
+        try:
+            device_list = await self.kasa_manager.get_device_list()
+        except DeviceError as e:
+            logger.error(f"Error getting device list: {str(e)}")
+            return {"devices": [{"error": str(e)}]}
+        return {"devices": project_snapshots(device_list, fields)}
 
     async def handle_get_device(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """Handle get device request."""
-        ip_address = request_data.get("ip_address", "")
-        return await self.kasa_manager.get_device(ip_address)
+        ip_address = self._validate_ip_address(request_data)
+        fields = self._validate_fields(request_data)
+        device = await self.kasa_manager.get_device(ip_address)
+        return {
+            "device": DeviceSnapshot.from_device(ip_address, device).to_dict(fields)
+        }
 
     async def handle_toggle(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """Handle device toggle request."""
@@ -212,6 +620,163 @@ class RequestHandler:
             raise ActionError("Power state is required")
         return await self.kasa_manager.set_device_state(ip_address, bool(power_state))
 
+    async def handle_batch(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle batch set/toggle request for a list of IPs or a named group."""
+        ip_addresses = request_data.get("ip_addresses")
+        group = request_data.get("group")
+        if group is not None:
+            if group not in self.groups:
+                raise ActionError(f"Unknown group: {group}")
+            ip_addresses = self.groups[group]
+        if not ip_addresses:
+            raise ActionError("ip_addresses or group is required")
+
+        power_state = request_data.get("power_state")
+        if power_state is None:
+            raise ActionError("Power state is required")
+        power_state = None if power_state == "toggle" else bool(power_state)
+
+        return await self.kasa_manager.batch_device_state(
+            ip_addresses,
+            power_state,
+            concurrency=int(
+                request_data.get("concurrency", RuntimeConfig.BATCH_CONCURRENCY)
+            ),
+            timeout=float(request_data.get("timeout", RuntimeConfig.BATCH_TIMEOUT)),
+        )
+
+    def _validate_name(self, request_data: Dict[str, Any]) -> str:
+        """Validate and return the scene or schedule name from request data."""
+        name = request_data.get("name")
+        if not name:
+            raise ActionError("Name is required")
+        return name
+
+    async def handle_get_scenes(self, _: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle scenes request, listing scenes, schedules and their next runs."""
+        upcoming = schedule_runner.upcoming()
+        return {
+            "scenes": {name: s.to_dict() for name, s in self.scenes.scenes.items()},
+            "schedules": {
+                name: {**s.to_dict(), "next_run": upcoming.get(name)}
+                for name, s in self.scenes.schedules.items()
+            },
+            "scheduler": schedule_runner.stats(),
+        }
+
+    async def handle_save_scene(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle save scene request.
+
+        Targets map device IPs to power states; ``groups`` maps group names
+        to a power state for all of their devices.
+        """
+        name = self._validate_name(request_data)
+        targets = {}
+        for group, power_state in (request_data.get("groups") or {}).items():
+            if group not in self.groups:
+                raise ActionError(f"Unknown group: {group}")
+            targets.update({ip: power_state for ip in self.groups[group]})
+        targets.update(request_data.get("targets") or {})
+        scene = self.scenes.put_scene(name, targets)
+        return {"success": True, "scene": name, "targets": scene.to_dict()}
+
+    async def handle_delete_scene(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle delete scene request."""
+        name = self._validate_name(request_data)
+        self.scenes.delete_scene(name)
+        return {"success": True, "scene": name}
+
+    async def apply_scene(
+        self, name: str, force: bool = False, dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """Apply a stored scene by name."""
+        scene = self.scenes.get_scene(name)
+        return {
+            "scene": name,
+            **await self.kasa_manager.apply_scene(scene, force, dry_run),
+        }
+
+    async def handle_apply_scene(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle apply scene request, ``dry_run`` only returns the plan."""
+        return await self.apply_scene(
+            self._validate_name(request_data),
+            force=bool(request_data.get("force", False)),
+            dry_run=bool(request_data.get("dry_run", False)),
+        )
+
+    async def handle_save_schedule(
+        self, request_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Handle save schedule request (scene, at/days or every, enabled)."""
+        name = self._validate_name(request_data)
+        schedule = self.scenes.put_schedule(name, request_data)
+        return {"success": True, "schedule": name, **schedule.to_dict()}
+
+    async def handle_delete_schedule(
+        self, request_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Handle delete schedule request."""
+        name = self._validate_name(request_data)
+        self.scenes.delete_schedule(name)
+        return {"success": True, "schedule": name}
+
+    async def handle_watch(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle watch request, returning device changes since a version token.
+
+        Waits up to ``timeout`` seconds (long-poll) when nothing changed yet.
+        """
+        fields = self._validate_fields(request_data)
+        states = self.kasa_manager.states
+        since = states.parse_token(request_data.get("since"))
+        timeout = min(
+            float(request_data.get("timeout", 0)), RuntimeConfig.REQUEST_TIMEOUT * 0.9
+        )
+
+        await states.wait(since, timeout)
+        return {
+            "version": states.token,
+            "reset": since is None,
+            "changes": states.changes_since(since, fields),
+        }
+
+    async def handle_emeter_stats(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle emeter stats request (min/max/avg of a metric over a window)."""
+        ip_address = self._validate_ip_address(request_data)
+        metric = request_data.get("metric", "power")
+        if metric not in METRICS:
+            raise ActionError(
+                f"Invalid metric: {metric}. Valid metrics are: {', '.join(METRICS)}"
+            )
+        if ip_address not in emeter_store:
+            raise ActionError(f"No emeter samples for {ip_address}")
+        window = float(request_data.get("window", 3600))
+        return {
+            "device": ip_address,
+            "metric": metric,
+            "window": window,
+            **emeter_store.query(ip_address, metric, window),
+        }
+
+    async def handle_metrics(self, _: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle metrics request (Prometheus text exposition)."""
+        return {"metrics": render_metrics()}
+
+    async def handle_stats(self, _: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle stats request."""
+        return {
+            "registry": self.kasa_manager.registry.stats(),
+            "discovery": {
+                **self.kasa_manager.discovery.stats(),
+                "arp_hosts": len(self.kasa_manager.sweeper.index),
+                "arp_probes": self.kasa_manager.sweeper.probes,
+            },
+            "states": {"version": self.kasa_manager.states.token},
+            "commands": self.kasa_manager.commands.stats(),
+            "poller": poller.stats() if poller else None,
+            "scheduler": schedule_runner.stats(),
+            "actions": action_metrics.summary(),
+        }
+
     async def process_request(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process the incoming request based on action type."""
         try:
@@ -224,6 +789,18 @@ class RequestHandler:
                 DeviceAction.TOGGLE.value: self.handle_toggle,
                 DeviceAction.SET_STATE.value: self.handle_set_state,
                 DeviceAction.GET_DEVICE.value: self.handle_get_device,
+                DeviceAction.STATS.value: self.handle_stats,
+                DeviceAction.BATCH.value: self.handle_batch,
+                DeviceAction.WATCH.value: self.handle_watch,
+                DeviceAction.ARP_DISCOVER.value: self.handle_arp_discover,
+                DeviceAction.EMETER_STATS.value: self.handle_emeter_stats,
+                DeviceAction.METRICS.value: self.handle_metrics,
+                DeviceAction.SCENES.value: self.handle_get_scenes,
+                DeviceAction.SAVE_SCENE.value: self.handle_save_scene,
+                DeviceAction.DELETE_SCENE.value: self.handle_delete_scene,
+                DeviceAction.APPLY_SCENE.value: self.handle_apply_scene,
+                DeviceAction.SAVE_SCHEDULE.value: self.handle_save_schedule,
+                DeviceAction.DELETE_SCHEDULE.value: self.handle_delete_schedule,
             }
 
             handler = handlers.get(action)
@@ -234,9 +811,17 @@ class RequestHandler:
                     "available_actions": DeviceAction.list_actions(),
                 }
 
-            return await handler(request_data)
+            target = (
+                request_data.get("ip_address")
+                or request_data.get("target")
+                or request_data.get("name")
+            )
+            with action_metrics.track(action, target) as outcome:
+                result = await handler(request_data)
+                outcome.error = result.get("success") is False or "error" in result
+            return result
 
-        except ActionError as e:
+        except (ActionError, SceneError) as e:
             return {"success": False, "error": str(e)}
         except Exception as e:
             logger.error(f"Error processing request: {str(e)}")
@@ -262,6 +847,127 @@ def parse_request(event):
         return {"action": default_action}
 
 
+# Long-lived runtime shared by warm invocations
+runtime = BackgroundLoop()
+_request_handler: Optional[RequestHandler] = None
+_request_handler_lock = threading.Lock()
+
+
+def get_request_handler() -> RequestHandler:
+    """Get the shared request handler, creating it on first use."""
+    global _request_handler
+    with _request_handler_lock:
+        if _request_handler is None:
+            _request_handler = RequestHandler()
+        return _request_handler
+
+
+async def reap_idle_connections() -> None:
+    """Periodically close device connections idle for longer than IDLE_TIMEOUT."""
+    interval = max(RuntimeConfig.IDLE_TIMEOUT / 2, 1)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            manager = get_request_handler().kasa_manager
+            await manager.close_idle_connections(RuntimeConfig.IDLE_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Error closing idle connections: {str(e)}")
+
+
+runtime.on_start(reap_idle_connections)
+
+poller: Optional[DevicePoller] = None
+if RuntimeConfig.POLLER == "enabled":
+    poller = DevicePoller(
+        lambda: get_request_handler().kasa_manager.refresh_devices(
+            discover=poller.polls % RuntimeConfig.POLL_REDISCOVER_EVERY == 0
+        ),
+        min_interval=RuntimeConfig.POLL_MIN_INTERVAL,
+        max_interval=RuntimeConfig.POLL_MAX_INTERVAL,
+    )
+    runtime.on_start(poller.run)
+
+emeter_sampler: Optional[EmeterSampler] = None
+if RuntimeConfig.EMETER_SAMPLER == "enabled":
+    emeter_sampler = EmeterSampler(
+        lambda: [
+            (ip, entry.device)
+            for ip, entry in get_request_handler().kasa_manager.registry.items()
+        ],
+        emeter_store,
+        interval=RuntimeConfig.EMETER_INTERVAL,
+        timeout=RuntimeConfig.BATCH_TIMEOUT,
+    )
+    runtime.on_start(emeter_sampler.run)
+
+
+async def apply_scheduled_scene(name: str) -> Dict[str, Any]:
+    """Apply a scene for the schedule runner, tracked as "scheduled_scene"."""
+    with action_metrics.track("scheduled_scene", name) as outcome:
+        result = await get_request_handler().apply_scene(name)
+        outcome.error = not result.get("success")
+    return result
+
+
+schedule_runner = ScheduleRunner(
+    scene_store, apply_scheduled_scene, grace=RuntimeConfig.SCHEDULE_GRACE
+)
+if RuntimeConfig.SCHEDULER == "enabled":
+    runtime.on_start(schedule_runner.run)
+
+
+def prewarm() -> None:
+    """Do the expensive first-request work ahead of the first request.
+
+    Imports python-kasa (and scapy when ARP sweeps are configured), creates
+    the shared request handler and starts the background loop. The function
+    template can call this at container start; with KASA_PREWARM=enabled it
+    runs on a background thread when the handler is imported, so the
+    watchdog starts serving while it loads.
+    """
+    import kasa  # noqa: F401
+
+    if RuntimeConfig.ARP_SUBNET:
+        try:
+            import scapy.all  # noqa: F401
+        except ImportError as e:
+            logger.warning(f"ARP sweeps unavailable: {str(e)}")
+    if RuntimeConfig.MODE != "per_request":
+        get_request_handler()
+        runtime.start()
+
+
+def render_metrics() -> str:
+    """Render all metrics in Prometheus text exposition format."""
+    lines = emeter_store.render_prometheus() + action_metrics.render_prometheus()
+    return "\n".join(lines) + "\n"
+
+
+def run_per_request(request_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Process a request on a fresh handler and event loop.
+
+    Device handles are bound to the loop that created them, so this mode
+    gets its own registry instead of the process-wide one.
+    """
+    handler = RequestHandler(KasaDeviceManager(registry=DeviceRegistry()))
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    try:
+        return loop.run_until_complete(handler.process_request(request_data))
+    finally:
+        loop.close()
+
+
+def run_persistent(request_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Process a request on the shared handler and background event loop."""
+    handler = get_request_handler()
+    return runtime.submit(
+        handler.process_request(request_data), timeout=RuntimeConfig.REQUEST_TIMEOUT
+    )
+
+
 def handle(event, context) -> str:
     """Handle incoming requests to the function.
 
@@ -270,30 +976,46 @@ def handle(event, context) -> str:
         context (Any): Context information
 
     Returns:
-        str: JSON response
+        str: JSON response, or NDJSON (one device or change per line) for
+            list and watch requests with ``"format": "ndjson"``. Requests
+            to ``/metrics`` get the Prometheus text exposition.
     """
+    if getattr(event, "path", None) == "/metrics":
+        return {
+            "statusCode": 200,
+            "body": render_metrics(),
+            "headers": {"Content-Type": "text/plain; version=0.0.4"},
+        }
+
     try:
         request_data = parse_request(event)
-        handler = RequestHandler()
-
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        run = run_per_request if RuntimeConfig.MODE == "per_request" else run_persistent
 
         try:
-            result = loop.run_until_complete(handler.process_request(request_data))
+            result = run(request_data)
         except asyncio.CancelledError:
             logger.warning("Async operation was cancelled (likely a timeout)")
             result = {"success": False, "error": "Operation timed out or was cancelled"}
         except Exception as e:
             logger.error(f"Error in async operation: {str(e)}")
             result = {"success": False, "error": str(e)}
-        finally:
-            loop.close()
 
-        return json.dumps(result)
+        if request_data.get("format") == "ndjson":
+            if "changes" in result:
+                return dumps_ndjson(
+                    result["changes"]
+                    + [{"version": result["version"], "reset": result["reset"]}]
+                )
+            if isinstance(result.get("devices"), list):
+                return dumps_ndjson(result["devices"])
+        return dumps(result)
 
     except json.JSONDecodeError:
         return json.dumps({"success": False, "error": "Invalid JSON in request"})
     except BaseException as e:
         logger.error(f"Critical error processing request: {str(e)}")
         return json.dumps({"success": False, "error": str(e)})
+
+
+if RuntimeConfig.PREWARM == "enabled":
+    threading.Thread(target=prewarm, name="prewarm", daemon=True).start()
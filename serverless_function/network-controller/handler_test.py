@@ -0,0 +1,74 @@
+import asyncio
+
+from .device_registry import DeviceRegistry
+from .handler import KasaDeviceManager
+from .poller import StateTable
+from .scheduler import SET_STATE, CommandScheduler
+
+
+class FakePlugs:
+    """Answers device commands after a per-device delay, or fails them."""
+
+    def __init__(self, delays=None, broken=()):
+        self.delays = delays or {}
+        self.broken = set(broken)
+        self.states = {}
+
+    async def toggle(self, ip_address):
+        return await self.set_state(ip_address, not self.states.get(ip_address))
+
+    async def set_state(self, ip_address, power_state):
+        await asyncio.sleep(self.delays.get(ip_address, 0))
+        if ip_address in self.broken:
+            raise OSError("host unreachable")
+        self.states[ip_address] = power_state
+        return {"success": True, "device": ip_address, "new_state": power_state}
+
+
+def make_manager(plugs):
+    manager = KasaDeviceManager(registry=DeviceRegistry(), states=StateTable())
+    manager.commands = CommandScheduler(plugs.toggle, plugs.set_state)
+    return manager
+
+
+def test_batch_reports_each_failed_device():
+    plugs = FakePlugs(broken={"10.0.0.2"})
+    manager = make_manager(plugs)
+
+    result = asyncio.run(
+        manager.batch_device_state(["10.0.0.1", "10.0.0.2", "10.0.0.1"], True)
+    )
+
+    assert result["success"] is False
+    assert (result["failed"], result["pending"]) == (["10.0.0.2"], [])
+    assert result["results"]["10.0.0.1"]["success"] is True
+    assert result["results"]["10.0.0.2"]["error"] == "host unreachable"
+    assert plugs.states == {"10.0.0.1": True}
+
+
+def test_batch_timeout_withdraws_queued_and_reports_running_commands():
+    plugs = FakePlugs(delays={"10.0.0.2": 0.2, "10.0.0.3": 0.2})
+    manager = make_manager(plugs)
+
+    async def run():
+        # Keeps 10.0.0.3 busy, so the batch command for it stays queued
+        busy = asyncio.ensure_future(
+            manager.commands.submit("10.0.0.3", SET_STATE, False)
+        )
+        await asyncio.sleep(0.01)
+        result = await manager.batch_device_state(
+            ["10.0.0.1", "10.0.0.2", "10.0.0.3"], True, timeout=0.05
+        )
+        await busy
+        # The running command still completes after the batch gave up
+        await asyncio.sleep(0.2)
+        return result
+
+    result = asyncio.run(run())
+
+    assert result["success"] is False
+    assert result["pending"] == ["10.0.0.2"]
+    assert result["failed"] == ["10.0.0.3"]
+    assert "withdrawn" in result["results"]["10.0.0.3"]["error"]
+    assert plugs.states == {"10.0.0.1": True, "10.0.0.2": True, "10.0.0.3": False}
+    assert manager.commands.stats()["withdrawn"] == 1
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .snapshot import DeviceSnapshot
+
+logger = logging.getLogger("smart-device-controller")
+
+
+class StateTable:
+    """Versioned table of the last-known snapshot of every device.
+
+    Every change bumps a global version, so clients can ask for what changed
+    since the version they last saw. Version tokens carry a per-process epoch,
+    a token from another process (e.g. before a pod restart) triggers a full
+    resync instead of silently missing changes.
+    """
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        self._rows: Dict[str, Tuple[int, Optional[Dict[str, Any]]]] = {}
+        self._waiters: List[asyncio.Future] = []
+
+    @property
+    def token(self) -> str:
+        """Opaque token for the current version."""
+        return f"{self.epoch}:{self.version}"
+
+    def parse_token(self, token: Optional[str]) -> Optional[int]:
+        """Get the version of a token, or None if it needs a full resync."""
+        if not token:
+            return None
+        epoch, _, version = str(token).partition(":")
+        if epoch != self.epoch or not version.isdigit():
+            return None
+        version = int(version)
+        return version if version <= self.version else None
+
+    def update(self, snapshot: DeviceSnapshot) -> bool:
+        """Record a device snapshot.
+
+        Args:
+            snapshot (DeviceSnapshot): The latest snapshot of the device
+
+        Returns:
+            bool: True if the state changed
+        """
+        state = snapshot.to_dict()
+        row = self._rows.get(snapshot.ip)
+        if row is not None and row[1] == state:
+            return False
+        self._bump(snapshot.ip, state)
+        return True
+
+    def remove(self, ip_address: str) -> bool:
+        """Record that a device is gone.
+
+        Returns:
+            bool: True if the device was known
+        """
+        row = self._rows.get(ip_address)
+        if row is None or row[1] is None:
+            return False
+        self._bump(ip_address, None)
+        return True
+
+    def _bump(self, ip_address: str, state: Optional[Dict[str, Any]]) -> None:
+        self.version += 1
+        self._rows[ip_address] = (self.version, state)
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.get_loop().call_soon_threadsafe(self._wake, waiter)
+
+    @staticmethod
+    def _wake(waiter: asyncio.Future) -> None:
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def changes_since(
+        self, since: Optional[int], fields: Sequence[str] = DeviceSnapshot.FIELDS
+    ) -> List[Dict[str, Any]]:
+        """Get the devices that changed after a version.
+
+        Args:
+            since (Optional[int]): Version the client has, None for everything
+            fields (Sequence[str]): Snapshot fields to include
+
+        Returns:
+            List[Dict[str, Any]]: Changes ordered by version
+        """
+        rows = sorted(
+            (version, ip, state)
+            for ip, (version, state) in self._rows.items()
+            if since is None or version > since
+        )
+        changes = []
+        for version, ip, state in rows:
+            if state is None:
+                if since is not None:
+                    changes.append({"ip": ip, "version": version, "removed": True})
+                continue
+            changes.append(
+                {
+                    "ip": ip,
+                    "version": version,
+                    "device": {name: state[name] for name in fields},
+                }
+            )
+        return changes
+
+    async def wait(self, since: Optional[int], timeout: float) -> None:
+        """Wait until the table moves past ``since`` or ``timeout`` expires.
+
+        Args:
+            since (Optional[int]): Version the client has, None returns at once
+            timeout (float): Maximum wait in seconds
+        """
+        if since is None or self.version > since or timeout <= 0:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+
+class DevicePoller:
+    """Refreshes known devices in the background on an adaptive interval.
+
+    The interval drops to ``min_interval`` whenever a poll sees a change and
+    doubles after every quiet poll, up to ``max_interval``.
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[], Awaitable[int]],
+        min_interval: float = 2.0,
+        max_interval: float = 60.0,
+    ):
+        """Initialize the poller.
+
+        Args:
+            refresh (Callable[[], Awaitable[int]]): Refreshes all known devices
+                and returns the number of changed devices
+            min_interval (float): Shortest interval between polls in seconds
+            max_interval (float): Longest interval between polls in seconds
+        """
+        self.refresh = refresh
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.polls = 0
+
+    async def poll_once(self) -> int:
+        """Run one poll and adapt the interval.
+
+        Returns:
+            int: Number of changed devices
+        """
+        try:
+            changed = await self.refresh()
+        except Exception as e:
+            logger.warning(f"Error polling devices: {str(e)}")
+            changed = 0
+        self.polls += 1
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+        return changed
+
+    async def run(self) -> None:
+        """Poll forever."""
+        while True:
+            await self.poll_once()
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get poller counters."""
+        return {"polls": self.polls, "interval": self.interval}
@@ -0,0 +1,72 @@
+import asyncio
+
+from .poller import DevicePoller, StateTable
+from .snapshot import DeviceSnapshot
+
+
+def test_state_table_versions_changes():
+    states = StateTable()
+    assert states.update(DeviceSnapshot("10.0.0.1", is_on=True))
+    assert states.update(DeviceSnapshot("10.0.0.2", is_on=False))
+    token = states.token
+    since = states.parse_token(token)
+
+    assert not states.update(DeviceSnapshot("10.0.0.1", is_on=True))
+    assert states.update(DeviceSnapshot("10.0.0.1", is_on=False))
+    assert states.remove("10.0.0.2")
+    assert not states.remove("10.0.0.2")
+
+    changes = states.changes_since(since, ["is_on"])
+    assert changes == [
+        {"ip": "10.0.0.1", "version": 3, "device": {"is_on": False}},
+        {"ip": "10.0.0.2", "version": 4, "removed": True},
+    ]
+    # A full resync leaves removed devices out
+    assert [c["ip"] for c in states.changes_since(None)] == ["10.0.0.1"]
+
+
+def test_state_table_rejects_foreign_and_future_tokens():
+    states = StateTable()
+    states.update(DeviceSnapshot("10.0.0.1"))
+
+    assert states.parse_token(states.token) == 1
+    assert states.parse_token(None) is None
+    assert states.parse_token(f"{states.epoch}:5") is None
+    assert states.parse_token("deadbeef:1") is None
+    assert states.parse_token("garbage") is None
+
+
+def test_state_table_wait_returns_on_change():
+    async def run():
+        states = StateTable()
+        waiter = asyncio.ensure_future(states.wait(0, timeout=5))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        states.update(DeviceSnapshot("10.0.0.1"))
+        await asyncio.wait_for(waiter, 1)
+        # Nothing new: waits for the whole timeout
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await states.wait(1, timeout=0.05)
+        return loop.time() - start
+
+    assert asyncio.run(run()) >= 0.04
+
+
+def test_poller_backs_off_while_quiet():
+    changes = iter([0, 0, 0, 2, 0])
+
+    async def refresh():
+        return next(changes)
+
+    async def run():
+        poller = DevicePoller(refresh, min_interval=1, max_interval=3)
+        intervals = []
+        for _ in range(5):
+            await poller.poll_once()
+            intervals.append(poller.interval)
+        return poller, intervals
+
+    poller, intervals = asyncio.run(run())
+    assert intervals == [2, 3, 3, 1, 2]
+    assert poller.stats()["polls"] == 5
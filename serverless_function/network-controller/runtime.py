@@ -0,0 +1,88 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Awaitable, Callable, Optional
+
+
+class BackgroundLoop:
+    """An asyncio event loop running forever on a daemon thread.
+
+    Lets synchronous entry points submit coroutines to one long-lived loop, so
+    that transports and cached state survive between warm invocations.
+    """
+
+    def __init__(self, name: str = "kasa-runtime"):
+        """Initialize the background loop (it is started lazily).
+
+        Args:
+            name (str): Name of the background thread
+        """
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._on_start = []
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def on_start(self, factory: Callable[[], Awaitable[Any]]) -> None:
+        """Register a coroutine factory scheduled as a task when the loop starts.
+
+        Args:
+            factory (Callable[[], Awaitable[Any]]): Creates the coroutine to run
+        """
+        self._on_start.append(factory)
+        if self.running:
+            self.loop.call_soon_threadsafe(self._spawn, factory)
+
+    def _spawn(self, factory: Callable[[], Awaitable[Any]]) -> None:
+        self.loop.create_task(factory())
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        for factory in self._on_start:
+            self._spawn(factory)
+        self.loop.run_forever()
+
+    def start(self) -> None:
+        """Start the loop thread if it is not running yet."""
+        with self._lock:
+            if self.running:
+                return
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._run, name=self.name, daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the background loop and wait for its result.
+
+        Args:
+            coro (Awaitable[Any]): The coroutine to run
+            timeout (Optional[float]): Seconds to wait before cancelling it
+
+        Returns:
+            Any: The coroutine result
+
+        Raises:
+            asyncio.CancelledError: If the coroutine timed out or was cancelled
+        """
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise asyncio.CancelledError()
+
+    def stop(self) -> None:
+        """Stop the loop and wait for its thread to exit."""
+        with self._lock:
+            if not self.running:
+                return
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -0,0 +1,478 @@
+import asyncio
+import heapq
+import ipaddress
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("smart-device-controller")
+
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+class SceneError(Exception):
+    """Raised for invalid or unknown scenes and schedules."""
+
+    pass
+
+
+@dataclass(frozen=True)
+class Scene:
+    """A named set of device power states, compiled when it is saved.
+
+    Targets are validated once and split by desired state, so applying the
+    scene only has to compare them with the cached device states.
+    """
+
+    name: str
+    on: Tuple[str, ...]
+    off: Tuple[str, ...]
+
+    @classmethod
+    def compile(cls, name: str, targets: Dict[str, Any]) -> "Scene":
+        """Compile a scene from device IP -> power state targets.
+
+        Args:
+            name (str): Scene name
+            targets (Dict[str, Any]): Device IP address to True (on) or False (off)
+
+        Returns:
+            Scene: The compiled scene
+
+        Raises:
+            SceneError: If a target is not an IP address or not a boolean
+        """
+        if not name:
+            raise SceneError("Scene name is required")
+        if not isinstance(targets, dict) or not targets:
+            raise SceneError(f"Scene {name} needs a map of device IP to power state")
+        on, off = [], []
+        for ip_address, state in targets.items():
+            try:
+                ipaddress.ip_address(ip_address)
+            except ValueError:
+                raise SceneError(f"Invalid device address in {name}: {ip_address}")
+            if not isinstance(state, bool):
+                raise SceneError(f"Power state of {ip_address} must be true or false")
+            (on if state else off).append(ip_address)
+        return cls(
+            name,
+            tuple(sorted(on, key=_address_key)),
+            tuple(sorted(off, key=_address_key)),
+        )
+
+    def to_dict(self) -> Dict[str, bool]:
+        return {**{ip: True for ip in self.on}, **{ip: False for ip in self.off}}
+
+
+@dataclass(frozen=True)
+class Schedule:
+    """Applies a scene at a time of day on some weekdays, or every N seconds."""
+
+    name: str
+    scene: str
+    at: Optional[Tuple[int, int]] = None
+    days: Tuple[str, ...] = DAYS
+    every: Optional[float] = None
+    enabled: bool = True
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict[str, Any]) -> "Schedule":
+        """Build a schedule from its stored form.
+
+        Args:
+            name (str): Schedule name
+            data (Dict[str, Any]): "scene", and either "at" ("HH:MM", local
+                time) with optional "days" or "every" (seconds); "enabled"
+
+        Returns:
+            Schedule: The schedule
+
+        Raises:
+            SceneError: If the schedule is invalid
+        """
+        if not name:
+            raise SceneError("Schedule name is required")
+        scene = data.get("scene")
+        if not scene:
+            raise SceneError(f"Schedule {name} needs a scene")
+        if (data.get("at") is None) == (data.get("every") is None):
+            raise SceneError(f"Schedule {name} needs either 'at' or 'every'")
+
+        at = None
+        if data.get("at") is not None:
+            try:
+                hour, minute = (int(part) for part in str(data["at"]).split(":"))
+            except ValueError:
+                raise SceneError(f"Invalid time in {name}: {data['at']}")
+            if not (0 <= hour < 24 and 0 <= minute < 60):
+                raise SceneError(f"Invalid time in {name}: {data['at']}")
+            at = (hour, minute)
+        every = data.get("every")
+        if every is not None and (
+            isinstance(every, bool) or not isinstance(every, (int, float)) or every <= 0
+        ):
+            raise SceneError(f"Interval of {name} must be a positive number")
+        enabled = data.get("enabled", True)
+        if not isinstance(enabled, bool):
+            raise SceneError(f"'enabled' of {name} must be true or false")
+
+        days = tuple(day.lower()[:3] for day in data.get("days") or DAYS)
+        unknown = [day for day in days if day not in DAYS]
+        if unknown:
+            raise SceneError(f"Unknown days in {name}: {', '.join(unknown)}")
+        return cls(name, scene, at, days, every, enabled)
+
+    def to_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"scene": self.scene, "enabled": self.enabled}
+        if self.at is not None:
+            result["at"] = f"{self.at[0]:02d}:{self.at[1]:02d}"
+            result["days"] = list(self.days)
+        else:
+            result["every"] = self.every
+        return result
+
+    def next_run(self, after: float) -> Optional[float]:
+        """Get the first run strictly after a timestamp.
+
+        Args:
+            after (float): Unix timestamp
+
+        Returns:
+            Optional[float]: Unix timestamp of the next run, None if the
+                schedule never runs
+        """
+        if self.every is not None:
+            return after + self.every
+        start = datetime.fromtimestamp(after)
+        candidate = start.replace(
+            hour=self.at[0], minute=self.at[1], second=0, microsecond=0
+        )
+        for offset in range(8):
+            run = candidate + timedelta(days=offset)
+            if DAYS[run.weekday()] in self.days and run.timestamp() > after:
+                return run.timestamp()
+        return None
+
+
+@dataclass
+class ExecutionPlan:
+    """Commands needed to bring the devices of a scene to their targets."""
+
+    scene: str
+    commands: Dict[bool, List[str]] = field(
+        default_factory=lambda: {True: [], False: []}
+    )
+    skipped: List[str] = field(default_factory=list)
+    unknown: List[str] = field(default_factory=list)
+
+    @classmethod
+    def build(cls, scene: Scene, registry: Any, force: bool = False) -> "ExecutionPlan":
+        """Diff a scene against the cached device states.
+
+        Devices whose cached state already matches are skipped. Devices the
+        registry does not know (or whose entry expired) are always commanded.
+
+        Args:
+            scene (Scene): The compiled scene
+            registry (DeviceRegistry): Registry with the last-known states
+            force (bool): Command every device, whatever its cached state
+
+        Returns:
+            ExecutionPlan: The plan
+        """
+        plan = cls(scene.name)
+        for state, ip_addresses in ((True, scene.on), (False, scene.off)):
+            for ip_address in ip_addresses:
+                entry = registry.peek(ip_address)
+                if entry is None:
+                    plan.unknown.append(ip_address)
+                elif not force and entry.is_on is state:
+                    plan.skipped.append(ip_address)
+                    continue
+                plan.commands[state].append(ip_address)
+        return plan
+
+    @property
+    def size(self) -> int:
+        return len(self.commands[True]) + len(self.commands[False])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "scene": self.scene,
+            "turn_on": self.commands[True],
+            "turn_off": self.commands[False],
+            "skipped": self.skipped,
+            "unknown": self.unknown,
+        }
+
+
+class SceneStore:
+    """Scenes and schedules kept in a local JSON file.
+
+    Every change is written atomically before it takes effect in memory,
+    then bumps ``version`` and calls the listeners (the schedule runner).
+    Changes replace the ``scenes`` and ``schedules`` dicts instead of
+    mutating them, so readers on other threads see consistent snapshots.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """Initialize the store, loading the file if it exists.
+
+        Args:
+            path (Optional[str]): JSON file, None to keep everything in memory
+        """
+        self.path = path
+        self.scenes: Dict[str, Scene] = {}
+        self.schedules: Dict[str, Schedule] = {}
+        self.version = 0
+        self._listeners: List[Callable[[], None]] = []
+        if path and os.path.exists(path):
+            self.load()
+
+    @classmethod
+    def from_env(cls) -> "SceneStore":
+        """Build a store on KASA_SCENES_FILE (default kasa_scenes.json).
+
+        An unreadable file is logged and left untouched; the store then only
+        keeps changes in memory instead of overwriting it.
+        """
+        path = os.environ.get("KASA_SCENES_FILE", "kasa_scenes.json")
+        try:
+            return cls(path)
+        except (OSError, ValueError, SceneError) as e:
+            logger.error(f"Could not load scenes from {path}: {str(e)}")
+            return cls(None)
+
+    def on_change(self, listener: Callable[[], None]) -> None:
+        self._listeners.append(listener)
+
+    def load(self) -> None:
+        """Load and compile everything in the file.
+
+        Raises:
+            SceneError: If the file holds an invalid scene or schedule
+        """
+        with open(self.path, "r") as f:
+            data = json.load(f)
+        self.scenes = {
+            name: Scene.compile(name, targets)
+            for name, targets in (data.get("scenes") or {}).items()
+        }
+        self.schedules = {
+            name: Schedule.from_dict(name, schedule)
+            for name, schedule in (data.get("schedules") or {}).items()
+        }
+        self._changed()
+
+    def _save(self, scenes: Dict[str, Scene], schedules: Dict[str, Schedule]) -> None:
+        if not self.path:
+            return
+        data = {
+            "scenes": {name: s.to_dict() for name, s in scenes.items()},
+            "schedules": {name: s.to_dict() for name, s in schedules.items()},
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".scenes-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _commit(self, scenes: Dict[str, Scene], schedules: Dict[str, Schedule]) -> None:
+        """Write the new scenes and schedules, then make them current.
+
+        Raises:
+            OSError: If the file could not be written, nothing changes then
+        """
+        self._save(scenes, schedules)
+        self.scenes, self.schedules = scenes, schedules
+        self._changed()
+
+    def _changed(self) -> None:
+        self.version += 1
+        for listener in self._listeners:
+            listener()
+
+    def get_scene(self, name: str) -> Scene:
+        scene = self.scenes.get(name)
+        if scene is None:
+            raise SceneError(f"Unknown scene: {name}")
+        return scene
+
+    def put_scene(self, name: str, targets: Dict[str, Any]) -> Scene:
+        """Compile and store a scene, replacing one with the same name."""
+        scene = Scene.compile(name, targets)
+        self._commit({**self.scenes, name: scene}, self.schedules)
+        return scene
+
+    def delete_scene(self, name: str) -> None:
+        """Delete a scene that no schedule uses."""
+        self.get_scene(name)
+        users = [s.name for s in self.schedules.values() if s.scene == name]
+        if users:
+            raise SceneError(f"Scene {name} is used by: {', '.join(users)}")
+        scenes = {k: v for k, v in self.scenes.items() if k != name}
+        self._commit(scenes, self.schedules)
+
+    def put_schedule(self, name: str, data: Dict[str, Any]) -> Schedule:
+        """Validate and store a schedule, replacing one with the same name."""
+        schedule = Schedule.from_dict(name, data)
+        self.get_scene(schedule.scene)
+        self._commit(self.scenes, {**self.schedules, name: schedule})
+        return schedule
+
+    def delete_schedule(self, name: str) -> None:
+        if name not in self.schedules:
+            raise SceneError(f"Unknown schedule: {name}")
+        schedules = {k: v for k, v in self.schedules.items() if k != name}
+        self._commit(self.scenes, schedules)
+
+
+class ScheduleRunner:
+    """Runs schedules from a timer heap on the event loop.
+
+    The loop sleeps until the earliest run (or a store change) instead of
+    polling every schedule. Runs missed by more than ``grace`` seconds, e.g.
+    while the container was paused, are skipped rather than replayed.
+    """
+
+    def __init__(
+        self,
+        store: SceneStore,
+        apply: Callable[[str], Awaitable[Dict[str, Any]]],
+        grace: float = 60.0,
+        max_sleep: float = 60.0,
+    ):
+        """Initialize the runner.
+
+        Args:
+            store (SceneStore): Scenes and schedules
+            apply (Callable[[str], Awaitable[Dict[str, Any]]]): Applies a
+                scene by name
+            grace (float): Seconds a run may be late and still happen
+            max_sleep (float): Longest sleep, bounds the effect of wall
+                clock changes
+        """
+        self.store = store
+        self.apply = apply
+        self.grace = grace
+        self.max_sleep = max_sleep
+        self.runs = 0
+        self.missed = 0
+        self.last_runs: Dict[str, Dict[str, Any]] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._schedules: Dict[str, Schedule] = {}
+        self._version = -1
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        store.on_change(self.wake)
+
+    def wake(self) -> None:
+        """Re-read the schedules, callable from any thread."""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _sync(self, now: float) -> None:
+        """Update the heap for added, changed and deleted schedules.
+
+        Unchanged schedules keep their pending run, so saving an unrelated
+        scene or schedule does not push an interval schedule back.
+        """
+        schedules = self.store.schedules
+        changed = {
+            name
+            for name in schedules.keys() | self._schedules.keys()
+            if schedules.get(name) != self._schedules.get(name)
+        }
+        if changed:
+            self._heap = [entry for entry in self._heap if entry[1] not in changed]
+            for name in changed:
+                schedule = schedules.get(name)
+                if schedule is None or not schedule.enabled:
+                    continue
+                next_run = schedule.next_run(now)
+                if next_run is not None:
+                    self._heap.append((next_run, name))
+            heapq.heapify(self._heap)
+        self._schedules = schedules
+        self._version = self.store.version
+
+    async def run(self) -> None:
+        """Run schedules until cancelled."""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        while True:
+            self._wake.clear()
+            now = time.time()
+            if self._version != self.store.version:
+                self._sync(now)
+            if not self._heap or self._heap[0][0] > now:
+                timeout = self._heap[0][0] - now if self._heap else self.max_sleep
+                try:
+                    await asyncio.wait_for(
+                        self._wake.wait(), min(timeout, self.max_sleep)
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            due, name = heapq.heappop(self._heap)
+            schedule = self._schedules.get(name)
+            if schedule is None:
+                continue
+            if now - due <= self.grace:
+                asyncio.ensure_future(self._fire(schedule, due))
+            else:
+                logger.warning(f"Skipping run of {name} missed by {now - due:.0f}s")
+                self.missed += 1
+            next_run = schedule.next_run(max(now, due))
+            if next_run is not None:
+                heapq.heappush(self._heap, (next_run, name))
+
+    async def _fire(self, schedule: Schedule, due: float) -> None:
+        self.runs += 1
+        try:
+            result = await self.apply(schedule.scene)
+        except Exception as e:
+            logger.warning(f"Schedule {schedule.name} failed: {str(e)}")
+            result = {"success": False, "error": str(e)}
+        self.last_runs[schedule.name] = {
+            "due": due,
+            "at": time.time(),
+            "success": bool(result.get("success")),
+            "commands": result.get("commands", 0),
+        }
+
+    def upcoming(self) -> Dict[str, Optional[float]]:
+        """Get the next run of every enabled schedule."""
+        if self._version == self.store.version:
+            return {name: due for due, name in sorted(self._heap)}
+        now = time.time()
+        return {
+            s.name: s.next_run(now) if s.enabled else None
+            for s in self.store.schedules.values()
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._loop is not None,
+            "runs": self.runs,
+            "missed": self.missed,
+            "pending": len(self._heap),
+            "last_runs": self.last_runs,
+        }
+
+
+def _address_key(ip_address: str) -> Tuple[int, Any]:
+    # Numeric order, IPv4 before IPv6 (addresses of both are not comparable)
+    address = ipaddress.ip_address(ip_address)
+    return address.version, address
@@ -0,0 +1,233 @@
+import asyncio
+import json
+import time
+from datetime import datetime
+
+import pytest
+
+from .device_registry import DeviceRegistry
+from .handler import KasaDeviceManager, RequestHandler
+from .poller import StateTable
+from .scenes import (
+    ExecutionPlan,
+    Scene,
+    SceneError,
+    SceneStore,
+    Schedule,
+    ScheduleRunner,
+)
+from .simulator import KasaSimulator
+
+
+class FakeDevice:
+    def __init__(self, is_on):
+        self.is_on = is_on
+
+
+def test_scene_compile_splits_and_validates_targets():
+    scene = Scene.compile("night", {"10.0.0.2": False, "10.0.0.1": True})
+
+    assert scene.on == ("10.0.0.1",)
+    assert scene.off == ("10.0.0.2",)
+    assert scene.to_dict() == {"10.0.0.1": True, "10.0.0.2": False}
+    mixed = Scene.compile("all", {"10.0.0.10": True, "::1": True, "10.0.0.2": True})
+    assert mixed.on == ("10.0.0.2", "10.0.0.10", "::1")
+    with pytest.raises(SceneError):
+        Scene.compile("bad", {"lamp": True})
+    with pytest.raises(SceneError):
+        Scene.compile("bad", {"10.0.0.1": "on"})
+
+
+def test_plan_only_commands_devices_whose_cached_state_differs():
+    registry = DeviceRegistry()
+    registry.put("10.0.0.1", FakeDevice(True))
+    registry.put("10.0.0.2", FakeDevice(True))
+    scene = Scene.compile(
+        "evening", {"10.0.0.1": True, "10.0.0.2": False, "10.0.0.3": True}
+    )
+
+    plan = ExecutionPlan.build(scene, registry)
+    forced = ExecutionPlan.build(scene, registry, force=True)
+
+    assert plan.to_dict() == {
+        "scene": "evening",
+        "turn_on": ["10.0.0.3"],
+        "turn_off": ["10.0.0.2"],
+        "skipped": ["10.0.0.1"],
+        "unknown": ["10.0.0.3"],
+    }
+    assert forced.size == 3
+    # Planning does not count as registry use
+    assert registry.stats()["hits"] == registry.stats()["misses"] == 0
+
+
+def test_schedule_next_run():
+    monday = datetime(2024, 1, 1, 12, 0).timestamp()
+    daily = Schedule.from_dict("lights", {"scene": "on", "at": "18:30"})
+    weekend = Schedule.from_dict(
+        "late", {"scene": "on", "at": "07:00", "days": ["Sat", "sun"]}
+    )
+    interval = Schedule.from_dict("tick", {"scene": "on", "every": 90})
+
+    assert daily.next_run(monday) == datetime(2024, 1, 1, 18, 30).timestamp()
+    assert weekend.next_run(monday) == datetime(2024, 1, 6, 7, 0).timestamp()
+    assert interval.next_run(monday) == monday + 90
+    with pytest.raises(SceneError):
+        Schedule.from_dict("bad", {"scene": "on", "at": "25:00"})
+    with pytest.raises(SceneError):
+        Schedule.from_dict("bad", {"scene": "on", "at": "07:00", "every": 5})
+    paused = Schedule.from_dict("off", {"scene": "on", "every": 5, "enabled": False})
+    assert paused.enabled is False
+    for data in ({"every": True}, {"every": 5, "enabled": "false"}):
+        with pytest.raises(SceneError):
+            Schedule.from_dict("bad", {"scene": "on", **data})
+
+
+def test_store_persists_atomically(tmp_path):
+    path = str(tmp_path / "scenes.json")
+    store = SceneStore(path)
+    store.put_scene("evening", {"10.0.0.1": True})
+    store.put_schedule("dusk", {"scene": "evening", "at": "18:30"})
+
+    with pytest.raises(SceneError):
+        store.delete_scene("evening")
+    with pytest.raises(SceneError):
+        store.put_schedule("dawn", {"scene": "missing", "every": 10})
+
+    reloaded = SceneStore(path)
+    assert reloaded.scenes == store.scenes
+    assert reloaded.schedules == store.schedules
+    assert json.load(open(path))["schedules"]["dusk"]["at"] == "18:30"
+    assert [p.name for p in tmp_path.iterdir()] == ["scenes.json"]
+
+
+def test_failed_save_leaves_store_unchanged(tmp_path):
+    store = SceneStore(str(tmp_path / "scenes.json"))
+    store.put_scene("evening", {"10.0.0.1": True})
+    store.put_schedule("dusk", {"scene": "evening", "at": "18:30"})
+    changes = []
+    store.on_change(lambda: changes.append(store.version))
+    scenes, schedules, version = store.scenes, store.schedules, store.version
+
+    store.path = str(tmp_path / "gone" / "scenes.json")
+    with pytest.raises(OSError):
+        store.put_scene("night", {"10.0.0.1": False})
+    with pytest.raises(OSError):
+        store.put_schedule("dusk", {"scene": "evening", "every": 60})
+    with pytest.raises(OSError):
+        store.delete_schedule("dusk")
+
+    assert (store.scenes, store.schedules) == (scenes, schedules)
+    assert store.schedules["dusk"].at is not None
+    assert (store.version, changes) == (version, [])
+    assert SceneStore(str(tmp_path / "scenes.json")).scenes == scenes
+
+
+def test_runner_fires_due_schedules_in_order():
+    store = SceneStore()
+    store.put_scene("a", {"10.0.0.1": True})
+    store.put_scene("b", {"10.0.0.1": False})
+    applied = []
+
+    async def apply(name):
+        applied.append((name, time.time()))
+        return {"success": True, "commands": 1}
+
+    async def run():
+        runner = ScheduleRunner(store, apply)
+        task = asyncio.ensure_future(runner.run())
+        await asyncio.sleep(0.01)
+        # Changes wake the sleeping runner up
+        store.put_schedule("slow", {"scene": "b", "every": 0.12})
+        store.put_schedule("fast", {"scene": "a", "every": 0.05})
+        await asyncio.sleep(0.2)
+        store.delete_schedule("fast")
+        store.delete_schedule("slow")
+        await asyncio.sleep(0.1)
+        task.cancel()
+        return runner
+
+    runner = asyncio.run(run())
+    names = [name for name, _ in applied]
+
+    assert names[:3] == ["a", "a", "b"]
+    assert names.count("a") in (3, 4) and names.count("b") == 1
+    assert runner.stats()["last_runs"]["fast"]["success"] is True
+    assert runner.stats()["pending"] == 0
+
+
+def test_unrelated_changes_do_not_delay_interval_schedules():
+    store = SceneStore()
+    store.put_scene("a", {"10.0.0.1": True})
+    applied = []
+
+    async def apply(name):
+        applied.append(time.monotonic())
+        return {"success": True}
+
+    async def run():
+        runner = ScheduleRunner(store, apply)
+        task = asyncio.ensure_future(runner.run())
+        await asyncio.sleep(0.01)
+        start = time.monotonic()
+        store.put_schedule("tick", {"scene": "a", "every": 0.2})
+        for i in range(3):
+            await asyncio.sleep(0.05)
+            store.put_scene(f"other-{i}", {"10.0.0.2": False})
+        await asyncio.sleep(0.1)
+        task.cancel()
+        return start
+
+    start = asyncio.run(run())
+    assert len(applied) == 1
+    assert applied[0] - start < 0.3
+
+
+def test_apply_scene_against_simulated_plugs(tmp_path):
+    async def run():
+        async with KasaSimulator(3, first_host="127.0.4.1", hub="127.0.0.5") as sim:
+            manager = KasaDeviceManager(
+                discovery_timeout=1,
+                registry=DeviceRegistry(),
+                states=StateTable(),
+                discovery_target=sim.hub,
+            )
+            handler = RequestHandler(
+                manager,
+                groups={"rest": sim.hosts[1:]},
+                scenes=SceneStore(str(tmp_path / "scenes.json")),
+            )
+            saved = await handler.process_request(
+                {
+                    "action": "save_scene",
+                    "name": "evening",
+                    "targets": {sim.hosts[0]: True},
+                    "groups": {"rest": False},
+                }
+            )
+            await handler.process_request({"action": "get_device_list"})
+            dry_run = await handler.process_request(
+                {"action": "apply_scene", "name": "evening", "dry_run": True}
+            )
+            applied = await handler.process_request(
+                {"action": "apply_scene", "name": "evening"}
+            )
+            again = await handler.process_request(
+                {"action": "apply_scene", "name": "evening"}
+            )
+            missing = await handler.process_request(
+                {"action": "apply_scene", "name": "morning"}
+            )
+            return sim, saved, dry_run, applied, again, missing
+
+    sim, saved, dry_run, applied, again, missing = asyncio.run(run())
+
+    assert saved["success"] and len(saved["targets"]) == 3
+    # The plugs start off, so only the first one needs a command
+    assert dry_run["plan"]["turn_on"] == [sim.hosts[0]]
+    assert dry_run["plan"]["skipped"] == sim.hosts[1:]
+    assert applied["success"] and applied["commands"] == 1
+    assert again["success"] and again["commands"] == 0
+    assert [plug.relay_state for plug in sim.plugs] == [1, 0, 0]
+    assert [plug.commands for plug in sim.plugs] == [1, 0, 0]
+    assert missing == {"success": False, "error": "Unknown scene: morning"}
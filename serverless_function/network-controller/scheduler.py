@@ -0,0 +1,195 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+TOGGLE = "toggle"
+SET_STATE = "set_state"
+
+
+@dataclass
+class Command:
+    """A pending device command and the callers waiting for its result."""
+
+    kind: str
+    power_state: Optional[bool] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+    waiters: List[asyncio.Future] = field(default_factory=list)
+
+
+class CommandScheduler:
+    """Serializes commands per device while running devices in parallel.
+
+    Each device has its own queue drained by its own worker task. Commands
+    that have not started yet are coalesced: two toggles cancel out, a toggle
+    after a set_state inverts it, and a set_state replaces everything queued
+    before it (last one wins). Every caller still gets a result.
+
+    A caller that stops waiting withdraws its command if it has not started
+    yet; a command that is already running (or coalesced with one another
+    caller still waits for) is reported as pending instead.
+    """
+
+    def __init__(
+        self,
+        toggle: Callable[[str], Awaitable[Dict[str, Any]]],
+        set_state: Callable[[str, bool], Awaitable[Dict[str, Any]]],
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            toggle (Callable[[str], Awaitable[Dict[str, Any]]]): Toggles a device now
+            set_state (Callable[[str, bool], Awaitable[Dict[str, Any]]]): Sets a
+                device state now
+        """
+        self._toggle = toggle
+        self._set_state = set_state
+        self._queues: Dict[str, Deque[Command]] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self.submitted = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.withdrawn = 0
+        self.max_depth = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    async def submit(
+        self,
+        ip_address: str,
+        kind: str,
+        power_state: Optional[bool] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Queue a command for a device and wait for its result.
+
+        Args:
+            ip_address (str): Device IP address
+            kind (str): TOGGLE or SET_STATE
+            power_state (Optional[bool]): Target state for SET_STATE
+            timeout (Optional[float]): Seconds to wait for the result, None
+                to wait until the command ran
+
+        Returns:
+            Dict[str, Any]: Result of the (possibly coalesced) command. On
+                timeout, an error if the command was withdrawn before it
+                started, otherwise ``pending`` set as it will still run.
+        """
+        waiter = asyncio.get_running_loop().create_future()
+        self.submitted += 1
+        queue = self._queues.setdefault(ip_address, deque())
+        self._enqueue(ip_address, queue, Command(kind, power_state, waiters=[waiter]))
+        self.max_depth = max(self.max_depth, len(queue))
+
+        if ip_address not in self._workers:
+            self._workers[ip_address] = asyncio.ensure_future(self._drain(ip_address))
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            if self._withdraw(ip_address, waiter):
+                return {
+                    "success": False,
+                    "device": ip_address,
+                    "error": f"Timed out after {timeout}s, command withdrawn",
+                }
+            return {
+                "success": False,
+                "pending": True,
+                "device": ip_address,
+                "message": f"No result after {timeout}s, the command still runs",
+            }
+        except asyncio.CancelledError:
+            self._withdraw(ip_address, waiter)
+            raise
+
+    def _withdraw(self, ip_address: str, waiter: asyncio.Future) -> bool:
+        """Stop waiting for a queued command, dropping it if nobody else waits.
+
+        Returns:
+            bool: True if the command was dropped before it started
+        """
+        queue = self._queues.get(ip_address, ())
+        for i, command in enumerate(queue):
+            if any(w is waiter for w in command.waiters):
+                command.waiters = [w for w in command.waiters if w is not waiter]
+                if command.waiters:
+                    return False
+                del queue[i]
+                self.withdrawn += 1
+                return True
+        return False
+
+    def _enqueue(
+        self, ip_address: str, queue: Deque[Command], command: Command
+    ) -> None:
+        """Append a command, coalescing it with the pending ones."""
+        if command.kind == SET_STATE:
+            while queue:
+                pending = queue.pop()
+                command.waiters[:0] = pending.waiters
+                command.enqueued_at = pending.enqueued_at
+                self.coalesced += 1
+            queue.append(command)
+            return
+
+        if not queue:
+            queue.append(command)
+            return
+
+        last = queue[-1]
+        self.coalesced += 1
+        if last.kind == SET_STATE:
+            last.power_state = not last.power_state
+            last.waiters.extend(command.waiters)
+            return
+
+        # toggle + toggle: nothing to do
+        queue.pop()
+        self._resolve(
+            last.waiters + command.waiters,
+            {"success": True, "device": ip_address, "coalesced": True},
+        )
+
+    async def _drain(self, ip_address: str) -> None:
+        queue = self._queues[ip_address]
+        try:
+            while queue:
+                command = queue.popleft()
+                waited = time.monotonic() - command.enqueued_at
+                self.wait_time_total += waited
+                self.wait_time_max = max(self.wait_time_max, waited)
+                try:
+                    if command.kind == TOGGLE:
+                        result = await self._toggle(ip_address)
+                    else:
+                        result = await self._set_state(ip_address, command.power_state)
+                except Exception as e:
+                    result = {"success": False, "error": str(e)}
+                self.executed += 1
+                self._resolve(command.waiters, result)
+        finally:
+            del self._workers[ip_address]
+            if not queue:
+                del self._queues[ip_address]
+
+    @staticmethod
+    def _resolve(waiters: List[asyncio.Future], result: Dict[str, Any]) -> None:
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth, coalescing and wait-time metrics."""
+        return {
+            "submitted": self.submitted,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "withdrawn": self.withdrawn,
+            "queue_depth": {ip: len(q) for ip, q in self._queues.items() if q},
+            "max_queue_depth": self.max_depth,
+            "wait_time_avg": (
+                self.wait_time_total / self.executed if self.executed else 0.0
+            ),
+            "wait_time_max": self.wait_time_max,
+        }
@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+from .scheduler import SET_STATE, TOGGLE, CommandScheduler
+
+
+class Recorder:
+    """Executes commands after a delay and records what actually ran."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = []
+
+    async def toggle(self, ip_address):
+        return await self._run(ip_address, TOGGLE, None)
+
+    async def set_state(self, ip_address, power_state):
+        return await self._run(ip_address, SET_STATE, power_state)
+
+    async def _run(self, ip_address, kind, power_state):
+        start = time.monotonic()
+        await asyncio.sleep(self.delay)
+        self.calls.append((ip_address, kind, power_state, start))
+        return {"success": True, "device": ip_address, "new_state": power_state}
+
+
+def run_commands(commands, delay=0.05):
+    """Submit (ip, kind, power_state) commands in order.
+
+    The first command keeps the device busy, so the rest are still queued
+    and can coalesce.
+    """
+    recorder = Recorder(delay)
+    scheduler = CommandScheduler(recorder.toggle, recorder.set_state)
+
+    async def run():
+        tasks = []
+        for ip_address, kind, power_state in commands:
+            tasks.append(
+                asyncio.ensure_future(scheduler.submit(ip_address, kind, power_state))
+            )
+            await asyncio.sleep(0)
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(run())
+    calls = [(ip, kind, state) for ip, kind, state, _ in recorder.calls]
+    return results, calls, scheduler.stats()
+
+
+def test_two_toggles_cancel_out():
+    ip = "10.0.0.1"
+    results, calls, stats = run_commands(
+        [(ip, SET_STATE, True), (ip, TOGGLE, None), (ip, TOGGLE, None)]
+    )
+
+    assert calls == [(ip, SET_STATE, True)]
+    coalesced = {"success": True, "device": ip, "coalesced": True}
+    assert results[1] == results[2] == coalesced
+    assert (stats["submitted"], stats["executed"], stats["coalesced"]) == (3, 1, 1)
+
+
+def test_toggle_after_pending_set_state_inverts_it():
+    ip = "10.0.0.1"
+    results, calls, _ = run_commands(
+        [(ip, SET_STATE, False), (ip, SET_STATE, True), (ip, TOGGLE, None)]
+    )
+
+    assert calls == [(ip, SET_STATE, False), (ip, SET_STATE, False)]
+    # Both coalesced callers get the result of the one command that ran
+    assert results[1] is results[2]
+
+
+def test_last_set_state_wins():
+    ip = "10.0.0.1"
+    results, calls, stats = run_commands(
+        [
+            (ip, SET_STATE, False),
+            (ip, TOGGLE, None),
+            (ip, SET_STATE, False),
+            (ip, SET_STATE, True),
+        ]
+    )
+
+    assert calls == [(ip, SET_STATE, False), (ip, SET_STATE, True)]
+    assert results[1] is results[2] is results[3]
+    assert results[3]["new_state"] is True
+    assert stats["coalesced"] == 2
+
+
+def test_commands_run_in_order_per_device_and_in_parallel_across_devices():
+    recorder = Recorder(delay=0.05)
+    scheduler = CommandScheduler(recorder.toggle, recorder.set_state)
+
+    async def run():
+        tasks = [
+            asyncio.ensure_future(scheduler.submit("10.0.0.1", SET_STATE, False)),
+            asyncio.ensure_future(scheduler.submit("10.0.0.2", SET_STATE, True)),
+        ]
+        # Each later command arrives while the previous one runs
+        for kind, power_state in ((SET_STATE, True), (TOGGLE, None)):
+            await asyncio.sleep(0.03)
+            tasks.append(
+                asyncio.ensure_future(scheduler.submit("10.0.0.1", kind, power_state))
+            )
+        return await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+
+    device = [c for c in recorder.calls if c[0] == "10.0.0.1"]
+    assert [(kind, state) for _, kind, state, _ in device] == [
+        (SET_STATE, False),
+        (SET_STATE, True),
+        (TOGGLE, None),
+    ]
+    starts = [start for *_, start in device]
+    assert starts[1] - starts[0] >= 0.05 and starts[2] - starts[1] >= 0.05
+    other = [start for ip, *_, start in recorder.calls if ip == "10.0.0.2"]
+    assert abs(other[0] - starts[0]) < 0.02
+    assert scheduler.stats()["coalesced"] == 0
+    assert scheduler.stats()["queue_depth"] == {}
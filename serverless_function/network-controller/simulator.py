@@ -0,0 +1,279 @@
+"""Local simulator for TP-Link Kasa smart plugs.
+
+Runs any number of fake plugs on loopback addresses, each answering the
+legacy Kasa protocol on port 9999: XOR-"encrypted" JSON over UDP for
+discovery and length-prefixed XOR JSON over TCP for commands. A discovery
+hub address relays a discovery datagram to every plug, so that
+``Discover.discover(target=hub)`` behaves like a broadcast on a real LAN.
+
+Usage:
+    python simulator.py --count 10
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import struct
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+KASA_PORT = 9999
+UNSUPPORTED = {"err_code": -1, "err_msg": "module not support"}
+_LENGTH = struct.Struct(">I")
+
+
+def xor_encrypt(payload: bytes) -> bytes:
+    """Apply the Kasa autokey XOR cipher (initial key 171)."""
+    key = 171
+    out = bytearray(len(payload))
+    for i, byte in enumerate(payload):
+        key ^= byte
+        out[i] = key
+    return bytes(out)
+
+
+def xor_decrypt(payload: bytes) -> bytes:
+    """Reverse the Kasa autokey XOR cipher."""
+    key = 171
+    out = bytearray(len(payload))
+    for i, byte in enumerate(payload):
+        out[i] = key ^ byte
+        key = byte
+    return bytes(out)
+
+
+class FakeKasaPlug:
+    """State and protocol handling of one simulated plug."""
+
+    def __init__(self, host: str, index: int, emeter: bool = True):
+        """Initialize the plug.
+
+        Args:
+            host (str): Loopback address the plug listens on
+            index (int): Index used to derive alias, MAC and ids
+            emeter (bool): Simulate an energy meter (HS110) or not (HS100)
+        """
+        self.host = host
+        self.emeter = emeter
+        self.relay_state = 0
+        self.commands = 0
+        mac = ":".join(
+            f"{b:02X}" for b in bytes((0x50, 0xC7, 0xBF)) + index.to_bytes(3, "big")
+        )
+        self.sysinfo: Dict[str, Any] = {
+            "sw_ver": "1.5.4 Build 180815 Rel.121440",
+            "hw_ver": "2.0",
+            "type": "IOT.SMARTPLUGSWITCH",
+            "model": "HS110(EU)" if emeter else "HS100(EU)",
+            "dev_name": "Simulated Smart Plug",
+            "mac": mac,
+            "deviceId": f"{index:040X}",
+            "hwId": f"{index:032X}",
+            "oemId": f"{index:032X}",
+            "alias": f"sim-plug-{index}",
+            "icon_hash": "",
+            "feature": "TIM:ENE" if emeter else "TIM",
+            "updating": 0,
+            "rssi": -40 - index % 30,
+            "led_off": 0,
+            "latitude_i": 0,
+            "longitude_i": 0,
+            "on_time": 0,
+            "active_mode": "none",
+            "next_action": {"type": -1},
+            "err_code": 0,
+        }
+
+    def get_sysinfo(self) -> Dict[str, Any]:
+        return {**self.sysinfo, "relay_state": self.relay_state}
+
+    def get_realtime(self) -> Dict[str, Any]:
+        power = 42000 * self.relay_state
+        return {
+            "voltage_mv": 230000,
+            "current_ma": power // 230,
+            "power_mw": power,
+            "total_wh": 1000,
+            "err_code": 0,
+        }
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer a decoded protocol request."""
+        response: Dict[str, Any] = {}
+        for module, methods in request.items():
+            if not isinstance(methods, dict):
+                response[module] = UNSUPPORTED
+                continue
+            answers = {}
+            for method, params in methods.items():
+                answers[method] = self._call(module, method, params or {})
+            response[module] = answers
+        return response
+
+    def _call(self, module: str, method: str, params: Dict[str, Any]) -> Any:
+        if module == "system" and method == "get_sysinfo":
+            return self.get_sysinfo()
+        if module == "system" and method == "set_relay_state":
+            self.commands += 1
+            self.relay_state = int(params.get("state", 0))
+            return {"err_code": 0}
+        if module == "emeter" and method == "get_realtime" and self.emeter:
+            return self.get_realtime()
+        if module == "time" and method == "get_time":
+            now = time.gmtime()
+            return {
+                "year": now.tm_year,
+                "month": now.tm_mon,
+                "mday": now.tm_mday,
+                "hour": now.tm_hour,
+                "min": now.tm_min,
+                "sec": now.tm_sec,
+                "err_code": 0,
+            }
+        if module == "time" and method == "get_timezone":
+            return {"index": 39, "err_code": 0}
+        return UNSUPPORTED
+
+
+class _PlugDiscovery(asyncio.DatagramProtocol):
+    def __init__(self, plug: FakeKasaPlug):
+        self.plug = plug
+        self.transport: Optional[asyncio.DatagramTransport] = None
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def reply(self, addr: Tuple[str, int]) -> None:
+        payload = json.dumps({"system": {"get_sysinfo": self.plug.get_sysinfo()}})
+        self.transport.sendto(xor_encrypt(payload.encode()), addr)
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        self.reply(addr)
+
+
+class _DiscoveryHub(asyncio.DatagramProtocol):
+    def __init__(self, simulator: "KasaSimulator"):
+        self.simulator = simulator
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        for responder in self.simulator._responders:
+            responder.reply(addr)
+
+
+class KasaSimulator:
+    """Runs ``count`` fake plugs on consecutive loopback addresses."""
+
+    def __init__(
+        self,
+        count: int,
+        first_host: str = "127.0.1.1",
+        hub: str = "127.0.0.2",
+        latency: float = 0.0,
+        emeter: bool = True,
+    ):
+        """Initialize the simulator.
+
+        Args:
+            count (int): Number of plugs
+            first_host (str): Address of the first plug, the others follow it
+            hub (str): Address answering discovery for every plug
+            latency (float): Delay added to every TCP command in seconds
+            emeter (bool): Simulate plugs with energy meters
+        """
+        self.hub = hub
+        self.latency = latency
+        start = ipaddress.IPv4Address(first_host)
+        self.plugs: List[FakeKasaPlug] = [
+            FakeKasaPlug(str(start + i), i, emeter=emeter) for i in range(count)
+        ]
+        self._servers: List[asyncio.AbstractServer] = []
+        self._transports: List[asyncio.DatagramTransport] = []
+        self._responders: List[_PlugDiscovery] = []
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+    @property
+    def hosts(self) -> List[str]:
+        return [plug.host for plug in self.plugs]
+
+    def plug(self, host: str) -> FakeKasaPlug:
+        return next(p for p in self.plugs if p.host == host)
+
+    async def _serve(self, plug: FakeKasaPlug, reader, writer) -> None:
+        self._writers.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(_LENGTH.size)
+                body = await reader.readexactly(_LENGTH.unpack(header)[0])
+                request = json.loads(xor_decrypt(body))
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                payload = json.dumps(plug.handle(request)).encode()
+                writer.write(_LENGTH.pack(len(payload)) + xor_encrypt(payload))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def start(self) -> "KasaSimulator":
+        """Bind every plug and the discovery hub."""
+        loop = asyncio.get_running_loop()
+        for plug in self.plugs:
+            server = await asyncio.start_server(
+                lambda r, w, plug=plug: self._serve(plug, r, w), plug.host, KASA_PORT
+            )
+            self._servers.append(server)
+            transport, responder = await loop.create_datagram_endpoint(
+                lambda plug=plug: _PlugDiscovery(plug),
+                local_addr=(plug.host, KASA_PORT),
+            )
+            self._transports.append(transport)
+            self._responders.append(responder)
+
+        # 20002/20004 receive the discovery query of newer protocols, ignored here
+        hub_protocols = {
+            KASA_PORT: lambda: _DiscoveryHub(self),
+            20002: asyncio.DatagramProtocol,
+            20004: asyncio.DatagramProtocol,
+        }
+        for port, protocol in hub_protocols.items():
+            transport, _ = await loop.create_datagram_endpoint(
+                protocol, local_addr=(self.hub, port)
+            )
+            self._transports.append(transport)
+        return self
+
+    async def stop(self) -> None:
+        """Close every socket."""
+        for writer in list(self._writers):
+            writer.close()
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        for transport in self._transports:
+            transport.close()
+        self._servers.clear()
+        self._transports.clear()
+        self._responders.clear()
+
+    async def __aenter__(self) -> "KasaSimulator":
+        return await self.start()
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.stop()
+
+
+async def _main(args: argparse.Namespace) -> None:
+    async with KasaSimulator(args.count, latency=args.latency) as simulator:
+        print(f"{args.count} plugs on {simulator.hosts[0]}..{simulator.hosts[-1]}")
+        print(f"discovery target: {simulator.hub}")
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run simulated Kasa plugs")
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0)
+    asyncio.run(_main(parser.parse_args()))
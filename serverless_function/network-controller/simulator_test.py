@@ -0,0 +1,100 @@
+import asyncio
+
+from .device_registry import DeviceRegistry
+from .handler import KasaDeviceManager, RequestHandler
+from .poller import StateTable
+from .simulator import KasaSimulator
+
+
+def make_handler(simulator):
+    manager = KasaDeviceManager(
+        discovery_timeout=1,
+        registry=DeviceRegistry(),
+        states=StateTable(),
+        discovery_target=simulator.hub,
+    )
+    return RequestHandler(manager, groups={"all": simulator.hosts})
+
+
+def test_commands_against_simulated_plugs():
+    async def run():
+        async with KasaSimulator(3, first_host="127.0.2.1", hub="127.0.0.3") as sim:
+            handler = make_handler(sim)
+            listed = await handler.process_request(
+                {"action": "get_device_list", "fields": ["ip", "is_on"]}
+            )
+            toggled = await handler.process_request(
+                {"action": "toggle_device", "ip_address": sim.hosts[0]}
+            )
+            batch = await handler.process_request(
+                {"action": "batch_device_state", "group": "all", "power_state": False}
+            )
+            stats = await handler.process_request({"action": "get_stats"})
+            return sim, listed, toggled, batch, stats
+
+    sim, listed, toggled, batch, stats = asyncio.run(run())
+
+    assert listed == {"devices": [{"ip": h, "is_on": False} for h in sim.hosts]}
+    assert toggled["success"] and toggled["new_state"] is True
+    assert batch["success"] and not batch["failed"]
+    assert [plug.relay_state for plug in sim.plugs] == [0, 0, 0]
+    # Everything after the initial broadcast was served from the registry
+    assert stats["registry"]["misses"] == 0
+    assert stats["discovery"]["calls"] == 1
+
+
+def test_stale_registry_entry_falls_back_to_discovery():
+    class StaleDevice:
+        is_on = None
+
+        async def update(self):
+            raise ConnectionResetError("Connection reset by peer")
+
+    async def run():
+        async with KasaSimulator(1, first_host="127.0.3.1", hub="127.0.0.4") as sim:
+            handler = make_handler(sim)
+            handler.kasa_manager.registry.put(sim.hosts[0], StaleDevice())
+            result = await handler.process_request(
+                {
+                    "action": "set_device_state",
+                    "ip_address": sim.hosts[0],
+                    "power_state": True,
+                }
+            )
+            entry = handler.kasa_manager.registry.peek(sim.hosts[0])
+            return sim, result, entry
+
+    sim, result, entry = asyncio.run(run())
+
+    assert result["success"]
+    assert sim.plugs[0].relay_state == 1
+    assert not isinstance(entry.device, StaleDevice) and entry.is_on is True
+
+
+def test_per_request_mode_does_not_reuse_handles_across_loops(monkeypatch):
+    from . import handler as handler_module
+    from .runtime import BackgroundLoop
+
+    server_loop = BackgroundLoop(name="simulator")
+    sim = KasaSimulator(1, first_host="127.0.5.1", hub="127.0.0.6")
+    server_loop.submit(sim.start(), timeout=5)
+    shared_registry = DeviceRegistry()
+    monkeypatch.setattr(handler_module, "device_registry", shared_registry)
+    try:
+        results = [
+            handler_module.run_per_request(
+                {
+                    "action": "set_device_state",
+                    "ip_address": sim.hosts[0],
+                    "power_state": power_state,
+                }
+            )
+            for power_state in (True, False, True)
+        ]
+    finally:
+        server_loop.submit(sim.stop(), timeout=5)
+
+    assert [r["success"] for r in results] == [True, True, True]
+    assert sim.plugs[0].relay_state == 1
+    # Handles from closed loops never reach the process-wide registry
+    assert len(shared_registry) == 0
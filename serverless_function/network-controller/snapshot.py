@@ -0,0 +1,191 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+EMETER_FIELDS = ("power", "voltage", "current", "total")
+
+
+def _read_attr(device: Any, name: str) -> Any:
+    """Read a device property, treating unavailable values as None."""
+    try:
+        return getattr(device, name, None)
+    except Exception:
+        return None
+
+
+def emeter_values(realtime: Any) -> Dict[str, float]:
+    """Extract the emeter values from a realtime reading.
+
+    Args:
+        realtime (Any): An EmeterStatus or plain dict
+
+    Returns:
+        Dict[str, float]: The available values of EMETER_FIELDS
+    """
+    values = {}
+    for name in EMETER_FIELDS:
+        value = getattr(realtime, name, None)
+        if value is None and isinstance(realtime, dict):
+            value = realtime.get(name)
+        if value is not None:
+            values[name] = value
+    return values
+
+
+def read_emeter(device: Any) -> Optional[Dict[str, float]]:
+    """Read the cached realtime emeter values of a device.
+
+    Args:
+        device (Any): An updated Kasa device
+
+    Returns:
+        Optional[Dict[str, float]]: Emeter values, or None if the device has no emeter
+    """
+    try:
+        if not getattr(device, "has_emeter", False):
+            return None
+        return emeter_values(device.emeter_realtime)
+    except Exception:
+        return None
+
+
+class DeviceSnapshot:
+    """Compact, JSON-friendly view of a Kasa device."""
+
+    FIELDS = ("ip", "alias", "model", "mac", "is_on", "rssi", "emeter")
+    __slots__ = FIELDS
+
+    def __init__(
+        self,
+        ip: str,
+        alias: Optional[str] = None,
+        model: Optional[str] = None,
+        mac: Optional[str] = None,
+        is_on: Optional[bool] = None,
+        rssi: Optional[int] = None,
+        emeter: Optional[Dict[str, float]] = None,
+    ):
+        self.ip = ip
+        self.alias = alias
+        self.model = model
+        self.mac = mac
+        self.is_on = is_on
+        self.rssi = rssi
+        self.emeter = emeter
+
+    @classmethod
+    def from_device(cls, ip: str, device: Any) -> "DeviceSnapshot":
+        """Build a snapshot from a Kasa device handle.
+
+        Args:
+            ip (str): The IP address of the device
+            device (Any): The device handle
+
+        Returns:
+            DeviceSnapshot: The snapshot
+        """
+        return cls(
+            ip=ip,
+            alias=_read_attr(device, "alias"),
+            model=_read_attr(device, "model"),
+            mac=_read_attr(device, "mac"),
+            is_on=_read_attr(device, "is_on"),
+            rssi=_read_attr(device, "rssi"),
+            emeter=read_emeter(device),
+        )
+
+    @classmethod
+    def validate_fields(cls, fields: Optional[Iterable[str]]) -> Sequence[str]:
+        """Validate a field projection.
+
+        Args:
+            fields (Optional[Iterable[str]]): Requested fields (a list or a
+                comma-separated string), None for all
+
+        Returns:
+            Sequence[str]: The fields to include
+
+        Raises:
+            ValueError: If an unknown field is requested
+        """
+        if fields is None:
+            return cls.FIELDS
+        if isinstance(fields, str):
+            fields = fields.split(",")
+        fields = tuple(f.strip() for f in fields)
+        unknown = [f for f in fields if f not in cls.FIELDS]
+        if unknown:
+            raise ValueError(
+                f"Unknown fields: {', '.join(unknown)}. "
+                f"Valid fields are: {', '.join(cls.FIELDS)}"
+            )
+        return fields
+
+    def to_dict(self, fields: Sequence[str] = FIELDS) -> Dict[str, Any]:
+        """Convert to a dictionary limited to ``fields``.
+
+        Args:
+            fields (Sequence[str]): Validated fields to include
+
+        Returns:
+            Dict[str, Any]: The projected snapshot
+        """
+        return {name: getattr(self, name) for name in fields}
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, DeviceSnapshot):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.FIELDS)
+
+    def __repr__(self) -> str:
+        return (
+            f"DeviceSnapshot({self.ip!r}, alias={self.alias!r}, is_on={self.is_on!r})"
+        )
+
+
+def project_snapshots(
+    snapshots: Iterable[DeviceSnapshot], fields: Sequence[str] = DeviceSnapshot.FIELDS
+) -> List[Dict[str, Any]]:
+    """Project several snapshots onto the same fields.
+
+    Args:
+        snapshots (Iterable[DeviceSnapshot]): Snapshots to project
+        fields (Sequence[str]): Validated fields to include
+
+    Returns:
+        List[Dict[str, Any]]: Projected snapshots
+    """
+    getters = [(name, DeviceSnapshot.__dict__[name].__get__) for name in fields]
+    return [{name: get(snapshot) for name, get in getters} for snapshot in snapshots]
+
+
+def _encode_default(obj: Any) -> Any:
+    if isinstance(obj, DeviceSnapshot):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(separators=(",", ":"), default=_encode_default)
+
+
+def dumps(result: Any) -> str:
+    """Serialize a response compactly, encoding snapshots inline.
+
+    Args:
+        result (Any): The response
+
+    Returns:
+        str: JSON document
+    """
+    return _encoder.encode(result)
+
+
+def dumps_ndjson(items: Iterable[Any]) -> str:
+    """Serialize items as newline-delimited JSON.
+
+    Args:
+        items (Iterable[Any]): One item per line
+
+    Returns:
+        str: NDJSON document
+    """
+    return "".join(_encoder.encode(item) + "\n" for item in items)
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from .snapshot import DeviceSnapshot, dumps, project_snapshots
+
+
+class FakePlug:
+    alias = "Lamp"
+    model = "HS110"
+    mac = "AA:BB"
+    is_on = True
+    has_emeter = True
+    emeter_realtime = {"power": 4.5, "voltage": 230.1}
+
+    @property
+    def rssi(self):
+        raise AttributeError("not reported")
+
+
+def test_validate_fields_defaults_to_all_and_rejects_unknown_fields():
+    assert DeviceSnapshot.validate_fields(None) == DeviceSnapshot.FIELDS
+    assert DeviceSnapshot.validate_fields("ip, is_on") == ("ip", "is_on")
+    assert DeviceSnapshot.validate_fields(["alias"]) == ("alias",)
+    with pytest.raises(ValueError, match="Unknown fields: power, ssid"):
+        DeviceSnapshot.validate_fields(["ip", "power", "ssid"])
+
+
+def test_snapshots_are_projected_onto_the_requested_fields():
+    first = DeviceSnapshot.from_device("10.0.0.1", FakePlug())
+    second = DeviceSnapshot("10.0.0.2", is_on=False)
+
+    assert first.rssi is None
+    assert first.emeter == {"power": 4.5, "voltage": 230.1}
+    fields = DeviceSnapshot.validate_fields("ip,is_on")
+    assert project_snapshots([first, second], fields) == [
+        {"ip": "10.0.0.1", "is_on": True},
+        {"ip": "10.0.0.2", "is_on": False},
+    ]
+    assert project_snapshots([second])[0] == second.to_dict()
+    assert list(project_snapshots([second])[0]) == list(DeviceSnapshot.FIELDS)
+    assert json.loads(dumps({"devices": [second]}))["devices"][0]["ip"] == "10.0.0.2"
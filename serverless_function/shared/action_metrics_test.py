@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+from .action_metrics import ActionMetrics
+from .prometheus import Histogram, escape_label
+
+
+def test_actions_are_aggregated_across_threads_and_targets():
+    metrics = ActionMetrics("kasa", max_targets=2)
+    with metrics.track("get_device", "10.0.0.1") as outcome:
+        outcome.error = True
+
+    def work(target):
+        for _ in range(10):
+            with metrics.track("toggle_device", target):
+                pass
+
+    threads = [threading.Thread(target=work, args=(f"10.0.0.{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with pytest.raises(RuntimeError):
+        with metrics.track("get_device"):
+            raise RuntimeError("unreachable")
+
+    summary = metrics.summary()
+    assert summary["toggle_device"]["count"] == 40
+    assert summary["toggle_device"]["p95_le"] == 0.005
+    assert (summary["get_device"]["count"], summary["get_device"]["errors"]) == (2, 2)
+    assert summary["get_device"]["in_flight"] == 0
+
+    lines = metrics.render_prometheus()
+    targets = {
+        line.split('target="')[1].split('"')[0]
+        for line in lines
+        if line.startswith("kasa_action_duration_seconds_count")
+    }
+    assert len(targets) == 4  # two kept, "other" and "" (no target)
+    assert "other" in targets and "" in targets
+    assert 'kasa_actions_in_flight{action="toggle_device"} 0' in lines
+    assert 'kasa_action_errors_total{action="get_device",target="10.0.0.1"} 1' in lines
+
+
+def test_in_flight_counts_running_actions():
+    metrics = ActionMetrics("kasa")
+
+    with metrics.track("discover"):
+        assert metrics.summary()["discover"]["in_flight"] == 1
+        assert metrics.summary()["discover"]["count"] == 0
+        assert 'kasa_actions_in_flight{action="discover"} 1' in (
+            metrics.render_prometheus()
+        )
+    assert metrics.summary()["discover"]["in_flight"] == 0
+
+
+def test_histogram_merge_quantile_and_render():
+    fast, slow = Histogram((0.1, 1.0)), Histogram((0.1, 1.0))
+    for _ in range(3):
+        fast.observe(0.05)
+    slow.observe(5.0)
+    fast.merge(slow)
+
+    assert (fast.count, fast.quantile(0.5), fast.quantile(1.0)) == (
+        4,
+        0.1,
+        float("inf"),
+    )
+    assert fast.render("t", 'a="b"') == [
+        't_bucket{a="b",le="0.1"} 3',
+        't_bucket{a="b",le="1.0"} 3',
+        't_bucket{a="b",le="+Inf"} 4',
+        't_sum{a="b"} 5.15',
+        't_count{a="b"} 4',
+    ]
+    assert escape_label('a"b\\c\n') == 'a\\"b\\\\c\\n'
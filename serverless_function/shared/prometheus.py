@@ -0,0 +1,76 @@
+from bisect import bisect_left
+from typing import Any, List, Optional, Sequence, Tuple
+
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus style, cumulative on export)."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        """Initialize an empty histogram.
+
+        Args:
+            buckets (Sequence[float]): Sorted upper bounds, +Inf is implied
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: "Histogram") -> None:
+        """Add the observations of a histogram with the same buckets."""
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.sum += other.sum
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, cumulative count) pairs including +Inf."""
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((repr(bound), total))
+        result.append(("+Inf", self.count))
+        return result
+
+    def render(self, name: str, labels: str) -> List[str]:
+        """Render the bucket, sum and count samples of one labelled series.
+
+        Args:
+            name (str): Metric name
+            labels (str): Rendered label pairs, e.g. ``host="ilo"``
+
+        Returns:
+            List[str]: Exposition lines without HELP/TYPE
+        """
+        lines = [
+            f'{name}_bucket{{{labels},le="{le}"}} {count}'
+            for le, count in self.cumulative()
+        ]
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+def escape_label(value: Any) -> str:
+    """Escape a value for use inside a double-quoted label."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")